@@ -7,19 +7,39 @@ It analyzes code, generates features, tests implementations, and deploys improve
 """
 
 import os
+import re
 import sys
-import json
+import time
 import asyncio
+import argparse
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any
 
-# Try to import AI systems
-try:
-    from setup_huggingface import HuggingFaceGameAI
-    HF_AVAILABLE = True
-except ImportError:
-    HF_AVAILABLE = False
+from lua_optimizer import LuaOptimizer
+from candidate_ranker import CandidateRanker, static_penalties
+from code_index import CodeIndex, NUMPY_AVAILABLE, estimate_tokens
+from task_dedup import TaskDeduplicator
+from task_scheduler import TaskScheduler, CostModel
+from provider_gateway import ProviderGateways, ProviderUnavailable
+from dev_log import open_dev_log
+from checkpoint import Checkpoint, default_checkpoint_dir
+from lua_corpus import LuaCorpus
+from records import Finding, FindingType, Level, FeatureHistory, MemoryReport, memory_report_enabled
+
+# Shared model runtime helpers live with the worker
+sys.path.insert(0, str(Path(__file__).parent / "huggingface_workers"))
+
+from cassette import CassetteProxy, cassette_from_env
+from stub_backends import stub_backends, stubs_enabled
+from artifact_store import ArtifactStore, default_store_path
+from token_cache import TokenCache, default_cache_path
+from file_watcher import FileWatcher
+from lazy_imports import module_available
+
+# setup_huggingface is imported when a developer needs it, so the analyzer
+# path never loads the model runtime
+HF_AVAILABLE = module_available("transformers", "torch")
 
 # Add autocoder to path
 autocoder_path = Path(__file__).parent.parent.parent / "code" / "autocoder"
@@ -32,33 +52,41 @@ try:
 except ImportError:
     AUTOCODER_AVAILABLE = False
 
+    class TaskType:
+        """Stand-in so recorded or stub LLM calls work without AutoCoder installed"""
+        PLANNING = "PLANNING"
+        COMPLEX_CODING = "COMPLEX_CODING"
+
 
 class GameQualityAnalyzer:
     """Analyzes game code and finds improvement opportunities"""
 
-    def __init__(self, game_path):
+    def __init__(self, game_path, corpus=None):
         self.game_path = Path(game_path)
         self.src_path = self.game_path / "src"
+        self.corpus = corpus or LuaCorpus(self.src_path)
 
-    async def analyze_codebase(self):
-        """Analyze entire codebase for issues and opportunities"""
+    async def analyze_codebase(self, files=None):
+        """Analyze entire codebase (or only `files`, relative to src/) for issues and opportunities"""
 
-        print("\n🔍 Analyzing codebase...")
+        print("\n🔍 Analyzing codebase..." if files is None else f"\n🔍 Analyzing {len(files)} changed files...")
 
         issues = []
         opportunities = []
 
-        # Check each Lua file
-        for lua_file in self.src_path.rglob("*.lua"):
-            with open(lua_file, 'r') as f:
-                code = f.read()
+        # Check each Lua file; only files changed since the last pass are re-read from disk
+        self.corpus.refresh()
+        paths = self.corpus.paths() if files is None else sorted(p for p in files if p in self.corpus)
+        for relative in paths:
+            code = self.corpus.read(relative)
+            filename = Path(relative).name
 
             # Find potential issues
-            file_issues = self._check_code_quality(code, lua_file.name)
+            file_issues = self._check_code_quality(code, filename)
             issues.extend(file_issues)
 
             # Find improvement opportunities
-            file_opportunities = self._find_opportunities(code, lua_file.name)
+            file_opportunities = self._find_opportunities(code, filename)
             opportunities.extend(file_opportunities)
 
         print(f"   Found {len(issues)} issues")
@@ -73,40 +101,47 @@ class GameQualityAnalyzer:
 
         # Check for long functions (>100 lines)
         functions = code.split("function ")
+        line = functions[0].count('\n') + 1
         for i, func in enumerate(functions[1:]):
             lines = len(func.split('\n'))
             if lines > 100:
-                issues.append({
-                    "type": "code_smell",
-                    "severity": "medium",
-                    "file": filename,
-                    "description": f"Function #{i+1} is too long ({lines} lines)",
-                    "suggestion": "Consider breaking into smaller functions"
-                })
+                issues.append(Finding(
+                    type=FindingType.CODE_SMELL,
+                    severity=Level.MEDIUM,
+                    file=filename,
+                    line=line,
+                    end_line=line + lines - 1,
+                    description=f"Function #{i+1} is too long ({lines} lines)",
+                    suggestion="Consider breaking into smaller functions"
+                ))
+            line += lines - 1
 
         # Check for duplicated code patterns
         lines = code.split('\n')
         for i in range(len(lines) - 5):
             block = '\n'.join(lines[i:i+5])
             if code.count(block) > 2:
-                issues.append({
-                    "type": "duplication",
-                    "severity": "low",
-                    "file": filename,
-                    "description": "Duplicated code block detected",
-                    "suggestion": "Extract to reusable function"
-                })
+                issues.append(Finding(
+                    type=FindingType.DUPLICATION,
+                    severity=Level.LOW,
+                    file=filename,
+                    line=i + 1,
+                    end_line=i + 5,
+                    snippet=block.strip(),
+                    description="Duplicated code block detected",
+                    suggestion="Extract to reusable function"
+                ))
 
         # Check for missing error handling
         if "pcall" not in code and "xpcall" not in code:
             if "function" in code:
-                issues.append({
-                    "type": "error_handling",
-                    "severity": "medium",
-                    "file": filename,
-                    "description": "No error handling found",
-                    "suggestion": "Add pcall for error handling"
-                })
+                issues.append(Finding(
+                    type=FindingType.ERROR_HANDLING,
+                    severity=Level.MEDIUM,
+                    file=filename,
+                    description="No error handling found",
+                    suggestion="Add pcall for error handling"
+                ))
 
         return issues
 
@@ -117,103 +152,185 @@ class GameQualityAnalyzer:
 
         # Opportunities for optimization
         if "wait(" in code:
-            opportunities.append({
-                "type": "performance",
-                "priority": "low",
-                "file": filename,
-                "description": "Using wait() - could use task.wait()",
-                "benefit": "Better performance"
-            })
+            opportunities.append(Finding(
+                type=FindingType.PERFORMANCE,
+                priority=Level.LOW,
+                file=filename,
+                description="Using wait() - could use task.wait()",
+                benefit="Better performance"
+            ))
 
         # Opportunities for new features
         if "Service" in filename and "-- TODO" in code:
-            opportunities.append({
-                "type": "feature",
-                "priority": "medium",
-                "file": filename,
-                "description": "TODO comments found",
-                "benefit": "Complete unfinished features"
-            })
+            opportunities.append(Finding(
+                type=FindingType.FEATURE,
+                priority=Level.MEDIUM,
+                file=filename,
+                description="TODO comments found",
+                benefit="Complete unfinished features"
+            ))
 
         # Opportunities for refactoring
-        if "if" in code.count("if") > 10:
-            opportunities.append({
-                "type": "refactor",
-                "priority": "medium",
-                "file": filename,
-                "description": "Complex conditional logic",
-                "benefit": "Improved readability"
-            })
+        if len(re.findall(r"\bif\b", code)) > 10:
+            opportunities.append(Finding(
+                type=FindingType.REFACTOR,
+                priority=Level.MEDIUM,
+                file=filename,
+                description="Complex conditional logic",
+                benefit="Improved readability"
+            ))
 
         return opportunities
 
 
+def _create_hf_ai():
+    """HuggingFaceGameAI, importing setup_huggingface on first use"""
+
+    try:
+        from setup_huggingface import HuggingFaceGameAI
+    except ImportError:
+        return None
+    return HuggingFaceGameAI()
+
+
 class AutonomousGameDeveloper:
     """Main autonomous development system"""
 
-    def __init__(self, game_path=None):
+    def __init__(self, game_path=None, num_candidates=4, cassette=None, backends=None, gateways=None):
         self.game_path = game_path or Path(__file__).parent
-        self.analyzer = GameQualityAnalyzer(self.game_path)
 
-        # Initialize AI systems
-        self.autocoder = PatternAssistedCoder() if AUTOCODER_AVAILABLE else None
-        self.hf_ai = HuggingFaceGameAI() if HF_AVAILABLE else None
-        self.llm = MultiProviderLLM() if AUTOCODER_AVAILABLE else None
+        # One packed copy of src/ shared by the analyzer and the code index
+        self.corpus = LuaCorpus(Path(self.game_path) / "src")
+        self.analyzer = GameQualityAnalyzer(self.game_path, self.corpus)
+        self.optimizer = LuaOptimizer(Path(self.game_path) / "src")
+
+        # Candidates sampled per feature from the local code model
+        self.num_candidates = num_candidates
+        self.ranker = None
+        self._ranker_checked = False
+
+        # Existing functions retrieved into generation prompts
+        self.code_index = CodeIndex(Path(self.game_path) / "src", corpus=self.corpus) if NUMPY_AVAILABLE else None
+        self.prompt_tokens = None
+
+        # Near-identical analyzer findings are collapsed before scheduling
+        self.deduplicator = TaskDeduplicator()
+
+        # Initialize AI systems (MODEL_BACKEND=stub swaps in fake backends)
+        if backends is None and stubs_enabled():
+            backends = stub_backends()
+
+        if backends is not None:
+            self._use_backends(backends)
+        else:
+            self.autocoder = PatternAssistedCoder() if AUTOCODER_AVAILABLE else None
+            self.hf_ai = _create_hf_ai() if HF_AVAILABLE else None
+            self.llm = MultiProviderLLM() if AUTOCODER_AVAILABLE else None
+
+        # The code model and CodeBERT load on first use, not at startup
+        self._hf_setup = None
+        self._hf_setup_needed = backends is None and self.hf_ai is not None
+
+        # Rate limits, adaptive concurrency and circuit breakers per provider
+        self.gateways = gateways or ProviderGateways()
+
+        # Record or replay every provider call (MODEL_CASSETTE=path)
+        self.cassette = cassette or cassette_from_env()
+        if self.cassette:
+            self._attach_cassette(self.cassette)
+
+        # Accepted code, diffs and worker results, stored by content hash
+        self.artifacts = ArtifactStore(default_store_path(self.game_path))
+
+        # Development log: rotated segments with an index for queries (dev_log.py)
+        self.dev_log = open_dev_log(self.game_path)
+
+        # Full results go to the development log; memory keeps recent summaries and totals
+        self.features_developed = FeatureHistory()
 
-        # Development log
-        self.log_file = self.game_path / "autonomous_dev.log"
-        self.features_developed = []
+        # Task costs are learned from past runs in the development log
+        self.scheduler = TaskScheduler(CostModel.from_dev_log(self.dev_log))
 
-    async def develop_feature(self, feature_request: str) -> Dict[str, Any]:
+        # Stage-by-stage progress of the improvement loop, for --resume
+        self.checkpoint = None
+
+    def _use_backends(self, backends):
+        """Use the given provider objects (e.g. stub backends) instead of the real ones"""
+
+        self.autocoder = backends.get("autocoder")
+        self.llm = backends.get("llm")
+        self.hf_ai = None
+
+        if backends.get("code_gen") is not None:
+            self.hf_ai = _create_hf_ai()
+            if self.hf_ai is not None:
+                self.hf_ai.models["code_gen"] = backends["code_gen"]
+
+    def _attach_cassette(self, cassette):
+        """Route provider calls through the cassette; replay needs no real backends"""
+
+        for name in ("autocoder", "hf_ai", "llm"):
+            provider = getattr(self, name)
+            if provider is not None or cassette.replaying:
+                setattr(self, name, CassetteProxy(provider, cassette, name))
+
+        print(f"📼 Cassette {cassette.mode}: {cassette.path}")
+
+    async def develop_feature(self, feature_request: str, task=None) -> Dict[str, Any]:
         """Autonomously develop a new feature"""
 
         print(f"\n🛠️  Developing feature: {feature_request}")
 
+        started = time.perf_counter()
         result = {
             "feature": feature_request,
             "timestamp": datetime.now().isoformat(),
+            "task_type": task.get("type") if task else "feature",
+            "task_file": task.get("file") if task else None,
             "success": False
         }
 
         try:
+            # Stages finished before an interrupted run are restored instead of repeated
+            if self.checkpoint:
+                self.checkpoint.begin(feature_request)
+
             # Step 1: Plan implementation
             print("   📋 Planning implementation...")
 
-            plan = await self._plan_feature(feature_request)
+            plan = await self._stage("plan", lambda: self._plan_feature(feature_request))
             result["plan"] = plan
 
             # Step 2: Generate implementations with multiple AI models
             print("   🤖 Generating code...")
 
-            implementations = await self._generate_implementations(feature_request)
+            implementations = await self._stage("candidates", lambda: self._generate_implementations(feature_request))
             result["implementations"] = len(implementations)
+            result["providers"] = self._provider_usage(implementations)
 
             # Step 3: Score and select best implementation
             print("   📊 Scoring implementations...")
 
-            best_impl = await self._select_best_implementation(implementations)
+            best_impl = await self._stage("selected", lambda: self._select_best_implementation(implementations))
             result["selected_implementation"] = best_impl
 
             # Step 4: Test implementation
             print("   🧪 Testing implementation...")
 
-            test_result = await self._test_implementation(best_impl)
+            test_result = await self._stage("test", lambda: self._test_implementation(best_impl))
             result["test_result"] = test_result
 
             # Step 5: If tests pass, save the implementation
             if test_result.get("success", False):
                 print("   ✅ Tests passed!")
 
-                await self._save_implementation(feature_request, best_impl)
+                saved = await self._stage("saved", lambda: self._save_implementation(feature_request, best_impl))
+                result["artifact"] = saved["digest"]
                 result["success"] = True
 
                 # Learn from successful implementation
                 if self.autocoder:
-                    await self.autocoder.learn_from_code(
-                        best_impl["code"],
-                        language="lua",
-                        domain="roblox"
-                    )
+                    await self._stage("learned", lambda: self._learn(best_impl))
 
                 print("   💾 Implementation saved and learned")
 
@@ -225,12 +342,35 @@ class AutonomousGameDeveloper:
             print(f"   ❌ Development failed: {e}")
             result["error"] = str(e)
 
+        result["duration"] = round(time.perf_counter() - started, 3)
+
         # Log result
         self._log_development(result)
+        self.scheduler.cost_model.update(result)
         self.features_developed.append(result)
 
         return result
 
+    async def _stage(self, name, run):
+        """Result of a develop_feature stage, restored from the checkpoint when it already finished"""
+
+        if self.checkpoint and self.checkpoint.completed(name):
+            print(f"      💾 Restored {name} from checkpoint")
+            return self.checkpoint.stage(name)
+
+        value = await run()
+        if self.checkpoint:
+            self.checkpoint.record(name, value)
+        return value
+
+    async def _learn(self, implementation):
+        await self.autocoder.learn_from_code(
+            implementation["code"],
+            language="lua",
+            domain="roblox"
+        )
+        return True
+
     async def _plan_feature(self, feature_request):
         """Plan feature implementation"""
 
@@ -238,7 +378,9 @@ class AutonomousGameDeveloper:
             return {"steps": ["Generate code", "Test code", "Deploy code"]}
 
         try:
-            response = await self.llm.complete(
+            response = await self.gateways.call(
+                "llm",
+                self.llm.complete,
                 messages=[{
                     "role": "user",
                     "content": f"Plan how to implement this Roblox game feature: {feature_request}\n\nProvide step-by-step implementation plan."
@@ -253,82 +395,186 @@ class AutonomousGameDeveloper:
         except Exception as e:
             return {"error": str(e), "steps": []}
 
+    def _retrieve_context(self, feature_request, token_budget=400):
+        """Existing game functions most relevant to the request, within a token budget"""
+
+        if not self.code_index:
+            return ""
+
+        try:
+            self.code_index.refresh()
+            context = self.code_index.build_context(feature_request, token_budget, count_tokens=self._token_counter())
+            if self.prompt_tokens:
+                self.prompt_tokens.flush()
+            return context
+        except Exception as e:
+            print(f"      Code index unavailable: {e}")
+            return ""
+
+    def _token_counter(self):
+        """Exact, cached token counts from the local code model's tokenizer, if there is one"""
+
+        generator = getattr(self.hf_ai, "models", {}).get("code_gen")
+        tokenizer = getattr(generator, "tokenizer", None)
+        if tokenizer is None:
+            return None
+
+        if self.prompt_tokens is None or self.prompt_tokens.tokenizer is not tokenizer:
+            self.prompt_tokens = TokenCache(default_cache_path(self.game_path), tokenizer)
+        return self.prompt_tokens.count
+
+    async def _load_hf_models(self):
+        """Load the code generation and CodeBERT models once, the first time a feature needs them"""
+
+        if not self._hf_setup_needed or (self.cassette and self.cassette.replaying):
+            return
+
+        if self._hf_setup is None:
+            self._hf_setup = asyncio.ensure_future(self._setup_hf_models())
+        await self._hf_setup
+
+    async def _setup_hf_models(self):
+        if "code_gen" not in self.hf_ai.models:
+            await self.hf_ai.setup_code_generation()
+        if "code_bert" not in self.hf_ai.models:
+            await self.hf_ai.setup_code_understanding()
+
     async def _generate_implementations(self, feature_request):
-        """Generate multiple implementations"""
+        """Generate multiple implementations, querying the providers concurrently"""
 
-        implementations = []
+        await self._load_hf_models()
+        context = self._retrieve_context(feature_request)
 
-        # Try with AutoCoder
+        providers = []
         if self.autocoder:
-            try:
-                impl = await self.autocoder.generate_code(
-                    prompt=feature_request,
-                    language="lua",
-                    patterns_domain="roblox"
-                )
-
-                implementations.append({
-                    "source": "autocoder",
-                    "code": impl.get("code", ""),
-                    "quality": impl.get("quality_score", 0),
-                    "confidence": impl.get("confidence", 0)
-                })
-
-            except Exception as e:
-                print(f"      AutoCoder failed: {e}")
-
-        # Try with HuggingFace
-        if self.hf_ai and hasattr(self.hf_ai, "generate_lua_code"):
-            try:
-                impl = await self.hf_ai.generate_lua_code(feature_request)
-
-                if impl.get("success", False):
-                    implementations.append({
-                        "source": "huggingface",
-                        "code": impl.get("code", ""),
-                        "quality": 0.5,  # Default score
-                        "confidence": 0.6
-                    })
-
-            except Exception as e:
-                print(f"      HuggingFace failed: {e}")
-
-        # Try with raw LLM
+            providers.append(("autocoder", "AutoCoder", self._autocoder_implementations))
+        if self._code_model_ready():
+            providers.append(("huggingface", "HuggingFace", self._huggingface_implementations))
         if self.llm:
-            try:
-                response = await self.llm.complete(
-                    messages=[{
-                        "role": "user",
-                        "content": f"Write Lua code for Roblox that implements: {feature_request}\n\nProvide complete, working code."
-                    }],
-                    task_type=TaskType.COMPLEX_CODING
-                )
-
-                code = response["choices"][0]["message"]["content"]
-
-                implementations.append({
-                    "source": "llm",
-                    "code": code,
-                    "quality": 0.7,  # Assume good quality
-                    "confidence": 0.8
-                })
-
-            except Exception as e:
-                print(f"      LLM failed: {e}")
+            providers.append(("llm", "LLM", self._llm_implementations))
+
+        # Each provider runs under its own rate limit, concurrency limit, timeout and breaker
+        results = await asyncio.gather(
+            *(self.gateways.call(name, generate, feature_request, context) for name, _, generate in providers),
+            return_exceptions=True
+        )
+
+        implementations = []
+        for (_, label, _), result in zip(providers, results):
+            if isinstance(result, ProviderUnavailable):
+                print(f"      {label} skipped: {result}")
+            elif isinstance(result, Exception):
+                print(f"      {label} failed: {result}")
+            else:
+                implementations.extend(result)
 
         return implementations
 
+    def _code_model_ready(self):
+        """Whether HuggingFace generation can run; an unloaded model is not a failing provider"""
+
+        if not self.hf_ai or not hasattr(self.hf_ai, "generate_lua_code"):
+            return False
+        if self.cassette and self.cassette.replaying:
+            return True
+        return "code_gen" in getattr(self.hf_ai, "models", {})
+
+    async def _autocoder_implementations(self, feature_request, context):
+        started = time.perf_counter()
+        impl = await self.autocoder.generate_code(
+            prompt=feature_request,
+            language="lua",
+            patterns_domain="roblox"
+        )
+
+        return [{
+            "source": "autocoder",
+            "code": impl.get("code", ""),
+            "quality": impl.get("quality_score", 0),
+            "confidence": impl.get("confidence", 0),
+            "latency": time.perf_counter() - started
+        }]
+
+    async def _huggingface_implementations(self, feature_request, context):
+        started = time.perf_counter()
+        impl = await self.hf_ai.generate_lua_code(
+            feature_request,
+            context=context,
+            num_candidates=self.num_candidates
+        )
+
+        # generate_lua_code reports errors instead of raising; the breaker needs to see them
+        if not impl.get("success", False):
+            raise RuntimeError(impl.get("error", "generation failed"))
+
+        latency = time.perf_counter() - started
+        return [
+            {
+                "source": "huggingface",
+                "code": code,
+                "quality": 0.5,  # Default score
+                "confidence": 0.6,
+                "latency": latency
+            }
+            for code in impl.get("candidates", [impl.get("code", "")])
+        ]
+
+    async def _llm_implementations(self, feature_request, context):
+        reference = f"Existing game code to follow:\n{context}\n\n" if context else ""
+
+        started = time.perf_counter()
+        response = await self.llm.complete(
+            messages=[{
+                "role": "user",
+                "content": f"{reference}Write Lua code for Roblox that implements: {feature_request}\n\nProvide complete, working code."
+            }],
+            task_type=TaskType.COMPLEX_CODING
+        )
+
+        return [{
+            "source": "llm",
+            "code": response["choices"][0]["message"]["content"],
+            "quality": 0.7,  # Assume good quality
+            "confidence": 0.8,
+            "latency": time.perf_counter() - started
+        }]
+
+    def _provider_usage(self, implementations):
+        """Latency and generated tokens per provider, for the scheduler's cost model"""
+
+        usage = {}
+        for impl in implementations:
+            stats = usage.setdefault(impl["source"], {"seconds": 0.0, "tokens": 0})
+            # Candidates from one call share its latency
+            stats["seconds"] = round(max(stats["seconds"], impl.get("latency", 0.0)), 3)
+            stats["tokens"] += estimate_tokens(impl.get("code", ""))
+        return usage
+
     async def _select_best_implementation(self, implementations):
         """Select best implementation based on scores"""
 
         if not implementations:
             return None
 
-        # Sort by quality * confidence
-        scored = [{
-            **impl,
-            "score": impl["quality"] * impl["confidence"]
-        } for impl in implementations]
+        # Rank all candidates in one batched CodeBERT pass when it is loaded; without it, stop asking
+        if not self._ranker_checked:
+            await self._load_hf_models()
+            self.ranker = CandidateRanker.from_hf_ai(self.hf_ai, Path(self.game_path) / "src")
+            self._ranker_checked = True
+
+        if self.ranker is not None:
+            return self.ranker.rank(implementations)[0]
+
+        # Otherwise sort by quality * confidence minus static-analysis penalties
+        scored = []
+        for impl in implementations:
+            penalty, reasons = static_penalties(impl.get("code", ""))
+            scored.append({
+                **impl,
+                "penalty": penalty,
+                "penalties": reasons,
+                "score": impl["quality"] * impl["confidence"] - penalty
+            })
 
         scored.sort(key=lambda x: x["score"], reverse=True)
 
@@ -362,101 +608,163 @@ class AutonomousGameDeveloper:
     async def _save_implementation(self, feature_name, implementation):
         """Save successful implementation"""
 
-        # Create features directory
-        features_dir = self.game_path / "generated_features"
-        features_dir.mkdir(exist_ok=True)
-
-        # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"feature_{timestamp}.lua"
-        filepath = features_dir / filename
+        # Optimize before saving (semantics-preserving rewrites only)
+        optimization = self.optimizer.optimize(implementation.get("code", ""))
 
-        # Save code
-        with open(filepath, 'w') as f:
-            f.write(f"-- {feature_name}\n")
-            f.write(f"-- Generated: {datetime.now().isoformat()}\n")
-            f.write(f"-- Source: {implementation.get('source', 'unknown')}\n\n")
-            f.write(implementation.get("code", ""))
-
-        # Save metadata
         metadata = {
-            "feature": feature_name,
-            "file": str(filepath),
             "timestamp": datetime.now().isoformat(),
-            "source": implementation.get("source"),
             "quality": implementation.get("quality"),
-            "confidence": implementation.get("confidence")
+            "confidence": implementation.get("confidence"),
+            "optimizations": optimization.summary()
         }
 
-        metadata_file = features_dir / f"feature_{timestamp}.json"
-        with open(metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        if optimization.changed:
+            diff = self.artifacts.put(optimization.diff(), kind="diff", feature=feature_name,
+                                      source=implementation.get("source"))
+            metadata["diff"] = diff["digest"]
+
+        # Identical code is stored once; every save still gets its own index entry
+        return self.artifacts.put(
+            optimization.code,
+            kind="lua",
+            feature=feature_name,
+            source=implementation.get("source"),
+            metadata=metadata
+        )
 
     def _log_development(self, result):
         """Log development activity"""
 
-        with open(self.log_file, 'a') as f:
-            f.write(json.dumps(result) + '\n')
+        self.dev_log.append(result)
 
-    async def autonomous_improvement_loop(self, max_iterations=10):
-        """Run autonomous improvement loop"""
+    async def autonomous_improvement_loop(self, max_iterations=10, budget_seconds=300, iteration_delay=60,
+                                          watch=False, resume=False, memory_report=None):
+        """Run autonomous improvement loop (watch: re-analyze files as they change instead of on a timer)"""
 
         print("=" * 60)
         print("🤖 Autonomous Game Development Loop")
         print("=" * 60)
 
-        for iteration in range(max_iterations):
+        src_path = self.analyzer.src_path.resolve()
+        watcher = FileWatcher([src_path]) if watch else None
+        changed = None
+
+        # Each finished stage is checkpointed; --resume continues an interrupted run with the same settings
+        checkpoint = self.checkpoint = Checkpoint(
+            "autonomous_loop", default_checkpoint_dir(self.game_path), blobs=self.artifacts
+        )
+        run = {"max_iterations": max_iterations, "budget_seconds": budget_seconds}
+        if checkpoint.start(run, resume):
+            print(f"💾 Resuming from checkpoint at iteration {checkpoint.get('iteration', 0) + 1}")
+        elif resume:
+            print("💾 No checkpoint for these settings, starting fresh")
+
+        first_iteration = checkpoint.get("iteration", 0)
+
+        # Per-iteration traced and resident memory (--memory-report or MEMORY_REPORT=1)
+        memory = MemoryReport() if memory_report_enabled(memory_report) else None
+        if memory:
+            memory.start()
+
+        for iteration in range(first_iteration, max_iterations):
             print(f"\n📍 Iteration {iteration + 1}/{max_iterations}")
 
-            # Analyze codebase
-            issues, opportunities = await self.analyzer.analyze_codebase()
+            tasks = checkpoint.get("tasks") if iteration == first_iteration else None
+
+            if tasks is None:
+                # Analyze the codebase, or just what changed since the last iteration
+                issues, opportunities = await self.analyzer.analyze_codebase(changed)
+
+                # Collapse near-duplicate findings, then prioritize
+                findings = issues + opportunities
+                unique = self.deduplicator.collapse(findings)
+                if len(unique) < len(findings):
+                    print(f"   🧹 Collapsed {len(findings)} findings into {len(unique)} tasks")
 
-            # Prioritize tasks
-            tasks = self._prioritize_tasks(issues + opportunities)
+                tasks = self._prioritize_tasks(unique, budget_seconds)
 
-            if not tasks:
-                print("   ✅ No tasks found - codebase is perfect!")
-                break
+                if not tasks and not watcher:
+                    print("   ✅ No tasks found - codebase is perfect!")
+                    break
+
+                # Work through the tasks that fit this iteration's compute budget
+                print(f"   🗓️  Scheduled {len(tasks)}/{len(unique)} tasks within {budget_seconds}s")
+                checkpoint.update(iteration=iteration, tasks=checkpoint.compact(tasks), next_task=0)
+            else:
+                print(f"   💾 Restored {len(tasks)} scheduled tasks, "
+                      f"{len(tasks) - checkpoint.get('next_task', 0)} still to do")
 
-            # Work on top 3 tasks
-            for task in tasks[:3]:
+            for index in range(checkpoint.get("next_task", 0), len(tasks)):
+                task = tasks[index]
                 feature_request = self._task_to_feature_request(task)
 
-                result = await self.develop_feature(feature_request)
+                result = await self.develop_feature(feature_request, task)
 
                 if result["success"]:
                     print(f"   ✅ Completed: {feature_request}")
                 else:
                     print(f"   ❌ Failed: {feature_request}")
 
-            # Wait before next iteration
-            print(f"\n⏳ Waiting 60 seconds before next iteration...")
-            await asyncio.sleep(60)
+                checkpoint.finish_unit(next_task=index + 1)
+
+            checkpoint.update(iteration=iteration + 1, tasks=None, next_task=0)
+
+            if self.gateways.gateways:
+                print(f"   🚦 {self.gateways.summary()}")
+
+            if memory:
+                memory.sample(f"after iteration {iteration + 1}")
+
+            # Wait for edits, or a fixed delay, before the next iteration
+            if watcher:
+                if iteration + 1 < max_iterations:
+                    print(f"\n👀 Waiting for changes under {src_path} ({watcher.backend})...")
+                    self.dev_log.flush()
+                    changed = {path.relative_to(src_path).as_posix() for path in await watcher.wait()}
+            elif iteration_delay:
+                print(f"\n⏳ Waiting {iteration_delay} seconds before next iteration...")
+                await asyncio.sleep(iteration_delay)
+
+        if watcher:
+            watcher.close()
+        self.dev_log.flush()
+
+        # Finished runs start fresh next time
+        checkpoint.clear()
+        self.checkpoint = None
 
         print("\n" + "=" * 60)
         print("✅ Autonomous Development Complete!")
-        print(f"   Features Developed: {len([f for f in self.features_developed if f['success']])}/{len(self.features_developed)}")
+        print(f"   Features Developed: {self.features_developed.succeeded}/{self.features_developed.total}")
+        if memory:
+            drift = memory.summary()
+            if drift:
+                rss = "n/a" if drift["rss_drift_mb"] is None else f"{drift['rss_drift_mb']:+.2f} MB"
+                print(f"   Memory drift over {drift['samples']} samples: "
+                      f"traced {drift['traced_drift_mb']:+.2f} MB, RSS {rss}")
+            memory.stop()
+        for name, state in self.gateways.snapshot().items():
+            print(f"   {name}: {state['succeeded']}/{state['calls']} ok, {state['timed_out']} timed out, "
+                  f"{state['rejected']} skipped, circuit {state['state']}")
+        if self.cassette:
+            stats = self.cassette.stats()
+            print(f"   Cassette: {stats['recorded']} recorded, {stats['replayed']} replayed, {stats['missed']} missed")
+            self.cassette.close()
         print("=" * 60)
 
-    def _prioritize_tasks(self, tasks):
-        """Prioritize tasks by severity/priority"""
-
-        # Sort by severity (high > medium > low)
-        severity_order = {"high": 3, "medium": 2, "low": 1}
+    def _prioritize_tasks(self, tasks, budget_seconds=None):
+        """Order tasks by expected value per second within the compute budget"""
 
-        sorted_tasks = sorted(
-            tasks,
-            key=lambda t: severity_order.get(t.get("severity", "low"), 1),
-            reverse=True
-        )
-
-        return sorted_tasks
+        return self.scheduler.schedule(tasks, budget_seconds)
 
     def _task_to_feature_request(self, task):
         """Convert task to feature request"""
 
         if task.get("type") == "code_smell":
             return f"Refactor {task['file']}: {task['suggestion']}"
+        elif task.get("type") == "duplication" and "line" in task:
+            lines = ", ".join(str(line) for line in task.get("lines", [task["line"]]))
+            return f"Extract duplicated code in {task['file']} (lines {lines}) into a reusable function"
         elif task.get("type") == "error_handling":
             return f"Add error handling to {task['file']}"
         elif task.get("type") == "performance":
@@ -468,6 +776,14 @@ class AutonomousGameDeveloper:
 async def main():
     """Main entry point"""
 
+    parser = argparse.ArgumentParser(description="Autonomous game development loop")
+    parser.add_argument("--iterations", type=int, default=None, help="Iterations to run (default: 5, watch: 100)")
+    parser.add_argument("--watch", action="store_true", help="Re-analyze files under src/ as they change")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint")
+    parser.add_argument("--memory-report", action="store_true", default=None,
+                        help="Print traced and resident memory after every iteration")
+    args = parser.parse_args()
+
     print("🤖 Autonomous Game Development System\n")
 
     # Check dependencies
@@ -482,8 +798,15 @@ async def main():
     # Create developer
     developer = AutonomousGameDeveloper()
 
-    # Run autonomous loop
-    await developer.autonomous_improvement_loop(max_iterations=5)
+    # Run autonomous loop; replayed runs have nothing to wait for
+    replaying = developer.cassette is not None and developer.cassette.replaying
+    await developer.autonomous_improvement_loop(
+        max_iterations=args.iterations or (100 if args.watch else 5),
+        iteration_delay=0 if replaying else 60,
+        watch=args.watch,
+        resume=args.resume,
+        memory_report=args.memory_report
+    )
 
 
 if __name__ == "__main__":
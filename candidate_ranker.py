@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Candidate Ranking with CodeBERT
+
+Ranks generated Lua candidates by how closely they resemble known-good
+functions from the game's src/ tree, minus static-analysis penalties. All K
+candidates are embedded in one batched CodeBERT forward pass; the reference
+embeddings are computed once and reused.
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import List, Dict, Any
+
+from lua_syntax import check_syntax, find_functions, LuaSyntaxError
+
+# Shared model runtime helpers live with the worker
+sys.path.insert(0, str(Path(__file__).parent / "huggingface_workers"))
+
+from embeddings import CodeBertEmbedder, TORCH_AVAILABLE
+from token_cache import TokenCache, default_cache_path, NUMPY_AVAILABLE
+
+
+# (pattern, penalty, reason) checks applied to every candidate
+STATIC_CHECKS = [
+    (re.compile(r"(?<![.:\w])(wait|spawn|delay)\s*\("), 0.05, "deprecated wait/spawn/delay"),
+    (re.compile(r"^function\s+\w+\s*\(", re.MULTILINE), 0.05, "global function definition"),
+    (re.compile(r"--\s*TODO"), 0.05, "unfinished TODO"),
+    (re.compile(r"\bwhile\s+true\s+do\b(?![\s\S]*\bwait\s*\()"), 0.2, "busy loop without yield"),
+]
+
+
+def static_penalties(code):
+    """Penalty in [0, 1] and the reasons for it"""
+
+    penalty = 0.0
+    reasons = []
+
+    stripped = code.strip()
+    if len(stripped) < 20:
+        return 1.0, ["empty or trivial code"]
+
+    error = check_syntax(code)
+    if error:
+        penalty += 0.5
+        reasons.append(f"syntax: {error}")
+
+    for pattern, weight, reason in STATIC_CHECKS:
+        if pattern.search(code):
+            penalty += weight
+            reasons.append(reason)
+
+    # Small models degenerate into repeating the same line
+    lines = [line.strip() for line in stripped.splitlines() if line.strip()]
+    if len(lines) >= 6:
+        repeated = 1 - len(set(lines)) / len(lines)
+        if repeated > 0.3:
+            penalty += min(repeated, 0.5)
+            reasons.append(f"{repeated:.0%} repeated lines")
+
+    return min(penalty, 1.0), reasons
+
+
+class CandidateRanker:
+    """Scores candidates by similarity to known-good code plus static penalties"""
+
+    def __init__(self, embedder, src_path, top_k=3):
+        self.embedder = embedder
+        self.src_path = Path(src_path)
+        self.top_k = top_k
+        self._references = None
+        self.reference_names: List[str] = []
+
+    @classmethod
+    def from_hf_ai(cls, hf_ai, src_path):
+        """Build a ranker from HuggingFaceGameAI's CodeBERT model, if it is loaded"""
+
+        if not TORCH_AVAILABLE or hf_ai is None or "code_bert" not in getattr(hf_ai, "models", {}):
+            return None
+
+        code_bert = hf_ai.models["code_bert"]
+
+        # The shared inference server hands out a ready-made remote embedder
+        if hasattr(code_bert, "embed"):
+            return cls(code_bert, src_path)
+
+        # Reference functions are re-embedded every run; their token ids are not recomputed
+        tokenizer = code_bert["tokenizer"]
+        token_cache = TokenCache(default_cache_path(Path(src_path).parent), tokenizer) if NUMPY_AVAILABLE else None
+
+        return cls(CodeBertEmbedder(tokenizer, code_bert["model"], token_cache=token_cache), src_path)
+
+    def reference_functions(self):
+        """Named functions from the src/ tree"""
+
+        functions = []
+        for lua_file in sorted(self.src_path.rglob("*.lua")):
+            try:
+                for function in find_functions(lua_file.read_text()):
+                    functions.append((f"{lua_file.name}:{function.name}", function.code))
+            except LuaSyntaxError:
+                continue
+        return functions
+
+    def references(self):
+        """Reference embedding matrix, computed once"""
+
+        if self._references is None:
+            functions = self.reference_functions()
+            self.reference_names = [name for name, _ in functions]
+            self._references = self.embedder.embed([code for _, code in functions])
+        return self._references
+
+    def rank(self, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return candidates sorted best-first with similarity, penalty and score"""
+
+        if not candidates:
+            return []
+
+        references = self.references()
+        embeddings = self.embedder.embed([c.get("code", "") for c in candidates])
+
+        if len(references):
+            similarity = embeddings @ references.T
+            k = min(self.top_k, similarity.shape[1])
+            top_scores, top_indices = similarity.topk(k, dim=1)
+        else:
+            top_scores = top_indices = None
+
+        ranked = []
+        for i, candidate in enumerate(candidates):
+            penalty, reasons = static_penalties(candidate.get("code", ""))
+
+            if top_scores is not None:
+                score_similarity = float(top_scores[i].mean())
+                nearest = self.reference_names[int(top_indices[i][0])]
+            else:
+                score_similarity, nearest = 0.0, None
+
+            ranked.append({
+                **candidate,
+                "similarity": round(score_similarity, 4),
+                "nearest_reference": nearest,
+                "penalty": round(penalty, 3),
+                "penalties": reasons,
+                "score": round(score_similarity - penalty, 4)
+            })
+
+        ranked.sort(key=lambda c: c["score"], reverse=True)
+        return ranked
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Run Checkpoints
+
+A long-running pipeline (the improvement loop, AutoCoder training) records
+each completed stage in a small JSON checkpoint so a killed run can resume
+where it stopped instead of re-analyzing, re-planning and re-generating.
+Every save replaces the file atomically (temporary file, fsync, rename), so a
+crash leaves either the previous checkpoint or the new one, never a torn one.
+Bulky stage values such as candidate code go to the artifact store and the
+checkpoint keeps only their digest.
+
+    python checkpoint.py            # list checkpoints and their progress
+    python checkpoint.py --clear autonomous_loop
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+CHECKPOINT_VERSION = 1
+
+# Stage values larger than this (as JSON) are stored as blobs when a store is available
+INLINE_LIMIT = 2048
+
+
+def default_checkpoint_dir(game_path=None) -> Path:
+    """CHECKPOINT_DIR, else <game>/.checkpoints"""
+
+    if os.getenv("CHECKPOINT_DIR"):
+        return Path(os.environ["CHECKPOINT_DIR"])
+    return Path(game_path or Path(__file__).parent) / ".checkpoints"
+
+
+def write_atomic(path: Path, data: bytes):
+    """Replace path with data so readers see the old or the new content, nothing in between"""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Make the rename itself durable
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class Checkpoint:
+    """Durable progress record for one named pipeline"""
+
+    def __init__(self, name, directory=None, blobs=None):
+        self.name = name
+        self.path = Path(directory or default_checkpoint_dir()) / f"{name}.json"
+        self.blobs = blobs
+        self.state: Dict[str, Any] = {}
+        self.resumed = False
+
+    def load(self, run: Optional[Dict[str, Any]] = None) -> bool:
+        """Load the stored checkpoint; returns False if missing, unreadable or from a different run config"""
+
+        try:
+            state = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return False
+
+        if state.get("version") != CHECKPOINT_VERSION or (run is not None and state.get("run") != run):
+            return False
+
+        self.state = state
+        self.resumed = True
+        return True
+
+    def start(self, run: Optional[Dict[str, Any]] = None, resume=False) -> bool:
+        """Resume a matching checkpoint if asked to, else begin a fresh one; returns True if resumed"""
+
+        if resume and self.load(run):
+            return True
+
+        self.resumed = False
+        self.state = {"version": CHECKPOINT_VERSION, "run": run, "started": time.time()}
+        self.save()
+        return False
+
+    def save(self):
+        self.state["updated"] = time.time()
+        write_atomic(self.path, json.dumps(self.state, separators=(",", ":"), default=str).encode())
+
+    def get(self, key, default=None):
+        return self.expand(self.state.get(key, default))
+
+    def compact(self, value):
+        """value, or a reference to it in the blob store if it is too big to keep inline"""
+
+        encoded = json.dumps(value, separators=(",", ":"), default=str)
+        if self.blobs is None or len(encoded) <= INLINE_LIMIT:
+            return json.loads(encoded)
+        record = self.blobs.put(encoded, kind="checkpoint", feature=self.state.get("unit"), source=self.name)
+        return {"blob": record["digest"]}
+
+    def expand(self, value):
+        if isinstance(value, dict) and set(value) == {"blob"}:
+            return json.loads(self.blobs.read(value["blob"]))
+        return value
+
+    def update(self, **fields):
+        """Record fields and save"""
+
+        self.state.update(fields)
+        self.save()
+
+    # Stages of one unit of work (a feature, a training phase)
+
+    def begin(self, unit):
+        """Start recording stages for unit, keeping them if it is the unit the checkpoint stopped in"""
+
+        if self.state.get("unit") != unit:
+            self.update(unit=unit, stages={})
+
+    def completed(self, name) -> bool:
+        """Whether a stage of the current unit finished; its value may be None"""
+
+        return name in self.state.get("stages", {})
+
+    def stage(self, name):
+        """Stored value of a completed stage of the current unit, or None"""
+
+        return self.expand(self.state.get("stages", {}).get(name))
+
+    def record(self, name, value):
+        """Record a completed stage of the current unit"""
+
+        self.state.setdefault("stages", {})[name] = self.compact(value)
+        self.save()
+
+    def finish_unit(self, **fields):
+        """Drop the finished unit's stages and record progress"""
+
+        self.update(unit=None, stages={}, **fields)
+
+    def clear(self):
+        """Remove the checkpoint once the run completes"""
+
+        self.state = {}
+        self.resumed = False
+        if self.path.exists():
+            self.path.unlink()
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Inspect or clear run checkpoints")
+    parser.add_argument("--dir", default=None, help="Checkpoint directory (default: CHECKPOINT_DIR or ./.checkpoints)")
+    parser.add_argument("--clear", metavar="NAME", help="Delete a checkpoint so the next run starts fresh")
+    args = parser.parse_args()
+
+    directory = Path(args.dir or default_checkpoint_dir())
+
+    if args.clear:
+        checkpoint = Checkpoint(args.clear, directory)
+        if not checkpoint.path.exists():
+            print(f"❌ No checkpoint named {args.clear}")
+            return 1
+        checkpoint.clear()
+        print(f"🗑️  Cleared {args.clear}")
+        return 0
+
+    paths = sorted(directory.glob("*.json")) if directory.exists() else []
+    if not paths:
+        print("📭 No checkpoints")
+        return 0
+
+    for path in paths:
+        try:
+            state = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            print(f"   ⚠️  {path.stem}: unreadable")
+            continue
+
+        # Side files (e.g. pattern snapshots) share the directory
+        if not isinstance(state, dict) or "version" not in state:
+            continue
+
+        progress = {k: v for k, v in state.items() if k not in ("version", "run", "started", "updated", "stages")}
+        updated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(state.get("updated", 0)))
+        print(f"   💾 {path.stem} ({path.stat().st_size} bytes, updated {updated})")
+        print(f"      run: {json.dumps(state.get('run'))}")
+        print(f"      progress: {json.dumps(progress, default=str)[:200]}")
+        if state.get("stages"):
+            print(f"      stages done: {', '.join(state['stages'])}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Function-Level Code Index
+
+Embeds every named function in src/**/*.lua and keeps the vectors in a
+memory-mapped float32 matrix named in a JSON metadata file. Sources come from
+the packed Lua corpus; refreshing only re-chunks files whose content hash
+changed and only re-embeds functions whose source changed, so keeping the
+index current costs a handful of stat() calls.
+
+Used to inject the most relevant existing functions into generation prompts:
+    python code_index.py "save player data with retries"
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any
+
+from lua_syntax import find_functions, LuaSyntaxError
+from lua_corpus import LuaCorpus
+
+# Shared model runtime helpers live with the worker
+sys.path.insert(0, str(Path(__file__).parent / "huggingface_workers"))
+
+from lazy_imports import LazyModule, module_available
+
+np = LazyModule("numpy")
+NUMPY_AVAILABLE = module_available("numpy")
+
+
+INDEX_VERSION = 3
+DEFAULT_TOKEN_BUDGET = 400
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+CAMEL_PARTS = re.compile(r"[A-Z]+(?=[A-Z][a-z]|\b|\d)|[A-Z]?[a-z]+|\d+")
+
+
+def estimate_tokens(text):
+    """Rough token count for code (about four characters per token)"""
+
+    return len(text) // 4 + 1
+
+
+def code_terms(text):
+    """Lower-cased identifiers and their camelCase/snake_case parts"""
+
+    terms = []
+    for identifier in IDENTIFIER.findall(text):
+        terms.append(identifier.lower())
+        parts = [p.lower() for chunk in identifier.split("_") for p in CAMEL_PARTS.findall(chunk)]
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+class HashingEmbedder:
+    """Dependency-free embeddings from hashed identifier unigrams and bigrams"""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _bucket(self, term):
+        digest = hashlib.blake2b(term.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def embed(self, texts: List[str]):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            terms = code_terms(text)
+            for term in terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]:
+                index, sign = self._bucket(term)
+                matrix[row, index] += sign
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-9)
+
+
+class ModelEmbedder:
+    """Adapts a torch embedder (e.g. CodeBertEmbedder) to return NumPy rows"""
+
+    def __init__(self, embedder, name):
+        self.embedder = embedder
+        self.name = name
+
+    def embed(self, texts: List[str]):
+        return self.embedder.embed(texts).float().cpu().numpy()
+
+
+class CodeIndex:
+    """On-disk embedding index of the game's functions"""
+
+    def __init__(self, src_path, index_dir=None, embedder=None, corpus=None):
+        self.src_path = Path(src_path)
+        self.index_dir = Path(index_dir or self.src_path.parent / ".code_index")
+        self.embedder = embedder or HashingEmbedder()
+        self.corpus = corpus or LuaCorpus(self.src_path)
+
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.entries: List[Dict[str, Any]] = []
+        self.matrix = None
+        self._loaded = False
+
+    @property
+    def metadata_path(self):
+        return self.index_dir / "index.json"
+
+    def load(self):
+        """Open the stored index; returns False if missing or built differently"""
+
+        self._loaded = True
+
+        if not self.metadata_path.exists():
+            return False
+
+        try:
+            metadata = json.loads(self.metadata_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return False
+
+        if metadata.get("version") != INDEX_VERSION or metadata.get("embedder") != self.embedder.name:
+            return False
+
+        rows, dim = len(metadata["entries"]), metadata["dim"]
+
+        # np.memmap cannot map an empty file
+        if rows:
+            # A vectors file that vanished (replaced by a newer index) or does not match is rebuilt
+            vectors_path = self.index_dir / metadata["vectors"]
+            try:
+                if vectors_path.stat().st_size != rows * dim * 4:
+                    return False
+                matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, dim))
+            except OSError:
+                return False
+        else:
+            matrix = np.zeros((0, dim), dtype=np.float32)
+
+        self.files = metadata["files"]
+        self.entries = metadata["entries"]
+        self.matrix = matrix
+        return True
+
+    def refresh(self, rebuild=False):
+        """Bring the index up to date with src/; returns the number of functions embedded"""
+
+        if not self._loaded and not rebuild:
+            self.load()
+
+        old_rows = {}
+        if not rebuild and self.matrix is not None:
+            for row, entry in enumerate(self.entries):
+                old_rows[entry["hash"]] = row
+
+        files = {}
+        chunks = []
+        changed = rebuild or self.matrix is None
+
+        self.corpus.refresh()
+
+        for relative in self.corpus.paths():
+            digest = self.corpus.entry(relative)["hash"]
+            previous = self.files.get(relative)
+
+            if not rebuild and previous and previous["hash"] == digest:
+                files[relative] = {**previous, "rows": []}
+                chunks.extend(self.entries[row] for row in previous["rows"])
+                continue
+
+            changed = True
+            files[relative] = {"hash": digest, "rows": []}
+
+            try:
+                functions = find_functions(self.corpus.read(relative))
+            except (LuaSyntaxError, UnicodeDecodeError):
+                continue
+
+            for function in functions:
+                chunks.append({
+                    "file": relative,
+                    "name": function.name,
+                    "start_line": function.start_line,
+                    "end_line": function.end_line,
+                    "hash": hashlib.sha1(function.code.encode()).hexdigest(),
+                    "tokens": estimate_tokens(function.code),
+                    "code": function.code
+                })
+
+        if set(files) != set(self.files):
+            changed = True
+
+        if not changed:
+            return 0
+
+        # Reuse stored vectors for unchanged function bodies, embed the rest
+        missing = [i for i, chunk in enumerate(chunks) if chunk["hash"] not in old_rows]
+        embedded = self.embedder.embed([chunks[i]["code"] for i in missing]) if missing else None
+        dim = embedded.shape[1] if embedded is not None else (
+            self.matrix.shape[1] if self.matrix is not None else getattr(self.embedder, "dim", 0)
+        )
+
+        matrix = np.zeros((len(chunks), dim), dtype=np.float32)
+        for i, chunk in enumerate(chunks):
+            if chunk["hash"] in old_rows:
+                matrix[i] = self.matrix[old_rows[chunk["hash"]]]
+        if missing:
+            matrix[missing] = embedded
+
+        for row, chunk in enumerate(chunks):
+            files[chunk["file"]]["rows"].append(row)
+
+        self._write(files, chunks, matrix)
+        return len(missing)
+
+    def _write(self, files, entries, matrix):
+        """Write the vectors under a new name, then atomically switch the metadata to it and remap"""
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        suffix = f".tmp{os.getpid()}"
+
+        # Named by content so the metadata only ever points at a complete vectors file
+        data = matrix.astype(np.float32).tobytes()
+        vectors_path = self.index_dir / f"vectors-{hashlib.sha1(data).hexdigest()[:16]}.f32"
+        vectors_tmp = vectors_path.with_suffix(suffix)
+        vectors_tmp.write_bytes(data)
+        os.replace(vectors_tmp, vectors_path)
+
+        metadata = {
+            "version": INDEX_VERSION,
+            "embedder": self.embedder.name,
+            "dim": int(matrix.shape[1]),
+            "vectors": vectors_path.name,
+            "files": files,
+            "entries": entries
+        }
+        metadata_tmp = self.metadata_path.with_suffix(suffix)
+        metadata_tmp.write_text(json.dumps(metadata))
+        os.replace(metadata_tmp, self.metadata_path)
+
+        # Readers that mapped an older file keep it until they unmap
+        for old_path in self.index_dir.glob("vectors*.f32"):
+            if old_path != vectors_path:
+                old_path.unlink(missing_ok=True)
+
+        self.files, self.entries = files, entries
+        if len(entries):
+            self.matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=matrix.shape)
+        else:
+            self.matrix = matrix
+
+    def search(self, query, k=5) -> List[Dict[str, Any]]:
+        """Top-k functions by cosine similarity to the query"""
+
+        if self.matrix is None:
+            self.refresh()
+        if not len(self.entries):
+            return []
+
+        query_vector = self.embedder.embed([query])[0]
+        scores = self.matrix @ query_vector
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [{**self.entries[i], "score": round(float(scores[i]), 4)} for i in top]
+
+    def build_context(self, query, token_budget=DEFAULT_TOKEN_BUDGET, k=8, count_tokens=None):
+        """Most relevant existing functions as a Lua comment-headed block within the budget"""
+
+        count_tokens = count_tokens or estimate_tokens
+        blocks = []
+        used = 0
+
+        for hit in self.search(query, k):
+            if hit["score"] <= 0:
+                break
+
+            block = f"-- {hit['file']}:{hit['start_line']} {hit['name']}\n{hit['code'].rstrip()}\n"
+            cost = count_tokens(block)
+            if used + cost > token_budget:
+                continue
+
+            blocks.append(block)
+            used += cost
+
+        return "\n".join(blocks)
+
+    def stats(self):
+        return {
+            "files": len(self.files),
+            "functions": len(self.entries),
+            "embedder": self.embedder.name,
+            "index_dir": str(self.index_dir)
+        }
+
+
+def main(argv=None):
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Function-level embedding index of the game source")
+    parser.add_argument("query", nargs="?", help="Find functions related to this text")
+    parser.add_argument("--src", default=str(Path(__file__).parent / "src"), help="Game src/ directory")
+    parser.add_argument("-k", type=int, default=5, help="Number of results")
+    parser.add_argument("--rebuild", action="store_true", help="Re-embed everything")
+    parser.add_argument("--context", action="store_true", help="Print the prompt context block")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Context token budget")
+    args = parser.parse_args(argv)
+
+    if not NUMPY_AVAILABLE:
+        print("❌ Requires numpy: pip install numpy")
+        return 1
+
+    index = CodeIndex(args.src)
+
+    start = time.perf_counter()
+    embedded = index.refresh(rebuild=args.rebuild)
+    stats = index.stats()
+    print(f"📚 {stats['functions']} functions in {stats['files']} files "
+          f"({embedded} embedded, {(time.perf_counter() - start) * 1000:.1f} ms)")
+
+    if not args.query:
+        return 0
+
+    if args.context:
+        print(index.build_context(args.query, args.budget))
+        return 0
+
+    start = time.perf_counter()
+    hits = index.search(args.query, args.k)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for hit in hits:
+        print(f"   {hit['score']:.3f}  {hit['file']}:{hit['start_line']}  {hit['name']}")
+    print(f"🔍 {len(hits)} results in {elapsed:.2f} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
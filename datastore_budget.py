@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+DataStore Request-Budget Estimator
+
+Statically extracts the DataStore call sites in DataService.lua and the events
+that trigger them (auto-save interval, player join/leave, server shutdown and
+admin commands), then runs a discrete-event simulation of a server with players
+joining and leaving to report peak requests/minute against Roblox's published
+per-server budgets.
+
+Run it after generated code touches DataService.lua to catch throttling
+regressions offline. The exit status is non-zero when a budget is exceeded.
+"""
+
+import re
+import sys
+import json
+import heapq
+import random
+import argparse
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+
+# Per-server budgets in requests/minute: (base, per_player)
+# https://create.roblox.com/docs/cloud-services/data-stores/error-codes-and-limits
+DATASTORE_BUDGETS = {
+    "get": (60, 10),
+    "set": (60, 10),
+    "get_sorted": (5, 2),
+}
+
+# Budget categories consumed by each DataStore API call.
+# UpdateAsync reads and writes the key, so it draws from both budgets.
+API_CATEGORIES = {
+    "GetAsync": ("get",),
+    "SetAsync": ("set",),
+    "IncrementAsync": ("set",),
+    "RemoveAsync": ("set",),
+    "UpdateAsync": ("get", "set"),
+    "GetSortedAsync": ("get_sorted",),
+}
+
+# Event handlers in server scripts and the trigger they correspond to
+HANDLER_TRIGGERS = {
+    "Players.PlayerAdded:Connect": "player_join",
+    "Players.PlayerRemoving:Connect": "player_leave",
+    "game:BindToClose": "shutdown",
+}
+
+METHOD_PATTERN = re.compile(r"^function\s+(\w+)[:.](\w+)\s*\(", re.MULTILINE)
+API_PATTERN = re.compile(r":(%s)\s*\(" % "|".join(API_CATEGORIES))
+SELF_CALL_PATTERN = re.compile(r"self:(\w+)\s*\(")
+RETRY_PATTERN = re.compile(r"^([ \t]*)for\s+\w+\s*=\s*1\s*,\s*(\d+)\s+do\b", re.MULTILINE)
+PLAYER_LOOP_PATTERN = re.compile(
+    r"^([ \t]*)for\s+[\w,\s]+\s+in\s+ipairs\(Players:GetPlayers\(\)\)\s+do\b", re.MULTILINE
+)
+
+
+def request_budget(category, players):
+    """Requests per minute a server with this many players may make in a category"""
+
+    base, per_player = DATASTORE_BUDGETS[category]
+    return base + per_player * players
+
+
+class CallSite:
+    """A DataStore API call inside a module method"""
+
+    def __init__(self, method, api, line, retries=1):
+        self.method = method
+        self.api = api
+        self.line = line
+        self.retries = retries
+
+    @property
+    def categories(self):
+        return API_CATEGORIES[self.api]
+
+    def to_dict(self):
+        return {
+            "method": self.method,
+            "api": self.api,
+            "line": self.line,
+            "retries": self.retries,
+            "categories": list(self.categories)
+        }
+
+
+class MethodProfile:
+    """DataStore calls and module-internal calls made by one method"""
+
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.calls: List[CallSite] = []
+        self.invokes: List[Tuple[str, bool]] = []  # (method, once per player)
+        self.interval: Optional[float] = None
+
+    def to_dict(self):
+        return {
+            "method": self.name,
+            "line": self.line,
+            "calls": [c.to_dict() for c in self.calls],
+            "invokes": [{"method": m, "per_player": p} for m, p in self.invokes],
+            "interval": self.interval
+        }
+
+
+class DataStoreCallExtractor:
+    """Statically extracts DataStore call sites and their triggers"""
+
+    def __init__(self, game_path, module="DataService"):
+        self.game_path = Path(game_path)
+        self.server_path = self.game_path / "src" / "ServerScriptService"
+        self.module = module
+        self.module_file = self.server_path / f"{module}.lua"
+
+    def extract(self):
+        """Extract method profiles and triggers for the module"""
+
+        code = self.module_file.read_text()
+        methods = self._extract_methods(code)
+        triggers = self._extract_triggers(methods)
+
+        return {
+            "module": self.module,
+            "file": str(self.module_file.relative_to(self.game_path)),
+            "methods": methods,
+            "triggers": triggers
+        }
+
+    def _extract_methods(self, code):
+        """Split the module into methods and profile each one"""
+
+        methods = {}
+        settings = self._module_settings(code)
+        starts = list(METHOD_PATTERN.finditer(code))
+
+        for match in starts:
+            if match.group(1) != self.module:
+                continue
+
+            body = self._method_body(code, match.start())
+            first_line = code.count("\n", 0, match.start()) + 1
+            profile = MethodProfile(match.group(2), first_line)
+
+            retry_loops = self._loop_spans(body, RETRY_PATTERN)
+            player_loops = self._loop_spans(body, PLAYER_LOOP_PATTERN)
+
+            for api_match in API_PATTERN.finditer(body):
+                retries = 1
+                for start, end, count in retry_loops:
+                    if start <= api_match.start() < end:
+                        retries = max(retries, count)
+
+                profile.calls.append(CallSite(
+                    profile.name,
+                    api_match.group(1),
+                    first_line + body.count("\n", 0, api_match.start()),
+                    retries
+                ))
+
+            for call_match in SELF_CALL_PATTERN.finditer(body):
+                per_player = any(
+                    start <= call_match.start() < end for start, end, _ in player_loops
+                )
+                profile.invokes.append((call_match.group(1), per_player))
+
+            # Periodic methods wait on a module setting, e.g. wait(self.AutoSaveInterval)
+            wait_match = re.search(r"wait\(\s*self\.(\w+)\s*\)", body)
+            if wait_match and wait_match.group(1) in settings:
+                profile.interval = settings[wait_match.group(1)]
+
+            methods[profile.name] = profile
+
+        return methods
+
+    def _module_settings(self, code):
+        """Numeric module fields such as DataService.AutoSaveInterval = 300"""
+
+        pattern = re.compile(r"^%s\.(\w+)\s*=\s*([\d.]+)" % re.escape(self.module), re.MULTILINE)
+        return {name: float(value) for name, value in pattern.findall(code)}
+
+    def _method_body(self, code, start):
+        """Return source from a top-level function to its column-0 end"""
+
+        end_match = re.compile(r"^end\b", re.MULTILINE).search(code, start)
+        end = end_match.end() if end_match else len(code)
+        return code[start:end]
+
+    def _loop_spans(self, body, pattern):
+        """Find (start, end, count) spans of loops matched by pattern"""
+
+        spans = []
+        for match in pattern.finditer(body):
+            indent = match.group(1)
+            end_match = re.compile(r"^%send\b" % re.escape(indent), re.MULTILINE).search(
+                body, match.end()
+            )
+            end = end_match.end() if end_match else len(body)
+            count = int(match.group(2)) if pattern is RETRY_PATTERN else 0
+            spans.append((match.start(), end, count))
+        return spans
+
+    def _extract_triggers(self, methods):
+        """Find where server scripts call into the module and classify the caller"""
+
+        triggers = []
+        call_pattern = re.compile(r"\b%s:(\w+)\s*\(" % re.escape(self.module))
+
+        for script in sorted(self.server_path.glob("*.lua")):
+            if script == self.module_file:
+                continue
+
+            code = script.read_text()
+
+            for match in call_pattern.finditer(code):
+                method = match.group(1)
+                if method not in methods:
+                    continue
+
+                kind = self._classify_caller(code, match.start(), script.name)
+                if kind == "server_start" and methods[method].interval:
+                    kind = "periodic"
+
+                triggers.append({
+                    "kind": kind,
+                    "method": method,
+                    "script": script.name,
+                    "line": code.count("\n", 0, match.start()) + 1,
+                    "interval": methods[method].interval
+                })
+
+        return triggers
+
+    def _classify_caller(self, code, position, script_name):
+        """Classify a call by the event handler it sits in"""
+
+        if script_name.startswith("AdminCommands"):
+            return "admin"
+
+        # Calls at column 0 run once when the script starts
+        if code.rfind("\n", 0, position) + 1 == position:
+            return "server_start"
+
+        # Walk back to the enclosing top-level statement
+        handler_start = code.rfind("\n", 0, position)
+        while handler_start > 0:
+            line_begin = code.rfind("\n", 0, handler_start) + 1
+            line = code[line_begin:handler_start]
+            if line and not line[0].isspace():
+                for marker, kind in HANDLER_TRIGGERS.items():
+                    if line.startswith(marker):
+                        return kind
+                if not line.startswith("--"):
+                    return "other"
+            handler_start = line_begin - 1
+
+        return "other"
+
+
+class ServerSimulation:
+    """Discrete-event simulation of DataStore traffic for one server"""
+
+    def __init__(self, extraction, max_players=20, duration=3600, mean_session=900,
+                 initial_players=0, failure_rate=0.0, admin_per_hour=0.0, seed=0):
+        self.methods = extraction["methods"]
+        self.triggers = extraction["triggers"]
+        self.max_players = max_players
+        self.duration = duration
+        self.mean_session = mean_session
+        self.initial_players = min(initial_players, max_players)
+        self.failure_rate = failure_rate
+        self.admin_per_hour = admin_per_hour
+        self.rng = random.Random(seed)
+
+        self.requests: Dict[str, List[float]] = defaultdict(list)
+        self.by_trigger: Counter = Counter()
+        self.population: List[Tuple[float, int]] = [(0.0, 0)]
+        self.players = set()
+        self._events = []
+        self._sequence = 0
+        self._next_player = 0
+
+    def run(self):
+        """Run the simulation and return a budget report"""
+
+        for _ in range(self.initial_players):
+            self._schedule(0.0, "join")
+
+        # Steady-state arrivals keep the server roughly full
+        if self.mean_session > 0 and self.max_players > 0:
+            self._schedule(self.rng.expovariate(self.max_players / self.mean_session), "arrival")
+
+        for trigger in self.triggers:
+            if trigger["kind"] == "periodic" and trigger["interval"]:
+                self._schedule(trigger["interval"], "periodic", trigger)
+            elif trigger["kind"] == "admin" and self.admin_per_hour > 0:
+                self._schedule(self.rng.expovariate(self.admin_per_hour / 3600), "admin", trigger)
+
+        while self._events:
+            time, _, kind, data = heapq.heappop(self._events)
+            if time > self.duration:
+                break
+            self._handle(time, kind, data)
+
+        self._shutdown(self.duration)
+
+        return self.report()
+
+    def _schedule(self, time, kind, data=None):
+        self._sequence += 1
+        heapq.heappush(self._events, (time, self._sequence, kind, data))
+
+    def _handle(self, time, kind, data):
+        if kind == "arrival":
+            if len(self.players) < self.max_players:
+                self._handle(time, "join", None)
+            rate = self.max_players / self.mean_session
+            self._schedule(time + self.rng.expovariate(rate), "arrival")
+
+        elif kind == "join":
+            player = self._next_player
+            self._next_player += 1
+            self.players.add(player)
+            self.population.append((time, len(self.players)))
+            self._fire("player_join", time)
+            self._schedule(time + self.rng.expovariate(1 / self.mean_session), "leave", player)
+
+        elif kind == "leave":
+            if data in self.players:
+                self._fire("player_leave", time)
+                self.players.discard(data)
+                self.population.append((time, len(self.players)))
+
+        elif kind == "periodic":
+            self._invoke(data["method"], time, "periodic")
+            self._schedule(time + data["interval"], "periodic", data)
+
+        elif kind == "admin":
+            self._invoke(data["method"], time, "admin")
+            self._schedule(time + self.rng.expovariate(self.admin_per_hour / 3600), "admin", data)
+
+    def _shutdown(self, time):
+        """BindToClose handlers run, then every remaining player's leave handler"""
+
+        self._fire("shutdown", time)
+        for player in sorted(self.players):
+            self._fire("player_leave", time)
+            self.players.discard(player)
+            self.population.append((time, len(self.players)))
+
+    def _fire(self, kind, time):
+        for trigger in self.triggers:
+            if trigger["kind"] == kind:
+                self._invoke(trigger["method"], time, kind)
+
+    def _invoke(self, method, time, trigger, depth=0):
+        profile = self.methods.get(method)
+        if profile is None or depth > 8:
+            return
+
+        for call in profile.calls:
+            attempts = 1
+            while attempts < call.retries and self.rng.random() < self.failure_rate:
+                attempts += 1
+
+            for _ in range(attempts):
+                for category in call.categories:
+                    self.requests[category].append(time)
+                self.by_trigger[(trigger, call.api)] += 1
+
+        for callee, per_player in profile.invokes:
+            repeat = len(self.players) if per_player else 1
+            for _ in range(repeat):
+                self._invoke(callee, time, trigger, depth + 1)
+
+    def _players_at(self, times, time):
+        """Most players in the server at this instant"""
+
+        # Leave and shutdown saves happen before the player is removed, so they are
+        # scored against the population from before the departures at their timestamp
+        start = max(bisect_left(times, time) - 1, 0)
+        end = max(bisect_right(times, time), 1)
+        return max(players for _, players in self.population[start:end])
+
+    def report(self):
+        """Peak requests per sliding minute for each budget category"""
+
+        categories = {}
+        population_times = [t for t, _ in self.population]
+
+        for category in DATASTORE_BUDGETS:
+            times = sorted(self.requests.get(category, []))
+            window = deque()
+            peak = {"requests_per_minute": 0, "budget": request_budget(category, 0), "utilization": 0.0, "time": 0.0}
+
+            for time in times:
+                window.append(time)
+                while window and window[0] <= time - 60:
+                    window.popleft()
+
+                budget = request_budget(category, self._players_at(population_times, time))
+                utilization = len(window) / budget
+                if utilization > peak["utilization"]:
+                    peak = {
+                        "requests_per_minute": len(window),
+                        "budget": budget,
+                        "utilization": round(utilization, 3),
+                        "time": round(time, 1)
+                    }
+
+            categories[category] = {"total_requests": len(times), **peak}
+
+        return {
+            "max_players": self.max_players,
+            "duration": self.duration,
+            "players_served": self._next_player,
+            "categories": categories,
+            "by_trigger": {
+                f"{trigger}:{api}": count
+                for (trigger, api), count in sorted(self.by_trigger.items())
+            }
+        }
+
+
+def check_budget(report, max_utilization=1.0):
+    """Return the categories whose peak exceeds the allowed utilization"""
+
+    return [
+        category for category, stats in report["categories"].items()
+        if stats["utilization"] > max_utilization
+    ]
+
+
+def main(argv=None):
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Estimate DataStore request budgets")
+    parser.add_argument("--game-path", default=str(Path(__file__).parent))
+    parser.add_argument("--module", default="DataService")
+    parser.add_argument("--players", type=int, default=20, help="Server capacity")
+    parser.add_argument("--duration", type=float, default=3600, help="Simulated seconds")
+    parser.add_argument("--session", type=float, default=900, help="Mean session length (s)")
+    parser.add_argument("--initial-players", type=int, default=0, help="Players joining at t=0")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Chance each attempt fails")
+    parser.add_argument("--admin-per-hour", type=float, default=0.0, help="Admin-triggered calls/hour")
+    parser.add_argument("--max-utilization", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args(argv)
+
+    extraction = DataStoreCallExtractor(args.game_path, args.module).extract()
+
+    simulation = ServerSimulation(
+        extraction,
+        max_players=args.players,
+        duration=args.duration,
+        mean_session=args.session,
+        initial_players=args.initial_players,
+        failure_rate=args.failure_rate,
+        admin_per_hour=args.admin_per_hour,
+        seed=args.seed
+    )
+    report = simulation.run()
+    over_budget = check_budget(report, args.max_utilization)
+
+    if args.json:
+        print(json.dumps({
+            "call_sites": [p.to_dict() for p in extraction["methods"].values() if p.calls or p.invokes],
+            "triggers": extraction["triggers"],
+            "report": report,
+            "over_budget": over_budget
+        }, indent=2))
+        return 1 if over_budget else 0
+
+    print(f"📦 DataStore call sites in {extraction['file']}")
+    for profile in extraction["methods"].values():
+        for call in profile.calls:
+            retry = f" (up to {call.retries} attempts)" if call.retries > 1 else ""
+            print(f"   • {profile.name}: {call.api} line {call.line}{retry}")
+
+    print("\n⚡ Triggers")
+    for trigger in extraction["triggers"]:
+        interval = f" every {trigger['interval']:.0f}s" if trigger["interval"] else ""
+        print(f"   • {trigger['kind']}{interval} → {trigger['method']} ({trigger['script']}:{trigger['line']})")
+
+    print(f"\n📊 Simulated {report['duration']:.0f}s, {report['max_players']} slots, "
+          f"{report['players_served']} players")
+    for category, stats in report["categories"].items():
+        marker = "❌" if category in over_budget else "✅"
+        print(f"   {marker} {category}: peak {stats['requests_per_minute']}/min "
+              f"vs budget {stats['budget']}/min ({stats['utilization'] * 100:.0f}%) "
+              f"at t={stats['time']}s, {stats['total_requests']} total")
+
+    if over_budget:
+        print(f"\n❌ Over budget: {', '.join(over_budget)}")
+        return 1
+
+    print("\n✅ Within DataStore budgets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
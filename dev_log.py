@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Indexed Development Log
+
+develop_feature results are appended to size-rotated JSON-lines segments
+(autonomous_dev_log/segment-000001.jsonl, ...) through a write buffer, and a
+SQLite sidecar indexes every entry by timestamp, task file, selected source,
+task type and outcome together with its segment offset. Queries touch the
+index and then read only the matching lines, so they take milliseconds no
+matter how large the log grows:
+
+    python dev_log.py --file CurrencyService.lua --outcome failed --since 7d
+    python dev_log.py --summary --by source
+
+Segments are written before the index is committed; on open, any segment bytes
+the index has not seen (e.g. after a crash) are indexed again.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterator
+
+
+DEFAULT_SEGMENT_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_SEGMENTS = 64
+
+OUTCOMES = ("success", "failed", "error")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    file TEXT,
+    source TEXT,
+    task_type TEXT,
+    outcome TEXT NOT NULL,
+    feature TEXT,
+    duration REAL,
+    tokens INTEGER,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts);
+CREATE INDEX IF NOT EXISTS entries_file ON entries (file, ts);
+CREATE INDEX IF NOT EXISTS entries_source ON entries (source, ts);
+CREATE INDEX IF NOT EXISTS entries_outcome ON entries (outcome, ts);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    indexed_bytes INTEGER NOT NULL
+);
+"""
+
+GROUP_COLUMNS = ("file", "source", "task_type", "outcome")
+
+
+def outcome_of(entry) -> str:
+    """success, failed (tests did not pass) or error (development raised)"""
+
+    if entry.get("success"):
+        return "success"
+    return "error" if entry.get("error") else "failed"
+
+
+def compact_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """The entry as stored: plan steps are dropped, since they are plan_text split into lines"""
+
+    plan = entry.get("plan")
+    if isinstance(plan, dict) and "plan_text" in plan and "steps" in plan:
+        entry = {**entry, "plan": {k: v for k, v in plan.items() if k != "steps"}}
+    return entry
+
+
+def parse_since(value) -> Optional[float]:
+    """Epoch seconds from '7d', '12h', '30m' or an ISO date/time"""
+
+    if value is None:
+        return None
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw])", str(value).strip())
+    if match:
+        unit = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[match.group(2)]
+        return time.time() - float(match.group(1)) * unit
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+def _timestamp(entry) -> float:
+    try:
+        return datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+class DevLog:
+    """Segmented, buffered JSON-lines log with a SQLite index"""
+
+    def __init__(self, log_dir, max_segment_bytes=DEFAULT_SEGMENT_BYTES, max_segments=DEFAULT_MAX_SEGMENTS,
+                 flush_every=32, flush_interval=2.0):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segments = max_segments
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+
+        self.db = sqlite3.connect(self.log_dir / "index.sqlite3", check_same_thread=False)
+        # The index can always be rebuilt from the segments, so it need not fsync every commit
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._recover()
+
+        segments = self.segments()
+        self._segment = segments[-1] if segments else 1
+        path = self.segment_path(self._segment)
+        self._segment_bytes = path.stat().st_size if path.exists() else 0
+
+        atexit.register(self.close)
+
+    def segment_path(self, segment) -> Path:
+        return self.log_dir / f"segment-{segment:06d}.jsonl"
+
+    def segments(self) -> List[int]:
+        return sorted(int(p.stem.split("-")[1]) for p in self.log_dir.glob("segment-*.jsonl"))
+
+    def _recover(self):
+        """Index whatever the segments hold beyond what the index has seen"""
+
+        indexed = dict(self.db.execute("SELECT id, indexed_bytes FROM segments"))
+
+        for segment in self.segments():
+            start = indexed.get(segment, 0)
+            if self.segment_path(segment).stat().st_size > start:
+                self._index_segment(segment, start)
+
+    def _index_segment(self, segment, start):
+        rows = []
+        path = self.segment_path(segment)
+        with open(path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    rows.append(self._row(json.loads(line), segment, offset, len(line)))
+                except ValueError:
+                    pass
+                offset += len(line)
+
+        # Drop a torn final write so the next append starts on a fresh line
+        if path.stat().st_size > offset:
+            os.truncate(path, offset)
+
+        self._insert(rows, segment, offset)
+
+    def _insert(self, rows, segment, indexed_bytes):
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO entries (ts, file, source, task_type, outcome, feature, duration, tokens, "
+                "segment, offset, length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.db.execute("INSERT OR REPLACE INTO segments VALUES (?, ?)", (segment, indexed_bytes))
+
+    @staticmethod
+    def _row(entry, segment, offset, length):
+        selected = entry.get("selected_implementation") or {}
+        tokens = sum(p.get("tokens", 0) for p in (entry.get("providers") or {}).values())
+        return (
+            _timestamp(entry), entry.get("task_file"), selected.get("source"), entry.get("task_type"),
+            outcome_of(entry), entry.get("feature"), entry.get("duration"), tokens,
+            segment, offset, length
+        )
+
+    def append(self, entry: Dict[str, Any]):
+        """Buffer one entry; flushed in batches or after flush_interval seconds"""
+
+        with self._lock:
+            self._buffer.append(compact_entry(entry))
+            if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """Write buffered entries to the current segment and index them in one transaction"""
+
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return
+
+            rotated = self._segment_bytes >= self.max_segment_bytes
+            if rotated:
+                self._segment += 1
+                self._segment_bytes = 0
+
+            entries, self._buffer = self._buffer, []
+            lines = [(json.dumps(entry, default=str) + "\n").encode() for entry in entries]
+
+            with open(self.segment_path(self._segment), "ab") as f:
+                f.write(b"".join(lines))
+
+            rows = []
+            offset = self._segment_bytes
+            for entry, line in zip(entries, lines):
+                rows.append(self._row(entry, self._segment, offset, len(line)))
+                offset += len(line)
+
+            self._insert(rows, self._segment, offset)
+            self._segment_bytes = offset
+
+            if rotated:
+                self._enforce_retention()
+
+    def _enforce_retention(self):
+        segments = self.segments()
+        for segment in segments[:max(0, len(segments) - self.max_segments)]:
+            with self.db:
+                self.db.execute("DELETE FROM entries WHERE segment = ?", (segment,))
+                self.db.execute("DELETE FROM segments WHERE id = ?", (segment,))
+            self.segment_path(segment).unlink()
+
+    def close(self):
+        with self._lock:
+            if self.db is None:
+                return
+            self.flush()
+            self.db.close()
+            self.db = None
+        atexit.unregister(self.close)
+
+    def _where(self, file=None, source=None, outcome=None, task_type=None, since=None, until=None, feature=None):
+        clauses, params = [], []
+        for column, value in (("file", file), ("source", source), ("outcome", outcome), ("task_type", task_type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(parse_since(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(parse_since(until))
+        if feature:
+            clauses.append("feature LIKE ?")
+            params.append(f"%{feature}%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit=100, **filters) -> List[Dict[str, Any]]:
+        """Matching entries, newest first; reads only the matching lines from the segments"""
+
+        with self._lock:
+            self.flush()
+            where, params = self._where(**filters)
+            rows = self.db.execute(
+                f"SELECT segment, offset, length FROM entries{where} ORDER BY ts DESC, id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+
+        entries, handles = [], {}
+        try:
+            for segment, offset, length in rows:
+                if segment not in handles:
+                    handles[segment] = open(self.segment_path(segment), "rb")
+                handle = handles[segment]
+                handle.seek(offset)
+                entries.append(json.loads(handle.read(length)))
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return entries
+
+    def count(self, **filters) -> int:
+        with self._lock:
+            self.flush()
+            where, params = self._where(**filters)
+            return self.db.execute(f"SELECT COUNT(*) FROM entries{where}", params).fetchone()[0]
+
+    def summary(self, by="outcome", **filters) -> List[Dict[str, Any]]:
+        """Runs, successes and mean duration grouped by one indexed column"""
+
+        if by not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by {by!r}, expected one of {GROUP_COLUMNS}")
+
+        with self._lock:
+            self.flush()
+            where, params = self._where(**filters)
+            rows = self.db.execute(
+                f"SELECT {by}, COUNT(*), SUM(outcome = 'success'), AVG(duration) FROM entries{where} "
+                f"GROUP BY {by} ORDER BY COUNT(*) DESC", params
+            ).fetchall()
+
+        return [
+            {by: key, "runs": runs, "successes": successes, "mean_seconds": round(mean or 0.0, 2)}
+            for key, runs, successes, mean in rows
+        ]
+
+    def run_stats(self) -> Iterator[Dict[str, Any]]:
+        """task_type, success, duration and tokens of every entry, straight from the index"""
+
+        with self._lock:
+            self.flush()
+            rows = self.db.execute(
+                "SELECT task_type, outcome = 'success', duration, tokens FROM entries "
+                "WHERE duration IS NOT NULL ORDER BY id"
+            ).fetchall()
+
+        for task_type, success, duration, tokens in rows:
+            yield {"task_type": task_type, "success": bool(success), "duration": duration, "tokens": tokens or 0}
+
+    def import_jsonl(self, path) -> int:
+        """Append every entry of a plain JSON-lines log (e.g. the old autonomous_dev.log)"""
+
+        imported = 0
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict):
+                    self.append(entry)
+                    imported += 1
+        self.flush()
+        return imported
+
+
+def open_dev_log(game_path, **kwargs) -> DevLog:
+    """The game's development log, importing a legacy autonomous_dev.log on first use"""
+
+    game_path = Path(game_path)
+    log_dir = game_path / "autonomous_dev_log"
+    fresh = not log_dir.exists()
+
+    log = DevLog(log_dir, **kwargs)
+
+    legacy = game_path / "autonomous_dev.log"
+    if fresh and legacy.exists():
+        imported = log.import_jsonl(legacy)
+        print(f"📒 Imported {imported} entries from {legacy.name}")
+
+    return log
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Query the autonomous development log")
+    parser.add_argument("--game-path", default=str(Path(__file__).parent))
+    parser.add_argument("--file", help="Task file, e.g. CurrencyService.lua")
+    parser.add_argument("--source", help="Selected implementation source (autocoder, huggingface, llm)")
+    parser.add_argument("--outcome", choices=OUTCOMES)
+    parser.add_argument("--task-type")
+    parser.add_argument("--feature", help="Substring of the feature request")
+    parser.add_argument("--since", help="7d, 12h, 30m or an ISO date")
+    parser.add_argument("--until", help="7d, 12h, 30m or an ISO date")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--summary", action="store_true", help="Group counts instead of listing entries")
+    parser.add_argument("--by", default="outcome", choices=GROUP_COLUMNS)
+    parser.add_argument("--json", action="store_true", help="Print full entries as JSON lines")
+    parser.add_argument("--import-log", metavar="PATH", help="Append a plain JSON-lines log")
+    args = parser.parse_args()
+
+    log = open_dev_log(args.game_path)
+
+    if args.import_log:
+        print(f"📒 Imported {log.import_jsonl(args.import_log)} entries")
+        return 0
+
+    filters = {
+        "file": args.file, "source": args.source, "outcome": args.outcome, "task_type": args.task_type,
+        "feature": args.feature, "since": args.since, "until": args.until
+    }
+
+    start = time.perf_counter()
+
+    if args.summary:
+        rows = log.summary(args.by, **filters)
+        elapsed = (time.perf_counter() - start) * 1000
+        for row in rows:
+            rate = row["successes"] / row["runs"] if row["runs"] else 0.0
+            print(f"   {str(row[args.by]):<32} {row['runs']:>6} runs  {rate:>6.1%} ok  {row['mean_seconds']:>7.2f}s avg")
+        print(f"\n⏱️  {len(rows)} groups in {elapsed:.1f}ms")
+        return 0
+
+    entries = log.query(args.limit, **filters)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    icons = {"success": "✅", "failed": "❌", "error": "💥"}
+    for entry in entries:
+        if args.json:
+            print(json.dumps(entry))
+            continue
+        source = (entry.get("selected_implementation") or {}).get("source") or "-"
+        print(f"{icons[outcome_of(entry)]} {entry.get('timestamp', '')[:19]}  {entry.get('task_file') or '-':<28} "
+              f"{source:<12} {entry.get('feature', '')[:80]}")
+
+    if not args.json:
+        print(f"\n⏱️  {len(entries)} of {log.count(**filters)} matching entries in {elapsed:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,38 +12,73 @@ import os
 import json
 import time
 import asyncio
+import threading
+from collections import deque
 from pathlib import Path
 from datetime import datetime
-import gradio as gr
 
-# Try to import dependencies
-try:
-    from transformers import pipeline, AutoModelForCausalLM, AutoTokenizer
-    import torch
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
+from lazy_imports import LazyModule, module_available
 
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
+# Check dependencies without importing them; gradio, transformers and
+# requests are only imported when the UI, a model or the task queue needs them
+TRANSFORMERS_AVAILABLE = module_available("transformers", "torch")
+
+requests = LazyModule("requests")
+REQUESTS_AVAILABLE = module_available("requests")
+
+from quantization import load_text_generation_pipeline, quantization_enabled
+from prefix_cache import PrefixCachedGenerator, build_lua_prompt, strip_prefix
+from cassette import CassettePipeline, cassette_from_env
+from stub_backends import stub_backends, stubs_enabled
+from inference_server import RemotePipeline, inference_client_from_env
+from onnx_backend import backend_for_mode
+from artifact_store import ArtifactStore, default_store_path
+from git_publisher import publisher_from_env, PublishError
+from event_bus import EventBus, TokenRateStreamer, serve_events, DEFAULT_EVENTS_HOST, DEFAULT_EVENTS_PORT
+from file_watcher import FileWatcher
 
 
 class RobloxGameWorker:
     """Autonomous worker for Roblox game development"""
 
-    def __init__(self, worker_mode="feature_generator"):
+    def __init__(self, worker_mode="feature_generator", quantize=None, cassette=None, backend=None, events=None,
+                 watch=None):
         self.worker_mode = worker_mode
+        self.quantize = quantization_enabled(quantize)
+
+        # torch or onnx, per worker mode (HF_BACKEND_<MODE> or HF_BACKEND)
+        self.backend = backend_for_mode(worker_mode, backend)
+
+        # Record or replay pipeline calls (MODEL_CASSETTE=path)
+        self.cassette = cassette or cassette_from_env()
         self.github_token = os.getenv("GITHUB_TOKEN")
         self.repo_url = os.getenv("REPO_URL", "")
+        self.tasks_file = Path("tasks.json")
         self.is_running = False
         self.tasks_processed = 0
         self.tasks_succeeded = 0
         self.tasks_failed = 0
         self.models = {}
 
+        # (index, count) when this worker handles one slice of a shared queue
+        self.shard = None
+
+        # Results go to the store shared with the improvement loop (ARTIFACT_STORE)
+        self.artifacts = ArtifactStore(default_store_path())
+
+        # Accepted results are committed to a local repository in batches
+        self.publisher = publisher_from_env()
+
+        # Task lifecycle events for the dashboard and the SSE stream
+        self.events = events or EventBus()
+
+        # Wake on tasks.json changes and pick up only new tasks (WORKER_WATCH=1)
+        if watch is None:
+            watch = os.getenv("WORKER_WATCH", "").lower() in ("1", "true", "yes")
+        self.watch = watch
+        self.watcher = None
+        self.seen_tasks = set()
+
         # Status
         self.status = {
             "mode": worker_mode,
@@ -57,6 +92,8 @@ class RobloxGameWorker:
 
         print(f"🤖 Roblox Game Worker initialized")
         print(f"   Mode: {worker_mode}")
+        print(f"   Quantization: {'int8' if self.quantize else 'off'}")
+        print(f"   Backend: {self.backend}")
         print(f"   Repo: {self.repo_url or 'Not configured'}")
 
     async def initialize_models(self):
@@ -64,6 +101,29 @@ class RobloxGameWorker:
 
         print("📦 Loading AI models...")
 
+        # Replayed runs need no model weights
+        if self.cassette and self.cassette.replaying:
+            self.models["code_gen"] = CassettePipeline(None, self.cassette)
+            print(f"   📼 Replaying model calls from {self.cassette.path}")
+            return True
+
+        # Share the host's inference server instead of loading another copy
+        client = inference_client_from_env()
+        if client:
+            self.models["code_gen"] = RemotePipeline(client, "code_gen")
+            if self.cassette:
+                self.models["code_gen"] = CassettePipeline(self.models["code_gen"], self.cassette)
+            print(f"   ✅ Using inference server at {client.url}")
+            return True
+
+        # Fake backends for load-testing the worker (MODEL_BACKEND=stub)
+        if stubs_enabled():
+            self.models["code_gen"] = stub_backends()["code_gen"]
+            if self.cassette:
+                self.models["code_gen"] = CassettePipeline(self.models["code_gen"], self.cassette)
+            print("   🧪 Using stub model backends")
+            return True
+
         if not TRANSFORMERS_AVAILABLE:
             print("⚠️  Transformers not available, using fallback mode")
             return False
@@ -74,12 +134,19 @@ class RobloxGameWorker:
 
             print(f"   Loading {model_name}...")
 
-            self.models["code_gen"] = pipeline(
-                "text-generation",
-                model=model_name,
-                device=-1  # CPU
+            generator = load_text_generation_pipeline(
+                model_name,
+                quantize=self.quantize,
+                device=-1,  # CPU
+                backend=self.backend
             )
 
+            # ONNX pipelines take prefix= directly; torch ones reuse the prefix KV state
+            self.models["code_gen"] = PrefixCachedGenerator(generator) if self.backend == "torch" else generator
+
+            if self.cassette:
+                self.models["code_gen"] = CassettePipeline(self.models["code_gen"], self.cassette)
+
             print("   ✅ Models loaded successfully")
             return True
 
@@ -87,14 +154,17 @@ class RobloxGameWorker:
             print(f"   ❌ Failed to load models: {e}")
             return False
 
+    @property
+    def local_tasks(self):
+        return not self.repo_url or not REQUESTS_AVAILABLE
+
     async def fetch_tasks(self):
         """Fetch tasks from GitHub repo"""
 
-        if not self.repo_url or not REQUESTS_AVAILABLE:
+        if self.local_tasks:
             # Use local tasks file
-            tasks_file = Path("tasks.json")
-            if tasks_file.exists():
-                with open(tasks_file, 'r') as f:
+            if self.tasks_file.exists():
+                with open(self.tasks_file, 'r') as f:
                     return json.load(f)
             return []
 
@@ -128,6 +198,11 @@ class RobloxGameWorker:
         task_type = task.get("type", "feature")
         description = task.get("description", "")
 
+        task_id = self.tasks_processed + 1
+        started = time.perf_counter()
+        self.events.publish("claimed", task_id=task_id, task_type=task_type, description=description,
+                            mode=self.worker_mode)
+
         result = {
             "task": task,
             "success": False,
@@ -138,7 +213,7 @@ class RobloxGameWorker:
 
         try:
             if task_type == "feature":
-                output = await self.generate_feature(description)
+                output = await self.generate_feature(description, task_id)
             elif task_type == "bug_fix":
                 output = await self.fix_bug(task)
             elif task_type == "optimization":
@@ -169,9 +244,16 @@ class RobloxGameWorker:
         self.status["tasks_failed"] = self.tasks_failed
         self.status["last_task_time"] = datetime.now().isoformat()
 
+        seconds = round(time.perf_counter() - started, 2)
+        if result["success"]:
+            self.events.publish("finished", task_id=task_id, seconds=seconds)
+        else:
+            error = result["error"] or (result["output"] or {}).get("error", "Unknown error")
+            self.events.publish("failed", task_id=task_id, seconds=seconds, error=error)
+
         return result
 
-    async def generate_feature(self, description):
+    async def generate_feature(self, description, task_id=None):
         """Generate a new game feature"""
 
         print(f"   🎮 Generating feature: {description}")
@@ -183,17 +265,35 @@ class RobloxGameWorker:
             }
 
         try:
-            # Generate Lua code
-            prompt = f"-- {description}\n-- Roblox Lua code:\nlocal function"
+            # Generate Lua code; the shared header's KV state is reused
+            prefix, prompt = build_lua_prompt(description)
 
-            result = self.models["code_gen"](
+            generator = self.models["code_gen"]
+            self.events.publish("generating", task_id=task_id, model=type(generator).__name__)
+
+            # In-process torch generation reports tokens/sec as it decodes
+            options = {}
+            if isinstance(generator, PrefixCachedGenerator):
+                options["streamer"] = TokenRateStreamer(self.events, task_id)
+
+            started = time.perf_counter()
+            result = generator(
                 prompt,
+                prefix=prefix,
                 max_length=300,
                 num_return_sequences=1,
-                temperature=0.7
+                temperature=0.7,
+                **options
             )
 
-            code = result[0]["generated_text"]
+            code = strip_prefix(result[0]["generated_text"], prefix)
+
+            if not options:
+                # Remote, stub and ONNX backends only report the total; estimate ~4 chars per token
+                tokens = max(1, (len(code) - len(prompt)) // 4)
+                elapsed = max(time.perf_counter() - started, 1e-9)
+                self.events.publish("tokens", task_id=task_id, tokens=tokens,
+                                    tokens_per_second=round(tokens / elapsed, 1), final=True, estimated=True)
 
             return {
                 "success": True,
@@ -275,30 +375,39 @@ class RobloxGameWorker:
             "generated": content
         }
 
-    async def create_pull_request(self, result):
-        """Create a pull request with the generated code"""
+    async def save_result(self, result):
+        """Save an accepted result to the shared artifact store and queue it for publishing"""
 
-        if not self.github_token or not self.repo_url:
-            print("   ⚠️  GitHub integration not configured")
-            return False
+        task = result.get("task", {})
+        output = result.get("output") or {}
+        feature = task.get("description") or task.get("issue") or task.get("target")
+        source = f"worker:{self.worker_mode}"
 
-        print("   📤 Creating pull request...")
+        metadata = {}
+        code = output.get("code") or output.get("fix")
+        if code:
+            metadata["code"] = self.artifacts.put(code, kind="lua", feature=feature, file=task.get("file"),
+                                                  source=source)["digest"]
 
-        # TODO: Implement GitHub PR creation
-        # For now, just save locally
+        saved = self.artifacts.put(json.dumps(result, indent=2, sort_keys=True), kind="result",
+                                   feature=feature, file=task.get("file"), source=source, metadata=metadata)
 
-        output_dir = Path("generated_output")
-        output_dir.mkdir(exist_ok=True)
+        print(f"   💾 Saved as artifact {saved['digest'][:12]}")
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"result_{timestamp}.json"
+        # Batched commits to a local repository (PUBLISH_REPO); without one, results stay in the store
+        if self.publisher and not self._publish(self.publisher.add, result):
+            print(f"   📥 Queued for {self.publisher.branch} ({len(self.publisher.pending)} pending)")
 
-        with open(output_dir / filename, 'w') as f:
-            json.dump(result, f, indent=2)
+        return saved
 
-        print(f"   💾 Saved to: {filename}")
+    def _publish(self, action, *args):
+        """Run a publisher call; a failed commit keeps its results queued for the next batch"""
 
-        return True
+        try:
+            return action(*args)
+        except PublishError as e:
+            print(f"   ⚠️  Publishing to {self.publisher.branch} failed, retrying with the next batch: {e}")
+            return False
 
     async def worker_loop(self):
         """Main worker loop - runs continuously"""
@@ -306,9 +415,15 @@ class RobloxGameWorker:
         print("\n🚀 Starting worker loop...")
         self.is_running = True
         self.status["running"] = True
+        self.events.publish("worker", state="started", mode=self.worker_mode)
 
         start_time = time.time()
 
+        # Watching needs a local queue; the GitHub queue is still polled
+        if self.watch and self.local_tasks:
+            self.watcher = FileWatcher([self.tasks_file])
+            print(f"   👀 Watching {self.tasks_file} ({self.watcher.backend})")
+
         while self.is_running:
             try:
                 # Update uptime
@@ -317,7 +432,22 @@ class RobloxGameWorker:
                 # Fetch tasks
                 tasks = await self.fetch_tasks()
 
+                if self.shard:
+                    index, count = self.shard
+                    tasks = [task for i, task in enumerate(tasks) if i % count == index]
+
+                if self.watcher:
+                    tasks = [task for task in tasks if self._task_key(task) not in self.seen_tasks]
+                    self.seen_tasks.update(self._task_key(task) for task in tasks)
+
+                if self.publisher:
+                    self._publish(self.publisher.maybe_flush)
+
                 if not tasks:
+                    if self.watcher:
+                        print("📭 No new tasks, waiting for changes...")
+                        await self._wait_for_tasks()
+                        continue
                     print("📭 No tasks in queue, waiting...")
                     await asyncio.sleep(60)  # Check every minute
                     continue
@@ -332,23 +462,45 @@ class RobloxGameWorker:
                     result = await self.process_task(task)
 
                     if result["success"]:
-                        await self.create_pull_request(result)
+                        await self.save_result(result)
 
                     # Wait between tasks
                     await asyncio.sleep(5)
 
                 print("\n✅ Batch complete, waiting for next cycle...")
-                await asyncio.sleep(300)  # Wait 5 minutes
+                if self.watcher:
+                    await self._wait_for_tasks()
+                else:
+                    await asyncio.sleep(300)  # Wait 5 minutes
 
             except Exception as e:
                 print(f"\n❌ Worker loop error: {e}")
                 await asyncio.sleep(60)
 
+    async def _wait_for_tasks(self):
+        """Sleep until tasks.json changes, waking only when queued results are due to be committed"""
+
+        timeout = self.publisher.flush_interval if self.publisher else None
+        await self.watcher.wait(timeout)
+
+    @staticmethod
+    def _task_key(task):
+        return json.dumps(task, sort_keys=True)
+
     def stop(self):
         """Stop the worker"""
         print("\n🛑 Stopping worker...")
         self.is_running = False
         self.status["running"] = False
+        self.events.publish("worker", state="stopped", mode=self.worker_mode)
+
+        # Wake the loop if it is waiting for tasks.json
+        if self.watcher:
+            self.watcher.close()
+
+        # Commit whatever is still queued rather than waiting for the next batch
+        if self.publisher:
+            self._publish(self.publisher.close)
 
     def get_status(self):
         """Get current worker status"""
@@ -358,6 +510,9 @@ class RobloxGameWorker:
 # Global worker instance
 worker = None
 
+# Shared by every worker started from the UI, the dashboard and the SSE endpoint
+event_bus = EventBus()
+
 
 def start_worker(worker_mode):
     """Start the worker"""
@@ -366,13 +521,14 @@ def start_worker(worker_mode):
     if worker and worker.is_running:
         return "⚠️ Worker already running"
 
-    worker = RobloxGameWorker(worker_mode)
+    worker = RobloxGameWorker(worker_mode, events=event_bus)
 
-    # Initialize models
-    asyncio.run(worker.initialize_models())
+    async def run(current):
+        await current.initialize_models()
+        await current.worker_loop()
 
-    # Start worker loop in background
-    asyncio.create_task(worker.worker_loop())
+    # Initialize models and run the loop on a background thread with its own event loop
+    threading.Thread(target=asyncio.run, args=(run(worker),), daemon=True).start()
 
     return f"✅ Worker started in {worker_mode} mode"
 
@@ -414,10 +570,61 @@ Running: {'✅ Yes' if status['running'] else '❌ No'}
 """
 
 
+EVENT_ICONS = {"claimed": "📥", "generating": "🎮", "tokens": "⚡", "finished": "✅", "failed": "❌", "worker": "🤖"}
+
+
+def format_event(event):
+    """One dashboard line for an event"""
+
+    stamp = datetime.fromtimestamp(event["time"]).strftime("%H:%M:%S.%f")[:-3]
+    icon = EVENT_ICONS.get(event["type"], "•")
+    kind = event["type"]
+
+    if kind == "claimed":
+        text = f"#{event['task_id']} claimed: {event['description'][:80]}"
+    elif kind == "generating":
+        text = f"#{event['task_id']} generating with {event['model']}"
+    elif kind == "tokens":
+        approx = "~" if event.get("estimated") else ""
+        text = f"#{event['task_id']} {event['tokens']} tokens, {approx}{event['tokens_per_second']} tok/s"
+    elif kind == "finished":
+        text = f"#{event['task_id']} finished in {event['seconds']}s"
+    elif kind == "failed":
+        text = f"#{event['task_id']} failed after {event['seconds']}s: {event['error']}"
+    elif kind == "worker":
+        text = f"worker {event['state']} ({event['mode']})"
+    else:
+        text = json.dumps(event)
+
+    return f"{stamp} {icon} {text}"
+
+
+def stream_dashboard():
+    """Push status and recent events to one open page as they happen"""
+
+    lines = deque(maxlen=40)
+    updating = None
+
+    with event_bus.subscribe(replay=20) as subscription:
+        yield get_status(), ""
+
+        for event in subscription.events(timeout=10):
+            # Render a burst of events once instead of once per event
+            for pending in ([event] if event else []) + subscription.drain():
+                # Progress updates for the same task replace each other in place
+                if pending["type"] == "tokens" and updating == pending["task_id"]:
+                    lines.pop()
+                lines.append(format_event(pending))
+                updating = pending["task_id"] if pending["type"] == "tokens" and not pending["final"] else None
+            yield get_status(), "\n".join(reversed(lines))
+
+
 # Create Gradio interface
 def create_interface():
     """Create Gradio web interface"""
 
+    import gradio as gr
+
     with gr.Blocks(title="Roblox Game Worker") as demo:
         gr.Markdown("# 🤖 Roblox Game Development Worker")
         gr.Markdown("Autonomous worker for continuous game improvement")
@@ -441,14 +648,23 @@ def create_interface():
                     interactive=False
                 )
 
+        events_output = gr.Textbox(
+            label="Live Events",
+            lines=15,
+            interactive=False
+        )
+
         # Connect buttons
         start_btn.click(start_worker, inputs=[mode_dropdown], outputs=[status_output])
         stop_btn.click(stop_worker, outputs=[status_output])
         refresh_btn.click(get_status, outputs=[status_output])
 
-        # Auto-refresh status every 10 seconds
-        demo.load(get_status, outputs=[status_output], every=10)
+        # Status and events are pushed over one streaming connection per page; the stream never
+        # ends, so it must not share the default single-slot queue with other viewers
+        demo.load(stream_dashboard, outputs=[status_output, events_output], concurrency_limit=None)
 
+    # Generator handlers stream through the queue
+    demo.queue()
     return demo
 
 
@@ -457,6 +673,17 @@ if __name__ == "__main__":
     print("🤗 HuggingFace Worker for Roblox Game Development")
     print("=" * 60)
 
+    # Server-Sent Events for anything besides the dashboard (EVENTS_PORT=0 disables);
+    # localhost only unless EVENTS_HOST says otherwise, cross-origin only for EVENTS_ALLOW_ORIGIN
+    events_port = int(os.getenv("EVENTS_PORT", DEFAULT_EVENTS_PORT))
+    if events_port:
+        serve_events(
+            event_bus,
+            host=os.getenv("EVENTS_HOST", DEFAULT_EVENTS_HOST),
+            port=events_port,
+            allow_origin=os.getenv("EVENTS_ALLOW_ORIGIN")
+        )
+
     # Create and launch interface
     demo = create_interface()
     demo.launch(
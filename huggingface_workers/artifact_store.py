@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Artifact Store
+
+Generated code, diffs and worker results are stored once per distinct content
+under objects/<sha256[:2]>/<sha256>, zlib-compressed above a size threshold
+and written through a temporary file and rename, so readers never see a
+partial blob. A SQLite index records every save (feature, file, source, kind,
+time and metadata) and points at the blob, so saving identical code twice
+costs one index row, two saves in the same second never collide, and lookups
+by feature, file or time are indexed.
+
+Shared by the improvement loop and the worker (ARTIFACT_STORE=path):
+    python artifact_store.py --feature "leaderboard" --show
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union
+
+
+DEFAULT_COMPRESS_THRESHOLD = 1024
+
+# One-byte blob header: stored as-is or zlib-compressed
+RAW = b"R"
+COMPRESSED = b"Z"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    feature TEXT,
+    file TEXT,
+    source TEXT,
+    created REAL NOT NULL,
+    size INTEGER NOT NULL,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS artifacts_feature ON artifacts (feature, created);
+CREATE INDEX IF NOT EXISTS artifacts_file ON artifacts (file, created);
+CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts (created);
+CREATE INDEX IF NOT EXISTS artifacts_digest ON artifacts (digest);
+"""
+
+COLUMNS = ("id", "digest", "kind", "feature", "file", "source", "created", "size", "metadata")
+
+
+def default_store_path(game_path=None) -> Path:
+    """ARTIFACT_STORE, else <game>/artifacts, else artifacts/ beside the worker's parent"""
+
+    if os.getenv("ARTIFACT_STORE"):
+        return Path(os.environ["ARTIFACT_STORE"])
+    if game_path is not None:
+        return Path(game_path) / "artifacts"
+    return Path(__file__).resolve().parent.parent / "artifacts"
+
+
+class ArtifactStore:
+    """Deduplicated, compressed blobs with a queryable metadata index"""
+
+    def __init__(self, root, compress_threshold=DEFAULT_COMPRESS_THRESHOLD):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.compress_threshold = compress_threshold
+        self._lock = threading.Lock()
+
+        # The loop and the worker may share the store; WAL lets them write concurrently
+        self.db = sqlite3.connect(self.root / "index.sqlite3", timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def blob_path(self, digest) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def put_blob(self, data: bytes) -> str:
+        """Store bytes once; returns their sha256"""
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if path.exists():
+            return digest
+
+        if len(data) >= self.compress_threshold:
+            packed = zlib.compress(data, 6)
+            body = COMPRESSED + packed if len(packed) < len(data) else RAW + data
+        else:
+            body = RAW + data
+
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{digest}.tmp{os.getpid()}.{threading.get_ident()}")
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return digest
+
+    def get_blob(self, digest) -> bytes:
+        body = self.blob_path(digest).read_bytes()
+        return zlib.decompress(body[1:]) if body[:1] == COMPRESSED else body[1:]
+
+    def put(self, content: Union[str, bytes], kind="lua", feature=None, file=None, source=None,
+            metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Save content and index it; identical content shares one blob"""
+
+        data = content.encode() if isinstance(content, str) else content
+        digest = self.put_blob(data)
+        created = time.time()
+
+        with self._lock, self.db:
+            cursor = self.db.execute(
+                "INSERT INTO artifacts (digest, kind, feature, file, source, created, size, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, kind, feature, file, source, created, len(data),
+                 json.dumps(metadata, default=str) if metadata else None)
+            )
+
+        return {
+            "id": cursor.lastrowid, "digest": digest, "kind": kind, "feature": feature, "file": file,
+            "source": source, "created": created, "size": len(data), "metadata": metadata or {}
+        }
+
+    def read(self, artifact: Union[str, Dict[str, Any]]) -> str:
+        """Text of an artifact record or digest"""
+
+        digest = artifact["digest"] if isinstance(artifact, dict) else artifact
+        return self.get_blob(digest).decode()
+
+    def find(self, feature=None, file=None, kind=None, source=None, since=None, until=None,
+             digest=None, limit=50) -> List[Dict[str, Any]]:
+        """Matching records, newest first; feature matches as a substring"""
+
+        clauses, params = [], []
+        for column, value in (("file", file), ("kind", kind), ("source", source), ("digest", digest)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if feature is not None:
+            clauses.append("feature LIKE ?")
+            params.append(f"%{feature}%")
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created < ?")
+            params.append(until)
+
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM artifacts{where} ORDER BY created DESC, id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(zip(COLUMNS, row))
+            record["metadata"] = json.loads(record["metadata"]) if record["metadata"] else {}
+            records.append(record)
+        return records
+
+    def latest(self, **filters) -> Optional[Dict[str, Any]]:
+        records = self.find(limit=1, **filters)
+        return records[0] if records else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            artifacts, logical = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+            blobs = self.db.execute("SELECT COUNT(DISTINCT digest) FROM artifacts").fetchone()[0]
+        stored = sum(path.stat().st_size for path in self.objects.glob("*/*") if ".tmp" not in path.name)
+        return {"artifacts": artifacts, "blobs": blobs, "logical_bytes": logical, "stored_bytes": stored}
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Query the generated artifact store")
+    parser.add_argument("--store", default=None, help="Store directory (default: ARTIFACT_STORE or ./artifacts)")
+    parser.add_argument("--feature", help="Substring of the feature request")
+    parser.add_argument("--file")
+    parser.add_argument("--kind")
+    parser.add_argument("--source")
+    parser.add_argument("--since-hours", type=float, default=None)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--show", action="store_true", help="Print the newest match's content")
+    parser.add_argument("--stats", action="store_true", help="Print dedup and compression stats")
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.store or default_store_path())
+
+    if args.stats:
+        print(json.dumps(store.stats(), indent=2))
+        return 0
+
+    since = time.time() - args.since_hours * 3600 if args.since_hours is not None else None
+    start = time.perf_counter()
+    records = store.find(args.feature, args.file, args.kind, args.source, since=since, limit=args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if args.show:
+        if not records:
+            print("❌ No matching artifact")
+            return 1
+        print(store.read(records[0]))
+        return 0
+
+    for record in records:
+        created = datetime.fromtimestamp(record["created"]).isoformat(timespec="seconds")
+        print(f"   {record['id']:>6} {created}  {record['kind']:<7} {record['digest'][:12]}  "
+              f"{record['source'] or '-':<12} {(record['feature'] or record['file'] or '')[:70]}")
+    print(f"\n⏱️  {len(records)} artifacts in {elapsed:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
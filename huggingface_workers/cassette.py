@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Record/Replay Cassettes for Model Providers
+
+Record mode captures every request and response that passes through a wrapped
+provider (MultiProviderLLM, PatternAssistedCoder, HuggingFaceGameAI or a
+text-generation pipeline). Replay mode serves the same calls from the cassette
+deterministically, optionally sleeping for the recorded latency, so full runs
+need no network, API keys or model weights.
+
+Cassette layout: a header, length-prefixed zlib-compressed JSON records, then
+a compressed index mapping request keys to record offsets and a fixed trailer
+pointing at the index. A cassette whose recording was interrupted has no
+trailer; its index is rebuilt by scanning the records.
+
+Enable with MODEL_CASSETTE=path and MODEL_CASSETTE_MODE=record|replay, or
+inspect a cassette with:
+    python cassette.py runs/loop.cassette
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import struct
+import atexit
+import asyncio
+import hashlib
+import inspect
+import argparse
+import threading
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List
+
+
+MAGIC = b"RCAS1\n"
+TRAILER = struct.Struct("<Q8s")
+TRAILER_MAGIC = b"RCASIDX1"
+LENGTH = struct.Struct("<I")
+
+# Methods recorded on each kind of provider
+PROVIDER_METHODS = {
+    "llm": ["complete"],
+    "autocoder": ["generate_code", "learn_from_code"],
+    "hf_ai": ["generate_lua_code", "improve_code", "generate_game_content"],
+}
+
+
+class CassetteMiss(KeyError):
+    """A replayed call was never recorded"""
+
+
+class RecordedError(RuntimeError):
+    """Replays an exception raised by the provider while recording"""
+
+
+def _canonical(value):
+    """JSON-stable form of call arguments (enums by name, unknown objects by str)"""
+
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def request_key(namespace, method, args, kwargs):
+    """Stable hash of one provider call"""
+
+    payload = json.dumps(
+        [namespace, method, _canonical(list(args)), _canonical(kwargs)],
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class Cassette:
+    """Append-only record/replay store for provider calls"""
+
+    def __init__(self, path, mode="replay", latency_scale=0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.index: Dict[str, List[int]] = {}
+        self.calls = {"recorded": 0, "replayed": 0, "missed": 0}
+
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "wb")
+            self._file.write(MAGIC)
+            atexit.register(self.close)
+        else:
+            self._file = open(self.path, "rb")
+            self.index = self._load_index()
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def _load_index(self):
+        """Read the trailer index, or rebuild it from the records"""
+
+        size = self._file.seek(0, os.SEEK_END)
+        self._file.seek(0)
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{self.path} is not a cassette")
+
+        if size >= len(MAGIC) + TRAILER.size:
+            self._file.seek(size - TRAILER.size)
+            index_offset, magic = TRAILER.unpack(self._file.read(TRAILER.size))
+            if magic == TRAILER_MAGIC:
+                self._file.seek(index_offset)
+                length, = LENGTH.unpack(self._file.read(LENGTH.size))
+                return json.loads(zlib.decompress(self._file.read(length)))
+
+        # Interrupted recording: scan the records
+        index = {}
+        offset = len(MAGIC)
+        while offset + LENGTH.size <= size:
+            record = self._read(offset)
+            if record is None:
+                break
+            index.setdefault(record["key"], []).append(offset)
+            self._file.seek(offset)
+            offset += LENGTH.size + LENGTH.unpack(self._file.read(LENGTH.size))[0]
+        return index
+
+    def _read(self, offset):
+        self._file.seek(offset)
+        header = self._file.read(LENGTH.size)
+        if len(header) < LENGTH.size:
+            return None
+        length, = LENGTH.unpack(header)
+        try:
+            return json.loads(zlib.decompress(self._file.read(length)))
+        except (zlib.error, ValueError):
+            return None
+
+    def record(self, namespace, method, args, kwargs, response=None, latency=0.0, error=None):
+        """Append one call to the cassette"""
+
+        key = request_key(namespace, method, args, kwargs)
+        record = {
+            "key": key,
+            "namespace": namespace,
+            "method": method,
+            "request": {"args": _canonical(list(args)), "kwargs": _canonical(kwargs)},
+            "response": _canonical(response),
+            "latency": round(latency, 4),
+            "error": error
+        }
+        data = zlib.compress(json.dumps(record, separators=(",", ":")).encode())
+
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(LENGTH.pack(len(data)) + data)
+            self._file.flush()
+            self.index.setdefault(key, []).append(offset)
+            self.calls["recorded"] += 1
+
+    def lookup(self, namespace, method, args, kwargs):
+        """Next recorded response for this call; repeated calls replay in recorded order"""
+
+        key = request_key(namespace, method, args, kwargs)
+
+        with self._lock:
+            offsets = self.index.get(key)
+            if not offsets:
+                self.calls["missed"] += 1
+                raise CassetteMiss(f"{namespace}.{method} call not in cassette {self.path.name}")
+
+            # Once exhausted, keep serving the last recording
+            position = self._cursor.get(key, 0)
+            self._cursor[key] = position + 1
+            record = self._read(offsets[min(position, len(offsets) - 1)])
+            self.calls["replayed"] += 1
+
+        return record
+
+    def replay_delay(self, record):
+        return record.get("latency", 0.0) * self.latency_scale
+
+    def close(self):
+        """Write the index and trailer (record mode) and close the file"""
+
+        if self._file is None or self._file.closed:
+            return
+
+        if self.recording:
+            index_offset = self._file.tell()
+            data = zlib.compress(json.dumps(self.index, separators=(",", ":")).encode())
+            self._file.write(LENGTH.pack(len(data)) + data)
+            self._file.write(TRAILER.pack(index_offset, TRAILER_MAGIC))
+
+        self._file.close()
+
+    def stats(self):
+        return {
+            "path": str(self.path),
+            "mode": self.mode,
+            "unique_requests": len(self.index),
+            "records": sum(len(offsets) for offsets in self.index.values()),
+            **self.calls
+        }
+
+
+def _replayed(record):
+    if record.get("error"):
+        raise RecordedError(record["error"])
+    return record["response"]
+
+
+class CassetteProxy:
+    """Wraps a provider object so the listed methods record or replay through a cassette"""
+
+    def __init__(self, target, cassette, namespace, methods=None):
+        self._target = target
+        self._cassette = cassette
+        self._namespace = namespace
+        self._methods = set(methods or PROVIDER_METHODS.get(namespace, []))
+
+    def __getattr__(self, name):
+        if name not in self._methods:
+            if self._target is None:
+                raise AttributeError(name)
+            return getattr(self._target, name)
+
+        cassette, namespace = self._cassette, self._namespace
+
+        if cassette.replaying:
+            async def replay(*args, **kwargs):
+                record = cassette.lookup(namespace, name, args, kwargs)
+                delay = cassette.replay_delay(record)
+                if delay:
+                    await asyncio.sleep(delay)
+                return _replayed(record)
+            return replay
+
+        method = getattr(self._target, name)
+
+        async def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                cassette.record(namespace, name, args, kwargs, latency=time.perf_counter() - start,
+                                error=f"{type(e).__name__}: {e}")
+                raise
+            cassette.record(namespace, name, args, kwargs, result, time.perf_counter() - start)
+            return result
+
+        return call
+
+
+class CassettePipeline:
+    """Text-generation pipeline stand-in that records or replays every call"""
+
+    def __init__(self, generator, cassette, namespace="code_gen"):
+        self.generator = generator
+        self.cassette = cassette
+        self.namespace = namespace
+
+    def __call__(self, *args, **kwargs):
+        if self.cassette.replaying:
+            record = self.cassette.lookup(self.namespace, "__call__", args, kwargs)
+            delay = self.cassette.replay_delay(record)
+            if delay:
+                time.sleep(delay)
+            return _replayed(record)
+
+        start = time.perf_counter()
+        try:
+            result = self.generator(*args, **kwargs)
+        except Exception as e:
+            self.cassette.record(self.namespace, "__call__", args, kwargs,
+                                 latency=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+            raise
+        self.cassette.record(self.namespace, "__call__", args, kwargs, result, time.perf_counter() - start)
+        return result
+
+    def __getattr__(self, name):
+        # model, tokenizer, stats() and friends come from the wrapped pipeline
+        if self.generator is None:
+            raise AttributeError(name)
+        return getattr(self.generator, name)
+
+
+def cassette_from_env(default_mode="replay"):
+    """Cassette configured by MODEL_CASSETTE, MODEL_CASSETTE_MODE and MODEL_CASSETTE_LATENCY"""
+
+    path = os.getenv("MODEL_CASSETTE")
+    if not path:
+        return None
+
+    return Cassette(
+        path,
+        mode=os.getenv("MODEL_CASSETTE_MODE", default_mode),
+        latency_scale=float(os.getenv("MODEL_CASSETTE_LATENCY", "0"))
+    )
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Inspect a model call cassette")
+    parser.add_argument("path", help="Cassette file")
+    parser.add_argument("--list", action="store_true", help="List every recorded call")
+    args = parser.parse_args()
+
+    cassette = Cassette(args.path, mode="replay")
+    stats = cassette.stats()
+
+    total_latency = 0.0
+    per_method = {}
+    for offsets in cassette.index.values():
+        for offset in offsets:
+            record = cassette._read(offset)
+            name = f"{record['namespace']}.{record['method']}"
+            per_method[name] = per_method.get(name, 0) + 1
+            total_latency += record.get("latency", 0.0)
+            if args.list:
+                status = "❌" if record.get("error") else "✅"
+                print(f"{status} {name} {record['key'][:12]} {record['latency']:.3f}s")
+
+    print(f"📼 {stats['path']}: {stats['records']} calls, {stats['unique_requests']} unique")
+    for name, count in sorted(per_method.items()):
+        print(f"   {name}: {count}")
+    print(f"   Recorded latency: {total_latency:.1f}s")
+
+    cassette.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
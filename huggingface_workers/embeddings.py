@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Code Embeddings
+
+Mean-pooled, L2-normalized embeddings from an encoder such as CodeBERT, used
+for candidate ranking, the function index and the inference server. With a
+TokenCache, unchanged code is never tokenized twice.
+"""
+
+from typing import List
+
+from lazy_imports import LazyModule, module_available
+
+torch = LazyModule("torch")
+TORCH_AVAILABLE = module_available("torch")
+
+
+class CodeBertEmbedder:
+    """Mean-pooled, L2-normalized CodeBERT embeddings"""
+
+    def __init__(self, tokenizer, model, max_length=256, batch_size=32, token_cache=None):
+        self.tokenizer = tokenizer
+        self.model = model.eval()
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.token_cache = token_cache
+
+    @classmethod
+    def from_pretrained(cls, model_name="microsoft/codebert-base", token_cache_dir=None, **kwargs):
+        from transformers import AutoTokenizer, AutoModel
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        if token_cache_dir is not None:
+            from token_cache import TokenCache
+            kwargs["token_cache"] = TokenCache(token_cache_dir, tokenizer)
+
+        return cls(tokenizer, AutoModel.from_pretrained(model_name), **kwargs)
+
+    def embed(self, texts: List[str]):
+        """Embed texts in as few batched forward passes as possible"""
+
+        if self.token_cache is not None:
+            return self._embed_cached(texts)
+
+        chunks = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer(
+                texts[start:start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="pt"
+            )
+            chunks.append(self.embed_batch(batch))
+
+        return torch.cat(chunks) if chunks else torch.empty(0)
+
+    def _embed_cached(self, texts: List[str]):
+        """embed() from cached token ids; special tokens and padding are added per batch"""
+
+        encoded = self.token_cache.encode_many(texts)
+        self.token_cache.flush()
+        limit = self.max_length - self.tokenizer.num_special_tokens_to_add()
+
+        chunks = []
+        for start in range(0, len(encoded), self.batch_size):
+            features = [
+                {"input_ids": self.tokenizer.build_inputs_with_special_tokens(ids[:limit].tolist())}
+                for ids in encoded[start:start + self.batch_size]
+            ]
+            chunks.append(self.embed_batch(self.tokenizer.pad(features, return_tensors="pt")))
+
+        return torch.cat(chunks) if chunks else torch.empty(0)
+
+    def embed_batch(self, batch):
+        """Embed one tokenized batch"""
+
+        with torch.inference_mode():
+            hidden = self.model(**batch).last_hidden_state
+
+        mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return torch.nn.functional.normalize(pooled, dim=-1)
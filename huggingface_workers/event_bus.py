@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Worker Event Bus
+
+In-process publish/subscribe for task lifecycle events (claimed, generating,
+tokens, finished, failed). Publishing never blocks: every subscriber has a
+bounded buffer, and a subscriber that falls behind loses its oldest events
+(counted in `dropped`) instead of slowing the worker. A short history lets new
+subscribers start with recent context and SSE clients resume with
+Last-Event-ID.
+
+Events reach the Gradio dashboard through one streaming subscription per open
+page and reach anything else through Server-Sent Events:
+    curl -N http://127.0.0.1:7861/events
+"""
+
+import json
+import time
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Iterator
+
+
+DEFAULT_EVENTS_HOST = "127.0.0.1"
+DEFAULT_EVENTS_PORT = 7861
+
+# Seconds between SSE keep-alive comments on an idle stream
+KEEPALIVE_SECONDS = 15.0
+
+
+class Subscription:
+    """One subscriber's bounded event buffer"""
+
+    def __init__(self, bus, buffer_size):
+        self.bus = bus
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.closed = False
+        self._ready = threading.Condition()
+
+    def push(self, event):
+        with self._ready:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(event)
+            self._ready.notify()
+
+    def get(self, timeout=None) -> Optional[Dict[str, Any]]:
+        """Next event, or None if none arrives within timeout or the subscription closes"""
+
+        with self._ready:
+            if not self.buffer and not self.closed:
+                self._ready.wait(timeout)
+            return self.buffer.popleft() if self.buffer else None
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Every buffered event, without waiting"""
+
+        with self._ready:
+            events = list(self.buffer)
+            self.buffer.clear()
+            return events
+
+    def events(self, timeout=None) -> Iterator[Optional[Dict[str, Any]]]:
+        """Events as they arrive; yields None on each idle timeout so callers can keep alive"""
+
+        while not self.closed:
+            yield self.get(timeout)
+
+    def close(self):
+        self.bus.unsubscribe(self)
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    """Thread-safe fan-out of events to bounded subscriber buffers"""
+
+    def __init__(self, buffer_size=256, history=100):
+        self.buffer_size = buffer_size
+        self.history = deque(maxlen=history)
+        self.subscribers: List[Subscription] = []
+        self.published = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, **data) -> Dict[str, Any]:
+        with self._lock:
+            self.published += 1
+            event = {"id": self.published, "type": event_type, "time": time.time(), **data}
+            self.history.append(event)
+            subscribers = list(self.subscribers)
+
+        for subscription in subscribers:
+            subscription.push(event)
+        return event
+
+    def subscribe(self, replay=0, after_id=None) -> Subscription:
+        """New subscription, primed with the last `replay` events or those after `after_id`"""
+
+        subscription = Subscription(self, self.buffer_size)
+        with self._lock:
+            if after_id is not None:
+                backlog = [e for e in self.history if e["id"] > after_id]
+            else:
+                backlog = list(self.history)[-replay:] if replay else []
+            for event in backlog:
+                subscription.push(event)
+            self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self.subscribers:
+                self.subscribers.remove(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "published": self.published,
+                "subscribers": len(self.subscribers),
+                "dropped": sum(s.dropped for s in self.subscribers)
+            }
+
+
+class TokenRateStreamer:
+    """generate() streamer that publishes token counts and tokens/sec while decoding"""
+
+    def __init__(self, bus, task_id, interval=0.25):
+        self.bus = bus
+        self.task_id = task_id
+        self.interval = interval
+        self.tokens = 0
+        self.started = None
+        self._last_publish = 0.0
+        self._prompt_seen = False
+
+    def put(self, value):
+        # The first call carries the prompt ids, not generated tokens
+        if not self._prompt_seen:
+            self._prompt_seen = True
+            self.started = time.perf_counter()
+            return
+
+        self.tokens += 1
+        now = time.perf_counter()
+        if now - self._last_publish >= self.interval:
+            self._last_publish = now
+            self._publish(now)
+
+    def end(self):
+        if self.started is not None:
+            self._publish(time.perf_counter(), final=True)
+
+    def _publish(self, now, final=False):
+        elapsed = max(now - self.started, 1e-9)
+        self.bus.publish(
+            "tokens", task_id=self.task_id, tokens=self.tokens,
+            tokens_per_second=round(self.tokens / elapsed, 1), final=final
+        )
+
+
+class EventStreamHandler(BaseHTTPRequestHandler):
+    """GET /events streams Server-Sent Events; GET /stats returns bus counters"""
+
+    bus: EventBus = None
+    allow_origin: Optional[str] = None
+
+    def do_GET(self):
+        if self.path == "/stats":
+            body = json.dumps(self.bus.stats()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.path.split("?")[0] != "/events":
+            self.send_error(404)
+            return
+
+        last_id = self.headers.get("Last-Event-ID")
+        subscription = self.bus.subscribe(replay=20, after_id=int(last_id) if last_id and last_id.isdigit() else None)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        if self.allow_origin:
+            self.send_header("Access-Control-Allow-Origin", self.allow_origin)
+        self.end_headers()
+
+        try:
+            with subscription:
+                for event in subscription.events(timeout=KEEPALIVE_SECONDS):
+                    if event is None:
+                        self.wfile.write(b": keepalive\n\n")
+                    else:
+                        self.wfile.write(
+                            f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+                        )
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class EventHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def serve_events(bus, host=DEFAULT_EVENTS_HOST, port=DEFAULT_EVENTS_PORT, allow_origin=None) -> EventHTTPServer:
+    """Start the SSE endpoint on a background thread (local only unless given another host)"""
+
+    handler = type("Handler", (EventStreamHandler,), {"bus": bus, "allow_origin": allow_origin})
+    server = EventHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📡 Event stream on http://{host}:{server.server_address[1]}/events")
+    return server
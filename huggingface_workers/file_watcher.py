@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+File Watcher
+
+Blocks until files under the watched paths change, then keeps collecting
+until they have been quiet for a short debounce window, and returns the set of
+touched paths. On Linux it uses inotify through ctypes (no dependency, no CPU
+while idle); elsewhere, or with FILE_WATCHER=poll, it compares stat()
+snapshots on an interval.
+
+Used by the improvement loop's watch mode (src/) and the worker's watch mode
+(tasks.json):
+    python file_watcher.py ../src ../tasks.json
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import fnmatch
+import argparse
+import threading
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import List, Dict, Set, Tuple
+
+
+DEFAULT_PATTERNS = ("*.lua",)
+
+# inotify(7) flags
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+_libc = _load_libc() if sys.platform.startswith("linux") else None
+INOTIFY_AVAILABLE = _libc is not None
+
+
+class _Targets:
+    """Which paths are watched and which changes under them count"""
+
+    def __init__(self, paths, patterns):
+        self.directories: List[Path] = []
+        self.files: Set[Path] = set()
+        self.patterns = patterns
+
+        for path in paths:
+            path = Path(path).resolve()
+            if path.is_dir():
+                self.directories.append(path)
+            else:
+                # Single files are watched through their directory so replacing them is seen
+                self.files.add(path)
+
+    def matches(self, path: Path) -> bool:
+        if path in self.files:
+            return True
+        if not any(fnmatch.fnmatch(path.name, pattern) for pattern in self.patterns):
+            return False
+        return any(directory == path.parent or directory in path.parents for directory in self.directories)
+
+    def existing(self) -> Set[Path]:
+        """Every matching file that exists right now"""
+
+        found = {path for path in self.files if path.exists()}
+        for directory in self.directories:
+            for pattern in self.patterns:
+                found.update(directory.rglob(pattern))
+        return found
+
+
+class _InotifyBackend:
+    """Recursive inotify watches; new subdirectories are watched as they appear"""
+
+    def __init__(self, targets):
+        self.targets = targets
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.watches: Dict[int, Path] = {}
+        self._wake_read, self._wake_write = os.pipe()
+
+        for directory in targets.directories:
+            self._watch_tree(directory)
+        for path in targets.files:
+            self._watch(path.parent)
+
+    def _watch(self, directory: Path):
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            # Vanished before we got to it; its parent's event already covers it
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(error, f"inotify_add_watch failed for {directory}: {os.strerror(error)}")
+        self.watches[wd] = directory
+
+    def _watch_tree(self, directory: Path):
+        self._watch(directory)
+        for child in directory.rglob("*"):
+            if child.is_dir():
+                self._watch(child)
+
+    def wait(self, timeout) -> Set[Path]:
+        try:
+            ready, _, _ = select.select([self.fd, self._wake_read], [], [], timeout)
+        except (OSError, ValueError):
+            # Closed from another thread
+            return set()
+        if self._wake_read in ready or self.fd not in ready:
+            return set()
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # The kernel dropped events; report everything that could have changed
+                changed |= self.targets.existing()
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and any(d in path.parents for d in self.targets.directories):
+                    # Files written into a new directory before its watch existed are reported now
+                    self._watch_tree(path)
+                    changed |= {p for p in path.rglob("*") if self.targets.matches(p)}
+                continue
+
+            if self.targets.matches(path):
+                changed.add(path)
+
+        return changed
+
+    def close(self):
+        os.write(self._wake_write, b"x")
+        for fd in (self.fd, self._wake_read, self._wake_write):
+            os.close(fd)
+
+
+class _PollingBackend:
+    """stat() snapshots compared every interval"""
+
+    def __init__(self, targets, interval):
+        self.targets = targets
+        self.interval = interval
+        self._closed = threading.Event()
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for path in self.targets.existing():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while not self._closed.is_set():
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if remaining > 0 and self._closed.wait(remaining):
+                break
+
+            current = self._scan()
+            changed = {p for p in set(current) | set(self.snapshot) if current.get(p) != self.snapshot.get(p)}
+            self.snapshot = current
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+        return set()
+
+    def close(self):
+        self._closed.set()
+
+
+class FileWatcher:
+    """Debounced change notifications for directories (recursively) and single files"""
+
+    def __init__(self, paths, patterns=DEFAULT_PATTERNS, debounce=0.25, max_delay=2.0,
+                 backend=None, poll_interval=1.0):
+        self.targets = _Targets(paths, patterns)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.closed = False
+
+        backend = backend or os.getenv("FILE_WATCHER") or ("inotify" if INOTIFY_AVAILABLE else "poll")
+        if backend == "inotify" and INOTIFY_AVAILABLE:
+            self._backend = _InotifyBackend(self.targets)
+        else:
+            backend = "poll"
+            self._backend = _PollingBackend(self.targets, poll_interval)
+        self.backend = backend
+
+    def changes(self, timeout=None) -> Set[Path]:
+        """Touched paths once they settle; empty on timeout or close"""
+
+        changed = self._backend.wait(timeout)
+        if not changed:
+            return set()
+
+        # Editors and git checkouts touch files in bursts; wait for the burst to end
+        started = time.monotonic()
+        while not self.closed and time.monotonic() - started < self.max_delay:
+            more = self._backend.wait(self.debounce)
+            if not more:
+                break
+            changed |= more
+
+        return changed
+
+    async def wait(self, timeout=None) -> Set[Path]:
+        """changes() without blocking the event loop"""
+
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(None, self.changes, timeout)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Print debounced file changes")
+    parser.add_argument("paths", nargs="+", help="Directories (watched recursively) or files")
+    parser.add_argument("--pattern", action="append", help="File name pattern (default: *.lua)")
+    parser.add_argument("--poll", action="store_true", help="Use the polling backend")
+    args = parser.parse_args()
+
+    watcher = FileWatcher(args.paths, tuple(args.pattern or DEFAULT_PATTERNS), backend="poll" if args.poll else None)
+    print(f"👀 Watching {len(args.paths)} paths ({watcher.backend})")
+
+    try:
+        while True:
+            changed = watcher.changes()
+            stamp = time.strftime("%H:%M:%S")
+            for path in sorted(changed):
+                print(f"   {stamp} {'✏️ ' if path.exists() else '🗑️ '} {path}")
+    except KeyboardInterrupt:
+        watcher.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Batched Git Publisher
+
+Accumulates accepted worker results and commits them to a local git
+repository (bare or not) in batches: one `git fast-import` process per batch
+writes every blob and tree straight into the object database and advances a
+work branch by exactly one commit. A batch of 50 results costs the same
+three git invocations as a batch of one, and nothing touches a working tree
+or GitHub.
+
+Enable in the worker with PUBLISH_REPO=/path/to/repo (PUBLISH_BRANCH,
+PUBLISH_BATCH_SIZE, PUBLISH_FLUSH_INTERVAL), or publish saved results:
+    python git_publisher.py --repo /tmp/results.git --init result.json ...
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+
+DEFAULT_BRANCH = "autonomous/worker-results"
+DEFAULT_AUTHOR = "Roblox Game Worker <worker@localhost>"
+
+
+class PublishError(RuntimeError):
+    """git rejected the batch"""
+
+
+def result_files(result: Dict[str, Any]) -> Dict[str, str]:
+    """Repository paths and contents for one worker result"""
+
+    task = result.get("task", {})
+    output = result.get("output") or {}
+    body = json.dumps(result, indent=2, sort_keys=True)
+    digest = hashlib.sha256(body.encode()).hexdigest()[:12]
+    day = (result.get("timestamp") or datetime.now().isoformat())[:10]
+
+    files = {f"worker_results/{day}/{digest}.json": body + "\n"}
+
+    code = output.get("code") or output.get("fix")
+    if code:
+        # Never overwrite real sources; fixes land next to the other generated code for review
+        name = task.get("file") or task.get("description") or output.get("type") or "feature"
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", Path(name).stem).strip("_").lower()[:48] or "feature"
+        folder = "generated_fixes" if output.get("type") == "bug_fix" else "generated_features"
+        files[f"{folder}/{slug}_{digest}.lua"] = code if code.endswith("\n") else code + "\n"
+
+    return files
+
+
+class GitPublisher:
+    """Queues results and commits them to a work branch in batches"""
+
+    def __init__(self, repo_path, branch=DEFAULT_BRANCH, batch_size=20, flush_interval=300.0,
+                 author=DEFAULT_AUTHOR, base_ref="HEAD"):
+        self.repo_path = Path(repo_path)
+        self.branch = branch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.author = author
+        self.base_ref = base_ref
+
+        self.pending: List[Dict[str, Any]] = []
+        self._first_pending = None
+        self._lock = threading.Lock()
+        self.commits = 0
+        self.published = 0
+        self.last_commit = None
+
+    @property
+    def ref(self):
+        return f"refs/heads/{self.branch}"
+
+    def _git(self, *args, input=None, check=True):
+        result = subprocess.run(
+            ["git", f"--git-dir={self._git_dir()}", *args],
+            input=input, capture_output=True
+        )
+        if check and result.returncode != 0:
+            raise PublishError(f"git {args[0]} failed: {result.stderr.decode(errors='replace').strip()}")
+        return result
+
+    def _git_dir(self):
+        dot_git = self.repo_path / ".git"
+        return dot_git if dot_git.exists() else self.repo_path
+
+    def _resolve(self, ref) -> Optional[str]:
+        result = self._git("rev-parse", "--verify", "-q", f"{ref}^{{commit}}", check=False)
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode().strip() or None
+
+    def add(self, result: Dict[str, Any]) -> bool:
+        """Queue a result; returns True if this triggered a commit"""
+
+        with self._lock:
+            if not self.pending:
+                self._first_pending = time.monotonic()
+            self.pending.append(result)
+        return self.maybe_flush()
+
+    def due(self) -> bool:
+        if not self.pending:
+            return False
+        return (len(self.pending) >= self.batch_size
+                or time.monotonic() - self._first_pending >= self.flush_interval)
+
+    def maybe_flush(self) -> bool:
+        """Commit the queue if the batch is full or its oldest result has waited long enough"""
+
+        if self.due():
+            return self.flush() is not None
+        return False
+
+    def flush(self) -> Optional[str]:
+        """Commit everything queued as one commit; returns its id"""
+
+        with self._lock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return None
+
+            try:
+                commit = self._commit(batch)
+            except PublishError:
+                # Keep the results for the next attempt
+                self.pending = batch + self.pending
+                raise
+
+        self.commits += 1
+        self.published += len(batch)
+        self.last_commit = commit
+        print(f"   📦 Committed {len(batch)} result{'s' if len(batch) != 1 else ''} to {self.branch} ({commit[:10]})")
+        return commit
+
+    def _commit(self, batch):
+        files: Dict[str, str] = {}
+        for result in batch:
+            files.update(result_files(result))
+
+        features = [r.get("task", {}).get("description") or r.get("task", {}).get("file") or "result" for r in batch]
+        message = f"Publish {len(batch)} worker result{'s' if len(batch) != 1 else ''}\n\n" + "".join(
+            f"- {feature[:100]}\n" for feature in features
+        )
+
+        # Build on the branch tip, or start the branch from base_ref (or as a root commit)
+        parent = self._resolve(self.ref) or (self._resolve(self.base_ref) if self.base_ref else None)
+
+        stream = [f"commit {self.ref}\n".encode()]
+        stream.append(f"committer {self.author} {int(time.time())} +0000\n".encode())
+        stream.append(self._data(message.encode()))
+        if parent:
+            stream.append(f"from {parent}\n".encode())
+        for path, content in sorted(files.items()):
+            stream.append(f"M 100644 inline {path}\n".encode())
+            stream.append(self._data(content.encode()))
+        stream.append(b"\n")
+
+        # fast-import refuses to move the branch if someone else advanced it meanwhile
+        self._git("fast-import", "--quiet", "--done", input=b"".join(stream) + b"done\n")
+        return self._resolve(self.ref)
+
+    @staticmethod
+    def _data(payload: bytes) -> bytes:
+        return f"data {len(payload)}\n".encode() + payload + b"\n"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "branch": self.branch,
+            "pending": len(self.pending),
+            "commits": self.commits,
+            "published": self.published,
+            "last_commit": self.last_commit
+        }
+
+    def close(self):
+        if self.pending:
+            self.flush()
+
+
+def publisher_from_env() -> Optional[GitPublisher]:
+    """GitPublisher for PUBLISH_REPO, if set"""
+
+    repo = os.getenv("PUBLISH_REPO")
+    if not repo:
+        return None
+
+    return GitPublisher(
+        repo,
+        branch=os.getenv("PUBLISH_BRANCH", DEFAULT_BRANCH),
+        batch_size=int(os.getenv("PUBLISH_BATCH_SIZE", "20")),
+        flush_interval=float(os.getenv("PUBLISH_FLUSH_INTERVAL", "300"))
+    )
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Commit worker results to a local git repository in batches")
+    parser.add_argument("--repo", required=True, help="Local repository (bare or with a working tree)")
+    parser.add_argument("--branch", default=DEFAULT_BRANCH)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--init", action="store_true", help="Create a bare repository if it does not exist")
+    parser.add_argument("results", nargs="*", help="Result JSON files to publish")
+    args = parser.parse_args()
+
+    if args.init and not Path(args.repo).exists():
+        subprocess.run(["git", "init", "--bare", "-q", args.repo], check=True)
+        print(f"✅ Created bare repository {args.repo}")
+
+    publisher = GitPublisher(args.repo, args.branch, args.batch_size, flush_interval=float("inf"))
+
+    start = time.perf_counter()
+    for path in args.results:
+        with open(path) as f:
+            publisher.add(json.load(f))
+    publisher.close()
+
+    print(f"✅ Published {publisher.published} results in {publisher.commits} commits "
+          f"({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
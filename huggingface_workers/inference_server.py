@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Local Inference Server
+
+One long-running process per host loads each model once and serves generate,
+embed and batch requests over localhost HTTP to every tool (the improvement
+loop, setup_huggingface, Gradio workers). Requests from many clients are
+multiplexed: embedding requests arriving within a few milliseconds are
+coalesced into one batched forward pass, and generation runs one request per
+model at a time while other models keep serving.
+
+Start the daemon, then any tool started with HF_INFERENCE_URL pointing at it
+uses it instead of loading models itself:
+    python inference_server.py --preload
+    HF_INFERENCE_URL=http://127.0.0.1:8765 python autonomous_game_dev.py
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+
+from lazy_imports import LazyModule, module_available
+
+torch = LazyModule("torch")
+TORCH_AVAILABLE = module_available("torch")
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+# Models the server knows how to load, by the names the tools already use
+MODEL_NAMES = {
+    "code_gen": "Salesforce/codegen-350M-mono",
+    "text_gen": "distilgpt2",
+    "code_bert": "microsoft/codebert-base",
+}
+
+
+class MicroBatcher:
+    """Coalesces concurrent list-in/list-out calls into batches on one thread"""
+
+    def __init__(self, fn, max_batch=32, max_wait=0.005):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, items: List[Any]) -> Future:
+        future = Future()
+        self._queue.put((list(items), future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            # Keep collecting until the batch is full or the window closes
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(request)
+                size += len(request[0])
+
+            items = [item for request_items, _ in pending for item in request_items]
+            try:
+                results = self.fn(items)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+
+            offset = 0
+            for request_items, future in pending:
+                future.set_result(results[offset:offset + len(request_items)])
+                offset += len(request_items)
+
+
+class ModelHost:
+    """Loads each model once, on first use or at startup, and serializes its use"""
+
+    def __init__(self, quantize=False):
+        self.quantize = quantize
+        self.models: Dict[str, Any] = {}
+        self.locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in MODEL_NAMES}
+        # Per model, so a slow load only holds up requests for that model
+        self._load_locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in MODEL_NAMES}
+        self.embedders: Dict[str, MicroBatcher] = {}
+        self.requests = {"generate": 0, "embed": 0, "batch": 0}
+
+    def get(self, name):
+        if name not in MODEL_NAMES:
+            raise KeyError(f"Unknown model: {name}")
+
+        model = self.models.get(name)
+        if model is None:
+            with self._load_locks[name]:
+                if name not in self.models:
+                    self.models[name] = self._load(name)
+                model = self.models[name]
+        return model
+
+    def _load(self, name):
+        from quantization import load_text_generation_pipeline
+        from prefix_cache import PrefixCachedGenerator
+        from embeddings import CodeBertEmbedder
+
+        print(f"   Loading {MODEL_NAMES[name]}...")
+        start = time.perf_counter()
+
+        if name == "code_bert":
+            from token_cache import default_cache_path
+            model = CodeBertEmbedder.from_pretrained(MODEL_NAMES[name], token_cache_dir=default_cache_path())
+        else:
+            model = load_text_generation_pipeline(MODEL_NAMES[name], quantize=self.quantize, device=-1)
+            if name == "code_gen":
+                model = PrefixCachedGenerator(model)
+
+        print(f"   ✅ {name} loaded in {time.perf_counter() - start:.1f}s")
+        return model
+
+    def generate(self, model, prompt, **kwargs):
+        self.requests["generate"] += 1
+        generator = self.get(model)
+        with self.locks[model]:
+            return generator(prompt, **kwargs)
+
+    def embed(self, model, texts):
+        self.requests["embed"] += 1
+        embedder = self.get(model)
+
+        with self._load_locks[model]:
+            if model not in self.embedders:
+                self.embedders[model] = MicroBatcher(lambda items: embedder.embed(items).tolist())
+
+        return self.embedders[model].submit(texts).result()
+
+    def handle(self, endpoint, payload):
+        """Run one request; batch requests fan out to the other endpoints"""
+
+        if endpoint == "generate":
+            return {"results": self.generate(payload["model"], payload["prompt"], **payload.get("kwargs", {}))}
+        if endpoint == "embed":
+            return {"embeddings": self.embed(payload["model"], payload["texts"])}
+        if endpoint == "batch":
+            self.requests["batch"] += 1
+            responses = []
+            for request in payload["requests"]:
+                try:
+                    responses.append(self.handle(request["endpoint"], request))
+                except Exception as e:
+                    responses.append({"error": f"{type(e).__name__}: {e}"})
+            return {"responses": responses}
+        raise KeyError(f"Unknown endpoint: {endpoint}")
+
+    def health(self):
+        return {
+            "pid": os.getpid(),
+            "loaded": sorted(self.models),
+            "available": sorted(MODEL_NAMES),
+            "quantized": self.quantize,
+            "requests": self.requests,
+            "embed_batches": {name: {"batches": b.batches, "items": b.items} for name, b in self.embedders.items()}
+        }
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """JSON over HTTP: GET /health, POST /generate, /embed and /batch"""
+
+    host: ModelHost = None
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, self.host.health())
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            self._send(200, self.host.handle(self.path.strip("/"), payload))
+        except KeyError as e:
+            self._send(404, {"error": str(e.args[0]) if e.args else "Not found"})
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class InferenceHTTPServer(ThreadingHTTPServer):
+    """Threaded server with a listen backlog sized for many concurrent clients"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, preload=(), quantize=False):
+    """Run the server until interrupted"""
+
+    model_host = ModelHost(quantize=quantize)
+    for name in preload:
+        model_host.get(name)
+
+    handler = type("Handler", (InferenceRequestHandler,), {"host": model_host})
+    server = InferenceHTTPServer((host, port), handler)
+
+    print(f"🚀 Inference server on http://{host}:{port} (pid {os.getpid()})")
+    print(f"   Clients: export HF_INFERENCE_URL=http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Inference server stopped")
+    finally:
+        server.server_close()
+
+
+class InferenceClient:
+    """Thin client for the local inference server"""
+
+    def __init__(self, url=DEFAULT_URL, timeout=300):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, payload=None, timeout=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            f"{self.url}{path}", data=data, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read() or b"{}").get("error", str(e))) from None
+
+    def health(self, timeout=None):
+        return self._request("/health", timeout=timeout)
+
+    def available(self, timeout=0.25):
+        try:
+            self.health(timeout=timeout)
+            return True
+        except (OSError, ValueError, RuntimeError):
+            return False
+
+    def generate(self, model, prompt, **kwargs):
+        return self._request("/generate", {"model": model, "prompt": prompt, "kwargs": kwargs})["results"]
+
+    def embed(self, model, texts):
+        return self._request("/embed", {"model": model, "texts": list(texts)})["embeddings"]
+
+    def batch(self, requests: List[Dict[str, Any]]):
+        return self._request("/batch", {"requests": requests})["responses"]
+
+
+class RemotePipeline:
+    """Text-generation pipeline interface backed by the inference server"""
+
+    model = None
+    tokenizer = None
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def __call__(self, prompt, **kwargs):
+        return self.client.generate(self.name, prompt, **kwargs)
+
+
+class RemoteEmbedder:
+    """CodeBertEmbedder interface backed by the inference server"""
+
+    def __init__(self, client, name="code_bert"):
+        self.client = client
+        self.name = name
+
+    def embed(self, texts):
+        vectors = self.client.embed(self.name, texts)
+        return torch.tensor(vectors) if TORCH_AVAILABLE else vectors
+
+
+def inference_client_from_env() -> Optional[InferenceClient]:
+    """Client for HF_INFERENCE_URL, if set and reachable"""
+
+    # The protocol is unauthenticated, so whatever answers on the default port is never adopted unasked
+    url = os.getenv("HF_INFERENCE_URL")
+    if not url or url.lower() in ("0", "off", "none"):
+        return None
+
+    client = InferenceClient(url)
+    if client.available():
+        return client
+
+    print(f"⚠️  Inference server not reachable at {url}, loading models locally")
+    return None
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Shared local inference server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--preload", nargs="*", default=None, choices=sorted(MODEL_NAMES),
+                        help="Load these models at startup (default with no names: all)")
+    parser.add_argument("--quantize", action="store_true", help="Serve int8 text-generation models")
+    args = parser.parse_args()
+
+    if not TORCH_AVAILABLE:
+        print("❌ Requires transformers and torch: pip install transformers torch")
+        return 1
+
+    if InferenceClient(f"http://{args.host}:{args.port}").available():
+        print(f"✅ Inference server already running on {args.host}:{args.port}")
+        return 0
+
+    preload = sorted(MODEL_NAMES) if args.preload == [] else (args.preload or [])
+    serve(args.host, args.port, preload, args.quantize)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Lazy Imports
+
+torch, transformers, numpy and gradio take seconds to import, and most runs
+(the analyzer, stub or replayed loops, thin clients) never touch them. Modules
+check availability with find_spec, which does not execute the package, and
+bind a LazyModule that performs the real import on first attribute access:
+
+    torch = LazyModule("torch")
+    TORCH_AVAILABLE = module_available("torch")
+"""
+
+import importlib
+import importlib.util
+import threading
+
+
+def module_available(*names) -> bool:
+    """True if every named module can be imported, without importing it"""
+
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is None:
+                return False
+        except (ImportError, ValueError):
+            return False
+    return True
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self._lock:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self._name)
+                    self.__dict__["_module"] = module
+        return module
+
+    @property
+    def loaded(self):
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime Backend
+
+Exports a causal language model to ONNX once (with past-key-value inputs and
+outputs), caches the graph on disk keyed by model and library versions, and
+runs generation on ONNX Runtime's CPU execution provider with IO binding so
+the KV cache stays in pre-bound buffers between decoding steps.
+
+Select it per worker mode with HF_BACKEND=onnx (all) or e.g.
+HF_BACKEND_FEATURE_GENERATOR=onnx, and compare against PyTorch with:
+    python onnx_backend.py --benchmark --model distilgpt2
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+
+from lazy_imports import LazyModule, module_available
+
+torch = LazyModule("torch")
+transformers = LazyModule("transformers")
+TRANSFORMERS_AVAILABLE = module_available("transformers", "torch")
+
+onnxruntime = LazyModule("onnxruntime")
+optimum = LazyModule("optimum")
+optimum_ort = LazyModule("optimum.onnxruntime")
+ONNX_AVAILABLE = module_available("onnxruntime", "optimum")
+
+
+BACKENDS = ("torch", "onnx")
+
+DEFAULT_CACHE_DIR = Path(os.getenv(
+    "ONNX_MODEL_CACHE",
+    Path.home() / ".cache" / "roblox-game-ai" / "onnx"
+))
+
+
+def backend_for_mode(worker_mode=None, backend=None):
+    """Resolve the backend: explicit, then HF_BACKEND_<MODE>, then HF_BACKEND, then torch"""
+
+    if backend is None and worker_mode:
+        backend = os.getenv(f"HF_BACKEND_{worker_mode.upper()}")
+    backend = (backend or os.getenv("HF_BACKEND") or "torch").lower()
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+
+    if backend == "onnx" and not ONNX_AVAILABLE:
+        print("   ⚠️  ONNX backend needs optimum[onnxruntime]; using torch")
+        return "torch"
+
+    return backend
+
+
+def export_dir(model_name, cache_dir=None):
+    """Location of the exported graph for this model and library versions"""
+
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+    key = (f"{model_name}|onnxruntime={onnxruntime.__version__}|optimum={optimum.__version__}"
+           f"|transformers={transformers.__version__}")
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return cache_dir / f"{model_name.replace('/', '--')}-{digest}"
+
+
+def load_onnx_model(model_name, cache_dir=None):
+    """ORT model with KV cache and IO binding, exporting on first use"""
+
+    path = export_dir(model_name, cache_dir)
+    options = {"provider": "CPUExecutionProvider", "use_cache": True, "use_io_binding": True}
+
+    if (path / "config.json").exists():
+        return optimum_ort.ORTModelForCausalLM.from_pretrained(path, **options)
+
+    print(f"   ⚙️  Exporting {model_name} to ONNX (cached for next start)...")
+
+    model = optimum_ort.ORTModelForCausalLM.from_pretrained(model_name, export=True, **options)
+
+    # Save into a temporary directory and rename so a killed export never looks complete
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    model.save_pretrained(tmp_path)
+    transformers.AutoTokenizer.from_pretrained(model_name).save_pretrained(tmp_path)
+    os.replace(tmp_path, path)
+
+    return optimum_ort.ORTModelForCausalLM.from_pretrained(path, **options)
+
+
+def load_onnx_pipeline(model_name, cache_dir=None, **kwargs):
+    """text-generation pipeline backed by ONNX Runtime"""
+
+    # dtype and device choices belong to the exported graph and its provider
+    kwargs.pop("torch_dtype", None)
+    kwargs.pop("device", None)
+
+    model = load_onnx_model(model_name, cache_dir)
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+    return transformers.pipeline("text-generation", model=model, tokenizer=tokenizer, **kwargs)
+
+
+def _time_backend(model, tokenizer, max_new_tokens):
+    """Per-prompt latency and generated token ids for greedy decoding"""
+
+    from quantization import BENCHMARK_PROMPTS
+
+    latencies, outputs, tokens = [], [], 0
+
+    with torch.inference_mode():
+        for prompt in BENCHMARK_PROMPTS:
+            inputs = tokenizer(prompt, return_tensors="pt")
+            start = time.perf_counter()
+            output = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id
+            )
+            latencies.append(time.perf_counter() - start)
+
+            new_tokens = output[0, inputs["input_ids"].shape[1]:].tolist()
+            tokens += len(new_tokens)
+            outputs.append(new_tokens)
+
+    ordered = sorted(latencies)
+    return {
+        "mean_latency_ms": round(sum(latencies) / len(latencies) * 1000, 1),
+        "p50_latency_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+        "max_latency_ms": round(ordered[-1] * 1000, 1),
+        "tokens_per_second": round(tokens / max(sum(latencies), 1e-9), 2),
+        "outputs": outputs
+    }
+
+
+def _warm_up(model, tokenizer):
+    """One short generation so lazy initialization is not timed"""
+
+    inputs = tokenizer("local x = 1", return_tensors="pt")
+    with torch.inference_mode():
+        model.generate(**inputs, max_new_tokens=4, do_sample=False, pad_token_id=tokenizer.eos_token_id)
+
+
+def benchmark(model_name, max_new_tokens=48, cache_dir=None):
+    """Side-by-side PyTorch vs ONNX Runtime latency and throughput on the Lua prompts"""
+
+    from quantization import BENCHMARK_PROMPTS, _token_agreement
+
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+    results = {}
+
+    start = time.perf_counter()
+    torch_model = transformers.AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32).eval()
+    torch_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    onnx_model = load_onnx_model(model_name, cache_dir)
+    onnx_load = time.perf_counter() - start
+
+    for model in (torch_model, onnx_model):
+        _warm_up(model, tokenizer)
+
+    results["torch"] = {"load_seconds": round(torch_load, 2), **_time_backend(torch_model, tokenizer, max_new_tokens)}
+    results["onnx"] = {"load_seconds": round(onnx_load, 2), **_time_backend(onnx_model, tokenizer, max_new_tokens)}
+
+    agreement = _token_agreement(results["torch"].pop("outputs"), results["onnx"].pop("outputs"))
+
+    return {
+        "model": model_name,
+        "prompts": len(BENCHMARK_PROMPTS),
+        "max_new_tokens": max_new_tokens,
+        "torch_threads": torch.get_num_threads(),
+        **results,
+        "latency_speedup": round(results["torch"]["mean_latency_ms"] / max(results["onnx"]["mean_latency_ms"], 1e-9), 2),
+        "throughput_speedup": round(results["onnx"]["tokens_per_second"] / max(results["torch"]["tokens_per_second"], 1e-9), 2),
+        "greedy_token_agreement": round(agreement, 3)
+    }
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="ONNX Runtime backend for text generation")
+    parser.add_argument("--model", default="Salesforce/codegen-350M-mono")
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--max-new-tokens", type=int, default=48)
+    parser.add_argument("--export", action="store_true", help="Export and cache the model")
+    parser.add_argument("--benchmark", action="store_true", help="Compare PyTorch and ONNX Runtime")
+    args = parser.parse_args()
+
+    if not (TRANSFORMERS_AVAILABLE and ONNX_AVAILABLE):
+        print("❌ Requires transformers, torch and optimum: pip install transformers torch optimum[onnxruntime]")
+        return 1
+
+    if args.benchmark:
+        print(json.dumps(benchmark(args.model, args.max_new_tokens, args.cache_dir), indent=2))
+        return 0
+
+    if args.export:
+        load_onnx_model(args.model, args.cache_dir)
+        print(f"✅ Cached: {export_dir(args.model, args.cache_dir)}")
+        return 0
+
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
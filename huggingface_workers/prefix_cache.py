@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Shared-Prefix KV Cache
+
+Wraps a text-generation pipeline so prompts that start with a common prefix
+(the Lua prompt header, retrieved context blocks) reuse the attention KV state
+computed for that prefix. Prefix states live in a bounded LRU; only the unique
+suffix of each prompt is prefilled.
+
+Benchmark time-to-first-token with:
+    python prefix_cache.py --benchmark --model distilgpt2
+"""
+
+import sys
+import copy
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from lazy_imports import LazyModule, module_available
+
+torch = LazyModule("torch")
+transformers = LazyModule("transformers")
+TRANSFORMERS_AVAILABLE = module_available("transformers", "torch")
+
+
+# Shared header for every Lua generation prompt; context blocks follow it
+LUA_PROMPT_HEADER = "-- Roblox Lua code:\n"
+
+
+def build_lua_prompt(description, context=""):
+    """Split a Lua prompt into its shareable prefix and task-specific suffix"""
+
+    prefix = LUA_PROMPT_HEADER + (context.rstrip("\n") + "\n" if context else "")
+    suffix = f"-- {description}\nlocal function"
+    return prefix, suffix
+
+
+def strip_prefix(text, prefix):
+    """Generated text without the shared prefix, for backends that echo it"""
+
+    return text[len(prefix):] if prefix and text.startswith(prefix) else text
+
+
+class PrefixCachedGenerator:
+    """Drop-in replacement for a text-generation pipeline with prefix KV reuse"""
+
+    def __init__(self, generator, max_entries=8):
+        self.generator = generator
+        self.model = generator.model
+        self.tokenizer = generator.tokenizer
+        self.max_entries = max_entries
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def prefix_state(self, prefix):
+        """Token ids and KV cache for a prefix, computed once and kept in the LRU"""
+
+        # Called from executor threads and the inference server's request threads
+        with self._lock:
+            state = self._states.get(prefix)
+            if state is not None:
+                self._states.move_to_end(prefix)
+                self.hits += 1
+                return state
+            self.misses += 1
+
+        input_ids = self.tokenizer(prefix, return_tensors="pt").input_ids.to(self.model.device)
+
+        with torch.inference_mode():
+            output = self.model(input_ids, use_cache=True)
+
+        state = (input_ids, output.past_key_values)
+
+        with self._lock:
+            self._states[prefix] = state
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+
+        return state
+
+    def __call__(self, prompt, prefix="", num_return_sequences=1, **kwargs):
+        """Generate like a pipeline given prefix=: text is prompt + continuation, without the prefix"""
+
+        # Plain prompts go straight to the wrapped pipeline
+        if not prefix:
+            return self.generator(prompt, num_return_sequences=num_return_sequences, **kwargs)
+
+        prefix_ids, past_key_values = self.prefix_state(prefix)
+        suffix_ids = self.tokenizer(
+            prompt, add_special_tokens=False, return_tensors="pt"
+        ).input_ids.to(self.model.device)
+        input_ids = torch.cat([prefix_ids, suffix_ids], dim=-1)
+
+        generate_kwargs = self._generate_kwargs(kwargs)
+
+        # generate() extends the cache in place, so each call gets its own copy
+        cache = copy.deepcopy(past_key_values)
+
+        # Sample all sequences as one batch when the cache can be expanded to match
+        if num_return_sequences > 1 and hasattr(cache, "batch_repeat_interleave"):
+            cache.batch_repeat_interleave(num_return_sequences)
+            batches = [(input_ids.repeat(num_return_sequences, 1), cache)]
+        else:
+            batches = [(input_ids, cache)]
+            batches += [
+                (input_ids, copy.deepcopy(past_key_values)) for _ in range(num_return_sequences - 1)
+            ]
+
+        results = []
+        for batch_ids, batch_cache in batches:
+            with torch.inference_mode():
+                output = self.model.generate(
+                    input_ids=batch_ids,
+                    attention_mask=torch.ones_like(batch_ids),
+                    past_key_values=batch_cache,
+                    **generate_kwargs
+                )
+            results.extend(
+                {"generated_text": prompt + self.tokenizer.decode(
+                    sequence[input_ids.shape[1]:], skip_special_tokens=True
+                )}
+                for sequence in output
+            )
+
+        return results
+
+    def _generate_kwargs(self, kwargs):
+        """Translate pipeline-style arguments to generate() arguments"""
+
+        generate_kwargs = dict(kwargs)
+        generate_kwargs.setdefault("pad_token_id", self.tokenizer.eos_token_id)
+
+        if not generate_kwargs.get("do_sample", False):
+            generate_kwargs.pop("temperature", None)
+
+        return generate_kwargs
+
+    def stats(self):
+        return {
+            "entries": len(self._states),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+def _load_context(max_chars=2500):
+    """A long shared context block taken from the game's own source"""
+
+    src_path = Path(__file__).parent.parent / "src" / "ServerScriptService"
+    context = ""
+    for lua_file in sorted(src_path.glob("*.lua")):
+        context += lua_file.read_text()
+        if len(context) >= max_chars:
+            break
+    return context[:max_chars]
+
+
+def benchmark(model_name, runs=5):
+    """Time-to-first-token for long shared-context prompts, with and without reuse"""
+
+    from quantization import BENCHMARK_PROMPTS
+
+    generator = transformers.pipeline("text-generation", model=model_name, device=-1)
+    cached = PrefixCachedGenerator(generator)
+    prefix, _ = build_lua_prompt("", context=_load_context())
+    suffixes = [p.split("\n", 1)[1] for p in BENCHMARK_PROMPTS][:runs]
+
+    def first_token_seconds(call):
+        start = time.perf_counter()
+        call()
+        return time.perf_counter() - start
+
+    # Warm the prefix state so the cached timings reflect reuse
+    cached.prefix_state(prefix)
+
+    baseline = [
+        first_token_seconds(lambda s=s: generator(prefix + s, max_new_tokens=1, do_sample=False))
+        for s in suffixes
+    ]
+    reused = [
+        first_token_seconds(lambda s=s: cached(s, prefix=prefix, max_new_tokens=1, do_sample=False))
+        for s in suffixes
+    ]
+
+    prefix_tokens = len(generator.tokenizer(prefix).input_ids)
+    mean_baseline = sum(baseline) / len(baseline)
+    mean_reused = sum(reused) / len(reused)
+
+    return {
+        "model": model_name,
+        "prefix_tokens": prefix_tokens,
+        "prompts": len(suffixes),
+        "ttft_ms_full_prefill": round(mean_baseline * 1000, 1),
+        "ttft_ms_prefix_cached": round(mean_reused * 1000, 1),
+        "speedup": round(mean_baseline / max(mean_reused, 1e-9), 2),
+        "cache": cached.stats()
+    }
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Shared-prefix KV cache for text generation")
+    parser.add_argument("--model", default="Salesforce/codegen-350M-mono")
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("❌ Requires transformers and torch: pip install transformers torch")
+        return 1
+
+    if args.benchmark:
+        print(json.dumps(benchmark(args.model, args.runs), indent=2))
+        return 0
+
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Pre-Fork Worker Pool
+
+The parent loads the models once, freezes the garbage collector so already
+allocated objects are never written to again, and forks N RobloxGameWorker
+children. Children share the weight pages copy-on-write, each with its own
+torch thread budget and its own slice of the task queue. Children that exit
+are re-forked from the parent, which still holds the loaded models, after an
+exponential backoff; a worker that keeps crashing is given up on.
+
+The parent reports per-child and total RSS and PSS from /proc, so the cost of
+one more worker (its activations, not another copy of the weights) is visible:
+    python prefork.py --workers 4 --mode feature_generator
+"""
+
+import os
+import gc
+import sys
+import time
+import signal
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Dict, Optional
+
+from lazy_imports import LazyModule, module_available
+
+torch = LazyModule("torch")
+TORCH_AVAILABLE = module_available("torch")
+
+
+# Delay before re-forking a worker that exited, doubling per consecutive crash
+RESTART_BACKOFF = 1.0
+MAX_RESTART_BACKOFF = 60.0
+
+# A worker that stayed up this long has recovered; its backoff starts over
+STABLE_SECONDS = 60.0
+
+
+def process_memory(pid) -> Optional[Dict[str, float]]:
+    """RSS, PSS, shared and private memory of a process in MB"""
+
+    fields = {}
+    rollup = Path(f"/proc/{pid}/smaps_rollup")
+
+    try:
+        if rollup.exists():
+            for line in rollup.read_text().splitlines()[1:]:
+                name, _, value = line.partition(":")
+                parts = value.split()
+                if parts and parts[-1] == "kB":
+                    fields[name.strip()] = int(parts[0]) / 1024
+        else:
+            # Kernels before 4.14 have no smaps_rollup; PSS is unavailable
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    fields["Rss"] = int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        return None
+
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+
+    return {
+        "rss_mb": round(fields.get("Rss", 0), 1),
+        "pss_mb": round(fields["Pss"], 1) if "Pss" in fields else None,
+        "shared_mb": round(shared, 1),
+        "private_mb": round(private, 1)
+    }
+
+
+def memory_report(parent_pid, children):
+    """Per-process and total memory for the parent and its children"""
+
+    processes = {"parent": process_memory(parent_pid)}
+    for index, pid in sorted(children.items()):
+        processes[f"worker-{index}"] = process_memory(pid)
+
+    alive = [m for m in processes.values() if m]
+    pss = [m["pss_mb"] for m in alive if m["pss_mb"] is not None]
+
+    return {
+        "processes": processes,
+        "total_rss_mb": round(sum(m["rss_mb"] for m in alive), 1),
+        # PSS splits shared pages between sharers, so it sums to real usage
+        "total_pss_mb": round(sum(pss), 1) if len(pss) == len(alive) else None
+    }
+
+
+def print_memory_report(report):
+    print("\n📊 Memory (MB)")
+    for name, memory in report["processes"].items():
+        if memory:
+            pss = f"{memory['pss_mb']:.1f}" if memory["pss_mb"] is not None else "n/a"
+            print(f"   {name:<10} RSS {memory['rss_mb']:>8.1f}  PSS {pss:>8}  "
+                  f"shared {memory['shared_mb']:>8.1f}  private {memory['private_mb']:>8.1f}")
+    total_pss = report["total_pss_mb"]
+    print(f"   {'total':<10} RSS {report['total_rss_mb']:>8.1f}  PSS "
+          f"{total_pss if total_pss is not None else 'n/a':>8}")
+
+
+class PreforkPool:
+    """Loads models in the parent and forks workers that share them"""
+
+    def __init__(self, worker_mode="feature_generator", workers=2, threads_per_worker=None, quantize=None,
+                 max_restarts=5):
+        self.worker_mode = worker_mode
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self.quantize = quantize
+        self.max_restarts = max_restarts
+        self.models = {}
+        self.children: Dict[int, int] = {}
+        self.started: Dict[int, float] = {}
+        self.crashes: Dict[int, int] = {}
+        self.restart_at: Dict[int, float] = {}
+        self._stopping = False
+
+    def load_models(self):
+        """Load the models once in the parent"""
+
+        from app import RobloxGameWorker
+
+        # One intra-op thread while loading; children pick their own budget
+        if TORCH_AVAILABLE:
+            torch.set_num_threads(1)
+
+        loader = RobloxGameWorker(self.worker_mode, quantize=self.quantize)
+        asyncio.run(loader.initialize_models())
+        self.models = loader.models
+
+        # Move everything allocated so far out of the collector's reach, so GC
+        # passes in the children never write to (and so copy) the shared pages
+        gc.collect()
+        gc.freeze()
+
+    def _child(self, index):
+        """Run one worker on its shard of the queue; never returns"""
+
+        from app import RobloxGameWorker
+
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        if TORCH_AVAILABLE:
+            torch.set_num_threads(self.threads_per_worker)
+
+        worker = RobloxGameWorker(self.worker_mode, quantize=self.quantize)
+        worker.models = self.models
+        worker.shard = (index, self.workers)
+
+        exit_code = 0
+        try:
+            asyncio.run(worker.worker_loop())
+        except Exception as e:
+            print(f"❌ worker-{index} crashed: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def spawn(self, index):
+        pid = os.fork()
+        if pid == 0:
+            self._child(index)
+        self.children[index] = pid
+        self.started[index] = time.monotonic()
+        print(f"   🍴 worker-{index} started (pid {pid}, {self.threads_per_worker} threads)")
+
+    def schedule_restart(self, index, status):
+        """Re-fork an exited worker after a backoff, unless it keeps crashing"""
+
+        if time.monotonic() - self.started[index] >= STABLE_SECONDS:
+            self.crashes[index] = 0
+        crashes = self.crashes[index] = self.crashes.get(index, 0) + 1
+
+        if crashes > self.max_restarts:
+            print(f"   ❌ worker-{index} exited ({status}) {crashes} times in a row, not restarting it")
+            return
+
+        delay = min(RESTART_BACKOFF * 2 ** (crashes - 1), MAX_RESTART_BACKOFF)
+        print(f"   ⚠️  worker-{index} exited ({status}), re-forking in {delay:g}s")
+        self.restart_at[index] = time.monotonic() + delay
+
+    def stop(self, *_):
+        self._stopping = True
+        for pid in self.children.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self, report_interval=60):
+        """Fork the workers, restart any that exit, and report memory periodically"""
+
+        self.load_models()
+        print(f"\n🚀 Forking {self.workers} workers ({self.worker_mode})")
+
+        for index in range(self.workers):
+            self.spawn(index)
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        next_report = time.monotonic() + min(report_interval, 10)
+
+        while self.children or (self.restart_at and not self._stopping):
+            pid = 0
+            if self.children:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+
+            if pid:
+                index = next(i for i, p in self.children.items() if p == pid)
+                del self.children[index]
+                if not self._stopping:
+                    self.schedule_restart(index, status)
+                continue
+
+            now = time.monotonic()
+            for index, when in list(self.restart_at.items()):
+                if now >= when and not self._stopping:
+                    del self.restart_at[index]
+                    self.spawn(index)
+
+            if report_interval and time.monotonic() >= next_report:
+                print_memory_report(memory_report(os.getpid(), self.children))
+                next_report = time.monotonic() + report_interval
+
+            time.sleep(0.5)
+
+        print("🛑 Worker pool stopped")
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Pre-forked RobloxGameWorker pool")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--mode", default="feature_generator",
+                        choices=["feature_generator", "bug_fixer", "optimizer", "content_creator"])
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per worker")
+    parser.add_argument("--quantize", action="store_true", help="Load int8 models")
+    parser.add_argument("--report-interval", type=int, default=60, help="Seconds between memory reports")
+    parser.add_argument("--max-restarts", type=int, default=5, help="Consecutive crashes before a worker is given up on")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        print("❌ Pre-fork mode needs os.fork (Linux or macOS)")
+        return 1
+
+    pool = PreforkPool(args.mode, args.workers, args.threads, args.quantize or None, args.max_restarts)
+    pool.run(args.report_interval)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
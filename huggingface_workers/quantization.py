@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Quantized CPU Inference
+
+Opt-in int8 dynamic quantization for the text-generation models. The quantized
+model is cached on disk, keyed by model name and torch/transformers versions,
+so it is only quantized once instead of at every start.
+
+Enable with HF_QUANTIZE=int8 (or quantize=True), then benchmark with:
+    python quantization.py --benchmark --model distilgpt2
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+from lazy_imports import LazyModule, module_available
+
+torch = LazyModule("torch")
+transformers = LazyModule("transformers")
+TRANSFORMERS_AVAILABLE = module_available("transformers", "torch")
+
+
+DEFAULT_CACHE_DIR = Path(os.getenv(
+    "QUANTIZED_MODEL_CACHE",
+    Path.home() / ".cache" / "roblox-game-ai" / "quantized"
+))
+
+# Fixed prompt set used by the model benchmarks
+BENCHMARK_PROMPTS = [
+    "-- Roblox Lua code:\n-- Create a function that doubles a number\nlocal function",
+    "-- Roblox Lua code:\n-- Add currency to a player and update leaderstats\nlocal function",
+    "-- Roblox Lua code:\n-- Spawn a Goblin object at a random position on the runway\nlocal function",
+    "-- Roblox Lua code:\n-- Save player data with UpdateAsync and retry three times\nlocal function",
+    "-- Roblox Lua code:\n-- Create a TextLabel that shows the current combo\nlocal function",
+    "-- Roblox Lua code:\n-- Multiply the object count when it passes through a gate\nlocal function",
+]
+
+
+def quantization_enabled(flag=None):
+    """Resolve the quantize flag, falling back to the HF_QUANTIZE environment variable"""
+
+    if flag is not None:
+        return bool(flag)
+    return os.getenv("HF_QUANTIZE", "").lower() in ("1", "true", "yes", "int8")
+
+
+def _replace_conv1d(module):
+    """Swap GPT-2 style Conv1D layers for nn.Linear so dynamic quantization applies"""
+
+    from transformers.pytorch_utils import Conv1D
+
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            # Conv1D stores weight as (in_features, out_features)
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(module, name, linear)
+        else:
+            _replace_conv1d(child)
+
+    return module
+
+
+def quantize_model(model):
+    """Apply int8 dynamic quantization to every linear layer"""
+
+    model = _replace_conv1d(model.eval())
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def cache_path(model_name, cache_dir=None):
+    """Location of the cached quantized model for this model and library versions"""
+
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+    key = f"{model_name}|torch={torch.__version__}|transformers={transformers.__version__}"
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    safe_name = model_name.replace("/", "--")
+    return cache_dir / f"{safe_name}-int8-{digest}.pt"
+
+
+def load_quantized_model(model_name, cache_dir=None):
+    """Load the int8 model from cache, quantizing and caching it on first use"""
+
+    path = cache_path(model_name, cache_dir)
+
+    if path.exists():
+        try:
+            return torch.load(path, weights_only=False)
+        except TypeError:
+            return torch.load(path)  # torch < 1.13 has no weights_only
+        except Exception as e:
+            print(f"   ⚠️  Ignoring unreadable quantized cache {path.name}: {e}")
+
+    print(f"   ⚙️  Quantizing {model_name} to int8 (cached for next start)...")
+
+    model = transformers.AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+    model = quantize_model(model)
+
+    # Write atomically so a killed process never leaves a truncated cache
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    torch.save(model, tmp_path)
+    os.replace(tmp_path, path)
+
+    return model
+
+
+def load_text_generation_pipeline(model_name, quantize=False, device=-1, cache_dir=None, backend="torch", **kwargs):
+    """Build a text-generation pipeline, optionally backed by the int8 or ONNX model"""
+
+    if backend == "onnx":
+        from onnx_backend import load_onnx_pipeline
+        return load_onnx_pipeline(model_name, **kwargs)
+
+    if not quantize:
+        return transformers.pipeline("text-generation", model=model_name, device=device, **kwargs)
+
+    # Dynamic quantization only runs on CPU
+    kwargs.pop("torch_dtype", None)
+    model = load_quantized_model(model_name, cache_dir)
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+
+    return transformers.pipeline("text-generation", model=model, tokenizer=tokenizer, device=-1, **kwargs)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_benchmark_mode(model_name, mode, max_new_tokens=48, cache_dir=None):
+    """Benchmark one precision mode in the current process"""
+
+    torch.manual_seed(0)
+    load_start = time.perf_counter()
+
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+    if mode == "int8":
+        model = load_quantized_model(model_name, cache_dir)
+    else:
+        model = transformers.AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32).eval()
+
+    load_seconds = time.perf_counter() - load_start
+
+    outputs = []
+    generated_tokens = 0
+    generate_seconds = 0.0
+    total_nll = 0.0
+    total_positions = 0
+
+    with torch.inference_mode():
+        for prompt in BENCHMARK_PROMPTS:
+            inputs = tokenizer(prompt, return_tensors="pt")
+
+            # Teacher-forced loss on the prompt measures quality drift
+            loss = model(**inputs, labels=inputs["input_ids"]).loss
+            positions = inputs["input_ids"].shape[1] - 1
+            total_nll += loss.item() * positions
+            total_positions += positions
+
+            start = time.perf_counter()
+            output = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id
+            )
+            generate_seconds += time.perf_counter() - start
+
+            new_tokens = output[0, inputs["input_ids"].shape[1]:].tolist()
+            generated_tokens += len(new_tokens)
+            outputs.append(new_tokens)
+
+    mean_nll = total_nll / max(total_positions, 1)
+
+    return {
+        "mode": mode,
+        "model": model_name,
+        "load_seconds": round(load_seconds, 2),
+        "tokens_per_second": round(generated_tokens / max(generate_seconds, 1e-9), 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "mean_nll": round(mean_nll, 4),
+        "perplexity": round(float(torch.exp(torch.tensor(mean_nll))), 3),
+        "outputs": outputs
+    }
+
+
+def _token_agreement(reference, candidate):
+    """Fraction of greedy tokens that match the float32 output position by position"""
+
+    matched = total = 0
+    for ref_tokens, cand_tokens in zip(reference, candidate):
+        total += len(ref_tokens)
+        matched += sum(1 for a, b in zip(ref_tokens, cand_tokens) if a == b)
+    return matched / max(total, 1)
+
+
+def benchmark(model_name, max_new_tokens=48, cache_dir=None):
+    """Compare float32 and int8 in separate processes so peak RSS is isolated"""
+
+    results = {}
+
+    for mode in ("float32", "int8"):
+        command = [
+            sys.executable, __file__,
+            "--benchmark-mode", mode,
+            "--model", model_name,
+            "--max-new-tokens", str(max_new_tokens),
+        ]
+        if cache_dir:
+            command += ["--cache-dir", str(cache_dir)]
+
+        completed = subprocess.run(command, capture_output=True, text=True, check=True)
+        results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    baseline, quantized = results["float32"], results["int8"]
+
+    return {
+        "model": model_name,
+        "prompts": len(BENCHMARK_PROMPTS),
+        "float32": {k: v for k, v in baseline.items() if k != "outputs"},
+        "int8": {k: v for k, v in quantized.items() if k != "outputs"},
+        "speedup": round(quantized["tokens_per_second"] / max(baseline["tokens_per_second"], 1e-9), 2),
+        "rss_saved_mb": round(baseline["peak_rss_mb"] - quantized["peak_rss_mb"], 1),
+        "perplexity_delta": round(quantized["perplexity"] - baseline["perplexity"], 3),
+        "greedy_token_agreement": round(_token_agreement(baseline["outputs"], quantized["outputs"]), 3)
+    }
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="int8 dynamic quantization for CPU inference")
+    parser.add_argument("--model", default="Salesforce/codegen-350M-mono")
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--max-new-tokens", type=int, default=48)
+    parser.add_argument("--quantize", action="store_true", help="Quantize and cache the model")
+    parser.add_argument("--benchmark", action="store_true", help="Compare float32 and int8")
+    parser.add_argument("--benchmark-mode", choices=["float32", "int8"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("❌ Requires transformers and torch: pip install transformers torch")
+        return 1
+
+    if args.benchmark_mode:
+        print(json.dumps(run_benchmark_mode(args.model, args.benchmark_mode, args.max_new_tokens, args.cache_dir)))
+        return 0
+
+    if args.benchmark:
+        report = benchmark(args.model, args.max_new_tokens, args.cache_dir)
+        print(json.dumps(report, indent=2))
+        return 0
+
+    if args.quantize:
+        load_quantized_model(args.model, args.cache_dir)
+        print(f"✅ Cached: {cache_path(args.model, args.cache_dir)}")
+        return 0
+
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Speculative Decoding
+
+A small draft model (distilgpt2) proposes several tokens and the main model
+(codegen) verifies them all in one forward pass. Drafts are accepted with
+probability min(1, p/q) and rejections resample from the residual
+max(0, p - q), so the output distribution is exactly that of the main model.
+
+Both models must share one token id space: the same vocabulary with the same
+ids, and the same number of output rows, so every id the main model emits is
+a valid draft input. Otherwise (codegen adds whitespace tokens above
+distilgpt2's 50257), and whenever sampling is requested, generation falls
+back to the wrapped pipeline automatically.
+
+Benchmark accepted tokens per step and end-to-end speedup with:
+    python speculative.py --benchmark
+"""
+
+import sys
+import json
+import time
+import argparse
+
+from lazy_imports import LazyModule, module_available
+
+torch = LazyModule("torch")
+transformers = LazyModule("transformers")
+TRANSFORMERS_AVAILABLE = module_available("transformers", "torch")
+
+
+def tokenizers_compatible(main_tokenizer, draft_tokenizer):
+    """Check that both tokenizers map the same tokens to the same ids"""
+
+    if main_tokenizer.eos_token_id != draft_tokenizer.eos_token_id:
+        return False, "different end-of-sequence tokens"
+
+    main_vocab = main_tokenizer.get_vocab()
+    draft_vocab = draft_tokenizer.get_vocab()
+    for token, index in draft_vocab.items():
+        if main_vocab.get(token) != index:
+            return False, f"token {token!r} has a different id"
+    missing = main_vocab.keys() - draft_vocab.keys()
+    if missing:
+        return False, f"{len(missing)} tokens such as {min(missing)!r} are missing from the draft vocabulary"
+
+    return True, None
+
+
+def models_compatible(main, draft):
+    """Check that every id one model can emit is a valid input to the other"""
+
+    compatible, reason = tokenizers_compatible(main.tokenizer, draft.tokenizer)
+    if not compatible:
+        return compatible, reason
+
+    # Output rows can exceed the tokenizer (codegen pads to 51200); those ids must exist in both
+    main_size, draft_size = main.model.config.vocab_size, draft.model.config.vocab_size
+    if main_size != draft_size:
+        return False, f"vocabulary sizes differ ({main_size} vs {draft_size})"
+
+    return True, None
+
+
+def _crop_cache(cache, length):
+    """Drop cached positions beyond length (DynamicCache or legacy tuples)"""
+
+    if hasattr(cache, "crop"):
+        cache.crop(length)
+        return cache
+    return tuple(tuple(t[:, :, :length, :] for t in layer) for layer in cache)
+
+
+class SpeculativeGenerator:
+    """Text-generation callable that drafts with a small model and verifies with the main one"""
+
+    def __init__(self, generator, draft_generator, num_draft_tokens=4):
+        self.generator = generator
+        self.model = generator.model
+        self.tokenizer = generator.tokenizer
+        self.draft_model = draft_generator.model
+        self.num_draft_tokens = num_draft_tokens
+
+        self.compatible, self.incompatible_reason = models_compatible(generator, draft_generator)
+        self.stats = {"steps": 0, "drafted": 0, "accepted": 0, "generated": 0, "fallbacks": 0}
+
+    def __call__(self, prompt, prefix="", max_length=None, max_new_tokens=None,
+                 num_return_sequences=1, temperature=1.0, do_sample=False, **kwargs):
+        """Generate like a pipeline; unsupported options use the wrapped pipeline"""
+
+        # Sampling goes through generate()'s top-k/top-p warpers, which the loop does not apply
+        if not self.compatible or do_sample or kwargs:
+            self.stats["fallbacks"] += 1
+            options = {
+                "max_length": max_length,
+                "max_new_tokens": max_new_tokens,
+                "temperature": temperature,
+                "do_sample": do_sample,
+                "prefix": prefix,
+            }
+            options = {key: value for key, value in options.items() if value not in (None, "")}
+            return self.generator(prompt, num_return_sequences=num_return_sequences, **options, **kwargs)
+
+        input_ids = self.tokenizer(prefix + prompt, return_tensors="pt").input_ids.to(self.model.device)
+        prompt_length = input_ids.shape[1]
+
+        if max_new_tokens is None:
+            max_new_tokens = max((max_length or 50) - input_ids.shape[1], 1)
+
+        results = []
+        for _ in range(num_return_sequences):
+            output = self.generate_ids(input_ids, max_new_tokens)
+            continuation = self.tokenizer.decode(output[0, prompt_length:], skip_special_tokens=True)
+            results.append({"generated_text": prompt + continuation})
+
+        return results
+
+    def generate_ids(self, input_ids, max_new_tokens, temperature=0.0):
+        """Speculative decoding loop; temperature 0 means greedy, otherwise the untruncated softmax is sampled"""
+
+        with torch.inference_mode():
+            return self._generate_ids(input_ids, max_new_tokens, temperature)
+
+    def _generate_ids(self, input_ids, max_new_tokens, temperature):
+        """Draft k tokens, verify them in one main-model pass, keep the accepted prefix"""
+
+        eos = self.tokenizer.eos_token_id
+        prompt_length = input_ids.shape[1]
+        ids = input_ids
+        main_cache = draft_cache = None
+        main_length = draft_length = 0
+
+        while ids.shape[1] - prompt_length < max_new_tokens:
+            remaining = max_new_tokens - (ids.shape[1] - prompt_length)
+            # Each step adds up to k drafts plus one token from the main model
+            k = min(self.num_draft_tokens, remaining - 1)
+
+            # Draft k tokens autoregressively with the small model
+            draft_tokens, draft_probs = [], []
+            draft_input = ids[:, draft_length:]
+            for _ in range(k):
+                output = self.draft_model(draft_input, past_key_values=draft_cache, use_cache=True)
+                draft_cache = output.past_key_values
+                draft_length += draft_input.shape[1]
+
+                q = self._probabilities(output.logits[0, -1], temperature)
+                token = self._choose(q, temperature)
+                draft_tokens.append(token)
+                draft_probs.append(q)
+                draft_input = ids.new_tensor([[token]])
+
+            # Verify all drafts with a single forward pass of the main model
+            candidate = torch.cat([ids, ids.new_tensor([draft_tokens])], dim=-1) if draft_tokens else ids
+            output = self.model(candidate[:, main_length:], past_key_values=main_cache, use_cache=True)
+            main_cache = output.past_key_values
+            main_length = candidate.shape[1]
+            logits = output.logits[0, -(k + 1):]
+
+            accepted = 0
+            next_token = None
+            for i, token in enumerate(draft_tokens):
+                p = self._probabilities(logits[i], temperature)
+                q = draft_probs[i]
+
+                if temperature == 0:
+                    keep = int(torch.argmax(p)) == token
+                else:
+                    keep = torch.rand(()).item() < min(1.0, (p[token] / q[token]).item())
+
+                if keep:
+                    accepted += 1
+                    continue
+
+                next_token = self._resample(p, q, temperature)
+                break
+
+            if next_token is None:
+                next_token = self._choose(self._probabilities(logits[k], temperature), temperature)
+
+            new_tokens = draft_tokens[:accepted] + [next_token]
+            ids = torch.cat([ids, ids.new_tensor([new_tokens])], dim=-1)
+
+            # Roll caches back to the accepted sequence (the newest token is not fed yet)
+            keep_length = ids.shape[1] - 1
+            main_cache = _crop_cache(main_cache, keep_length)
+            main_length = keep_length
+            if draft_cache is not None and draft_length > keep_length:
+                draft_cache = _crop_cache(draft_cache, keep_length)
+                draft_length = keep_length
+
+            self.stats["steps"] += 1
+            self.stats["drafted"] += k
+            self.stats["accepted"] += accepted
+            self.stats["generated"] += len(new_tokens)
+
+            if eos is not None and eos in new_tokens:
+                end = ids.shape[1] - len(new_tokens) + new_tokens.index(eos) + 1
+                return ids[:, :end]
+
+        return ids[:, :prompt_length + max_new_tokens]
+
+    def _probabilities(self, logits, temperature):
+        logits = logits.float()
+        if temperature > 0:
+            logits = logits / temperature
+        return torch.softmax(logits, dim=-1)
+
+    @staticmethod
+    def _choose(probabilities, temperature):
+        if temperature == 0:
+            return int(torch.argmax(probabilities))
+        return int(torch.multinomial(probabilities, 1))
+
+    def _resample(self, p, q, temperature):
+        """Sample from the residual distribution max(0, p - q) after a rejection"""
+
+        if temperature == 0:
+            return int(torch.argmax(p))
+
+        residual = torch.clamp(p - q, min=0)
+        total = residual.sum()
+        if total <= 0:
+            return self._choose(p, temperature)
+        return self._choose(residual / total, temperature)
+
+    def acceptance(self):
+        """Accepted draft tokens and tokens produced per main-model forward pass"""
+
+        steps = max(self.stats["steps"], 1)
+        return {
+            **self.stats,
+            "accepted_per_step": round(self.stats["accepted"] / steps, 3),
+            "tokens_per_step": round(self.stats["generated"] / steps, 3),
+            "acceptance_rate": round(self.stats["accepted"] / max(self.stats["drafted"], 1), 3)
+        }
+
+
+def benchmark(main_model, draft_model, max_new_tokens=64, num_draft_tokens=4):
+    """Compare plain greedy decoding with speculative decoding on the Lua prompt set"""
+
+    from quantization import BENCHMARK_PROMPTS
+
+    main = transformers.pipeline("text-generation", model=main_model, device=-1)
+    draft = transformers.pipeline("text-generation", model=draft_model, device=-1)
+    speculative = SpeculativeGenerator(main, draft, num_draft_tokens)
+
+    if not speculative.compatible:
+        return {"compatible": False, "reason": speculative.incompatible_reason}
+
+    plain_seconds = speculative_seconds = 0.0
+    matches = 0
+
+    for prompt in BENCHMARK_PROMPTS:
+        input_ids = main.tokenizer(prompt, return_tensors="pt").input_ids
+
+        start = time.perf_counter()
+        with torch.inference_mode():
+            plain = main.model.generate(
+                input_ids,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=main.tokenizer.eos_token_id
+            )
+        plain_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        drafted = speculative.generate_ids(input_ids, max_new_tokens, temperature=0.0)
+        speculative_seconds += time.perf_counter() - start
+
+        # Greedy speculative decoding must reproduce plain greedy output
+        matches += int(plain[0].tolist() == drafted[0].tolist())
+
+    return {
+        "compatible": True,
+        "main_model": main_model,
+        "draft_model": draft_model,
+        "prompts": len(BENCHMARK_PROMPTS),
+        "num_draft_tokens": num_draft_tokens,
+        "plain_seconds": round(plain_seconds, 2),
+        "speculative_seconds": round(speculative_seconds, 2),
+        "speedup": round(plain_seconds / max(speculative_seconds, 1e-9), 2),
+        "greedy_outputs_identical": f"{matches}/{len(BENCHMARK_PROMPTS)}",
+        **speculative.acceptance()
+    }
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Speculative decoding with a draft model")
+    parser.add_argument("--model", default="Salesforce/codegen-350M-mono")
+    parser.add_argument("--draft-model", default="distilgpt2")
+    parser.add_argument("--draft-tokens", type=int, default=4)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("❌ Requires transformers and torch: pip install transformers torch")
+        return 1
+
+    if args.benchmark:
+        report = benchmark(args.model, args.draft_model, args.max_new_tokens, args.draft_tokens)
+        print(json.dumps(report, indent=2))
+        return 0
+
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Token Cache
+
+Token ids for Lua files and function chunks, stored once per tokenizer and
+content hash. Each tokenizer (name, class, vocabulary size and transformers
+version) gets its own directory holding one append-only array of token ids
+(uint16 when the vocabulary fits, else uint32) and a JSON index of
+sha1 -> (offset, length). The array is memory-mapped, so repeated embedding,
+prompting or training jobs slice ids for unchanged code instead of running the
+tokenizer again, and concurrent processes share the pages.
+
+Keys are the sha1 of the UTF-8 text, the same hash the Lua corpus and the code
+index already store, so callers that have it skip hashing too. Ids never
+include special tokens; callers add them for their model.
+
+    python token_cache.py --tokenizer microsoft/codebert-base --src ../src
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from lazy_imports import LazyModule, module_available
+
+np = LazyModule("numpy")
+transformers = LazyModule("transformers")
+NUMPY_AVAILABLE = module_available("numpy")
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+CACHE_VERSION = 1
+
+
+def default_cache_path(game_path=None) -> Path:
+    """TOKEN_CACHE, else <game>/.token_cache, else .token_cache beside the worker's parent"""
+
+    if os.getenv("TOKEN_CACHE"):
+        return Path(os.environ["TOKEN_CACHE"])
+    if game_path is not None:
+        return Path(game_path) / ".token_cache"
+    return Path(__file__).resolve().parent.parent / ".token_cache"
+
+
+def content_hash(text) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def tokenizer_key(tokenizer) -> str:
+    """Directory name identifying a tokenizer's vocabulary and version"""
+
+    name = getattr(tokenizer, "name_or_path", "") or type(tokenizer).__name__
+    version = getattr(transformers, "__version__", "") if module_available("transformers") else ""
+    identity = f"{name}|{type(tokenizer).__name__}|{len(tokenizer)}|{version}"
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")[-48:] or "tokenizer"
+    return f"{slug}-{hashlib.sha1(identity.encode()).hexdigest()[:10]}"
+
+
+class TokenCache:
+    """Memory-mapped token ids per content hash for one tokenizer"""
+
+    def __init__(self, root, tokenizer, batch_size=64):
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.key = tokenizer_key(tokenizer)
+        self.cache_dir = Path(root) / self.key
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.dtype = "uint16" if len(tokenizer) <= 65536 else "uint32"
+
+        self.entries: Dict[str, Tuple[int, int]] = {}
+        self.pending: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self._tokens = None
+        self._end = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def index_path(self):
+        return self.cache_dir / "index.json"
+
+    @property
+    def tokens_path(self):
+        return self.cache_dir / "tokens.bin"
+
+    def _load(self):
+        try:
+            index = json.loads(self.index_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            index = {}
+
+        if index.get("version") == CACHE_VERSION and index.get("dtype") == self.dtype:
+            self.entries = {digest: tuple(span) for digest, span in index["entries"].items()}
+        else:
+            self.entries = {}
+
+        end = self._end = max((offset + length for offset, length in self.entries.values()), default=0)
+
+        # np.memmap cannot map an empty file
+        if end:
+            self._tokens = np.memmap(self.tokens_path, dtype=self.dtype, mode="r", shape=(end,))
+        else:
+            self._tokens = np.zeros(0, dtype=self.dtype)
+
+    def encode(self, text, digest=None):
+        """Token ids for text (read-only)"""
+
+        return self.encode_many([text], [digest] if digest else None)[0]
+
+    def encode_many(self, texts: List[str], digests: Optional[List[str]] = None) -> list:
+        """Token ids for each text; misses are tokenized together in batches"""
+
+        digests = digests or [content_hash(text) for text in texts]
+        results = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, digest in enumerate(digests):
+                ids = self._lookup(digest)
+                if ids is None:
+                    missing.setdefault(digest, []).append(i)
+                else:
+                    results[i] = ids
+            self.hits += len(texts) - sum(len(rows) for rows in missing.values())
+
+        if missing:
+            order = list(missing)
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                encoded = self.tokenizer(
+                    [texts[missing[digest][0]] for digest in batch], add_special_tokens=False
+                )["input_ids"]
+
+                with self._lock:
+                    for digest, ids in zip(batch, encoded):
+                        array = np.asarray(ids, dtype=self.dtype)
+                        array.flags.writeable = False
+                        self.pending[digest] = array
+                        for i in missing[digest]:
+                            results[i] = array
+                    self.misses += len(batch)
+
+        return results
+
+    def _lookup(self, digest):
+        if digest in self.pending:
+            return self.pending[digest]
+        span = self.entries.get(digest)
+        if span is None:
+            return None
+        offset, length = span
+        return self._tokens[offset:offset + length]
+
+    def count(self, text) -> int:
+        """Token count for text, for prompt budgets"""
+
+        return len(self.encode(text))
+
+    def encode_corpus(self, corpus, functions=False) -> Dict[str, Any]:
+        """Token ids for every file in a LuaCorpus (and, optionally, its named functions)"""
+
+        from lua_syntax import find_functions, LuaSyntaxError
+
+        corpus.refresh()
+        paths = corpus.paths()
+        texts = [corpus.read(relative) for relative in paths]
+        encoded = dict(zip(paths, self.encode_many(texts, [corpus.entry(p)["hash"] for p in paths])))
+
+        if functions:
+            chunks = []
+            for relative, text in zip(paths, texts):
+                try:
+                    chunks.extend((f"{relative}:{f.name}", f.code) for f in find_functions(text))
+                except LuaSyntaxError:
+                    continue
+            encoded.update(zip((name for name, _ in chunks), self.encode_many([code for _, code in chunks])))
+
+        self.flush()
+        return encoded
+
+    def flush(self) -> int:
+        """Append pending ids to the shared array; returns how many entries were written"""
+
+        with self._lock:
+            if not self.pending:
+                return 0
+
+            with _FileLock(self.cache_dir / "lock"):
+                # Other processes may have appended since we loaded
+                self._load()
+                new = {d: ids for d, ids in self.pending.items() if d not in self.entries}
+
+                with open(self.tokens_path, "ab") as f:
+                    # Drop anything a crashed writer appended without indexing
+                    f.truncate(self._end * np.dtype(self.dtype).itemsize)
+                    offset = self._end
+                    for digest, ids in new.items():
+                        f.write(ids.tobytes())
+                        self.entries[digest] = (offset, len(ids))
+                        offset += len(ids)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                index = {
+                    "version": CACHE_VERSION,
+                    "dtype": self.dtype,
+                    "tokenizer": getattr(self.tokenizer, "name_or_path", ""),
+                    "entries": self.entries
+                }
+                tmp_path = self.index_path.with_suffix(f".tmp{os.getpid()}")
+                tmp_path.write_text(json.dumps(index))
+                os.replace(tmp_path, self.index_path)
+
+                self.pending = {}
+                self._load()
+
+            return len(new)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokenizer": self.key,
+            "entries": len(self.entries),
+            "pending": len(self.pending),
+            "tokens": int(len(self._tokens)),
+            "dtype": self.dtype,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+class _FileLock:
+    """Exclusive lock on a file so processes do not interleave appends"""
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+
+    def __enter__(self):
+        if FCNTL_AVAILABLE:
+            self.handle = open(self.path, "a")
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.handle:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Pre-tokenize the game's Lua sources for a tokenizer")
+    parser.add_argument("--tokenizer", default="Salesforce/codegen-350M-mono", help="HuggingFace tokenizer name")
+    parser.add_argument("--src", default=str(Path(__file__).resolve().parent.parent / "src"), help="Game src/ directory")
+    parser.add_argument("--cache", default=None, help="Cache directory (default: TOKEN_CACHE or ./.token_cache)")
+    parser.add_argument("--no-functions", action="store_true", help="Cache whole files only")
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE or not module_available("transformers"):
+        print("❌ Requires numpy and transformers: pip install numpy transformers")
+        return 1
+
+    # The corpus packer and Lua scanner are root-level tools
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from lua_corpus import LuaCorpus
+
+    tokenizer = transformers.AutoTokenizer.from_pretrained(args.tokenizer)
+    cache = TokenCache(args.cache or default_cache_path(Path(args.src).resolve().parent), tokenizer)
+
+    start = time.perf_counter()
+    encoded = cache.encode_corpus(LuaCorpus(args.src), functions=not args.no_functions)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    stats = cache.stats()
+    tokens = sum(len(ids) for ids in encoded.values())
+    print(f"🔤 {len(encoded)} files and functions, {tokens} tokens in {elapsed:.1f} ms "
+          f"({stats['misses']} tokenized, {stats['hits']} cached)")
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
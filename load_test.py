@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Orchestration Load Test
+
+Drives AutonomousGameDeveloper with the stub model backends: synthetic tasks
+go through dedup, the scheduler and concurrent develop_feature calls, and the
+run reports throughput, per-task latency percentiles and failure counts. No
+network, API keys or model weights are needed.
+
+    python load_test.py --tasks 2000 --concurrency 64 --latency-ms 10
+"""
+
+import io
+import sys
+import time
+import json
+import asyncio
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+from autonomous_game_dev import AutonomousGameDeveloper
+from provider_gateway import ProviderGateways
+
+sys.path.insert(0, str(Path(__file__).parent / "huggingface_workers"))
+
+from stub_backends import stub_backends
+
+
+TASK_TEMPLATES = [
+    {"type": "error_handling", "severity": "medium", "description": "No error handling found"},
+    {"type": "performance", "priority": "low", "description": "Using wait() - could use task.wait()"},
+    {"type": "refactor", "priority": "medium", "description": "Complex conditional logic"},
+    {"type": "code_smell", "severity": "medium", "description": "Function #1 is too long (120 lines)",
+     "suggestion": "Consider breaking into smaller functions"},
+]
+
+
+def synthetic_tasks(count, duplicate_rate=0.3):
+    """Analyzer-shaped tasks, one of each kind per file, with a share of exact repeats"""
+
+    tasks = []
+    for i in range(count):
+        if tasks and (i * 7919) % 100 < duplicate_rate * 100:
+            tasks.append(dict(tasks[-1]))
+            continue
+        template = TASK_TEMPLATES[i % len(TASK_TEMPLATES)]
+        tasks.append({**template, "file": f"Service{i // len(TASK_TEMPLATES)}.lua"})
+    return tasks
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def run_load_test(tasks=1000, concurrency=32, latency_ms=10.0, failure_rate=0.02,
+                        output_lines=12, num_candidates=2, seed=0):
+    """Run synthetic tasks through the orchestration and measure it"""
+
+    backends = stub_backends(
+        latency_ms=latency_ms, failure_rate=failure_rate, output_lines=output_lines, seed=seed
+    )
+
+    # Stubs have no rate limits; let the AIMD limits grow up to the test's concurrency
+    gateways = ProviderGateways({
+        name: {"timeout": 30.0, "initial_limit": concurrency, "max_limit": concurrency}
+        for name in ("autocoder", "huggingface", "llm")
+    })
+
+    with tempfile.TemporaryDirectory() as workdir:
+        game_path = Path(workdir)
+        (game_path / "src").symlink_to(Path(__file__).parent / "src")
+
+        quiet = io.StringIO()
+        with contextlib.redirect_stdout(quiet):
+            developer = AutonomousGameDeveloper(
+                game_path, num_candidates=num_candidates, backends=backends, gateways=gateways
+            )
+
+        findings = synthetic_tasks(tasks)
+
+        start = time.perf_counter()
+        unique = developer.deduplicator.collapse(findings)
+        dedup_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scheduled = developer._prioritize_tasks(unique)
+        schedule_seconds = time.perf_counter() - start
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def develop(task):
+            async with semaphore:
+                return await developer.develop_feature(developer._task_to_feature_request(task), task)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(quiet):
+            results = await asyncio.gather(*(develop(task) for task in scheduled))
+        wall_seconds = time.perf_counter() - start
+
+        developer.dev_log.close()
+        developer.artifacts.close()
+
+    durations = [r["duration"] for r in results]
+
+    return {
+        "findings": len(findings),
+        "unique_tasks": len(unique),
+        "developed": len(results),
+        "succeeded": sum(1 for r in results if r["success"]),
+        "errors": sum(1 for r in results if r.get("error")),
+        "concurrency": concurrency,
+        "wall_seconds": round(wall_seconds, 2),
+        "tasks_per_minute": round(len(results) / max(wall_seconds, 1e-9) * 60),
+        "task_latency_ms": {
+            "p50": round(percentile(durations, 0.5) * 1000, 1),
+            "p95": round(percentile(durations, 0.95) * 1000, 1),
+            "p99": round(percentile(durations, 0.99) * 1000, 1)
+        },
+        "dedup_ms": round(dedup_seconds * 1000, 1),
+        "schedule_ms": round(schedule_seconds * 1000, 1),
+        "backends": {name: backend.stats() for name, backend in backends.items()},
+        "gateways": gateways.snapshot()
+    }
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Load-test the orchestration with stub backends")
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--output-lines", type=int, default=12)
+    parser.add_argument("--candidates", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"🧪 Load testing with {args.tasks} tasks, concurrency {args.concurrency}...")
+
+    report = asyncio.run(run_load_test(
+        tasks=args.tasks,
+        concurrency=args.concurrency,
+        latency_ms=args.latency_ms,
+        failure_rate=args.failure_rate,
+        output_lines=args.output_lines,
+        num_candidates=args.candidates,
+        seed=args.seed
+    ))
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
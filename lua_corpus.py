@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Packed Lua Corpus
+
+Every Lua file under src/ is stored once in a single packfile with a JSON
+index of path -> (offset, length, sha1, mtime, size). The pack is
+memory-mapped read-only, so the analyzer, trainer and code index slice file
+contents out of shared page cache instead of each walking and reading src/.
+
+Refreshing stats every file and only reads the ones whose mtime or size
+changed; changed content is appended to the pack and the index is swapped
+atomically, so processes holding the previous mapping keep a consistent view.
+When more than half the pack is superseded content it is rewritten under a
+new generation name.
+
+    python lua_corpus.py --stats
+    python lua_corpus.py ServerScriptService/CurrencyService.lua
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+CORPUS_VERSION = 1
+
+# Rewrite the pack once superseded content outweighs live content
+COMPACT_RATIO = 0.5
+
+
+class LuaCorpus:
+    """Memory-mapped packfile of the game's Lua sources"""
+
+    def __init__(self, src_path, corpus_dir=None, pattern="*.lua"):
+        self.src_path = Path(src_path)
+        self.corpus_dir = Path(corpus_dir or self.src_path.parent / ".lua_corpus")
+        self.pattern = pattern
+
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.generation = 0
+        self.dead_bytes = 0
+        self._pack = None
+        self._pack_name = None
+        self._loaded = False
+
+    @property
+    def index_path(self):
+        return self.corpus_dir / "index.json"
+
+    def _pack_path(self, generation) -> Path:
+        return self.corpus_dir / f"corpus-{generation:06d}.pack"
+
+    def load(self):
+        """Open the stored index and map its pack; returns False if there is none"""
+
+        self._loaded = True
+
+        try:
+            index = json.loads(self.index_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return False
+
+        if index.get("version") != CORPUS_VERSION:
+            return False
+
+        self.entries = index["entries"]
+        self.generation = index["generation"]
+        self.dead_bytes = index["dead_bytes"]
+        self._map()
+        return True
+
+    def _map(self):
+        """(Re)map the current generation's pack"""
+
+        self._unmap()
+        path = self._pack_path(self.generation)
+        self._pack_name = path.name
+
+        # mmap cannot map an empty file
+        if not path.exists() or path.stat().st_size == 0:
+            self._pack = b""
+            return
+
+        with open(path, "rb") as f:
+            self._pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _unmap(self):
+        if isinstance(self._pack, mmap.mmap):
+            try:
+                self._pack.close()
+            except BufferError:
+                # Callers still hold views; the mapping goes away with them
+                pass
+        self._pack = b""
+
+    def refresh(self, rebuild=False) -> int:
+        """Bring the pack up to date with src/; returns the number of files (re)packed"""
+
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+
+        with self._locked():
+            # Another process may have refreshed since we last loaded
+            self.load()
+
+            entries = {}
+            appended: List[Tuple[str, bytes]] = []
+            changed = rebuild
+
+            for lua_file in sorted(self.src_path.rglob(self.pattern)):
+                relative = lua_file.relative_to(self.src_path).as_posix()
+                stat = lua_file.stat()
+                previous = None if rebuild else self.entries.get(relative)
+
+                if previous and previous["mtime"] == stat.st_mtime_ns and previous["size"] == stat.st_size:
+                    entries[relative] = previous
+                    continue
+
+                data = lua_file.read_bytes()
+                digest = hashlib.sha1(data).hexdigest()
+                changed = True
+
+                # Touched but identical: keep the packed copy
+                if previous and previous["hash"] == digest:
+                    entries[relative] = {**previous, "mtime": stat.st_mtime_ns, "size": stat.st_size}
+                    continue
+
+                entries[relative] = {"hash": digest, "mtime": stat.st_mtime_ns, "size": stat.st_size}
+                appended.append((relative, data))
+
+            removed = set(self.entries) - set(entries) if not rebuild else set()
+            if not changed and not removed:
+                return 0
+
+            dead = self.dead_bytes + sum(
+                self.entries[path]["length"] for path in self.entries
+                if path in removed or (path in entries and "offset" not in entries[path])
+            )
+            live = sum(entry["length"] for entry in entries.values() if "offset" in entry)
+
+            if rebuild or dead > COMPACT_RATIO * (live + dead + sum(len(data) for _, data in appended)):
+                self._compact(entries, appended)
+            else:
+                self._append(entries, appended, dead)
+
+            return len(appended)
+
+    def _append(self, entries, appended, dead):
+        """Append new content to the current pack, then publish the index"""
+
+        path = self._pack_path(self.generation)
+        with open(path, "ab") as f:
+            offset = f.tell()
+            for relative, data in appended:
+                entries[relative].update(offset=offset, length=len(data))
+                f.write(data)
+                offset += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._publish(entries, self.generation, dead)
+
+    def _compact(self, entries, appended):
+        """Write live content into a new generation's pack and drop the old one"""
+
+        generation = self.generation + 1
+        path = self._pack_path(generation)
+        new_content = dict(appended)
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+
+        with open(tmp_path, "wb") as f:
+            offset = 0
+            for relative in sorted(entries):
+                data = new_content[relative] if relative in new_content else bytes(self.view(relative))
+                entries[relative] = {**entries[relative], "offset": offset, "length": len(data)}
+                f.write(data)
+                offset += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        old_path = self._pack_path(self.generation)
+        self._publish(entries, generation, 0)
+
+        # Readers that mapped the old pack keep it until they unmap
+        if old_path != path and old_path.exists():
+            old_path.unlink()
+
+    def _publish(self, entries, generation, dead_bytes):
+        index = {
+            "version": CORPUS_VERSION,
+            "generation": generation,
+            "dead_bytes": dead_bytes,
+            "entries": entries
+        }
+        tmp_path = self.index_path.with_suffix(f".tmp{os.getpid()}")
+        tmp_path.write_text(json.dumps(index))
+        os.replace(tmp_path, self.index_path)
+
+        self.entries, self.generation, self.dead_bytes = entries, generation, dead_bytes
+        self._map()
+
+    def _locked(self):
+        return _PackLock(self.corpus_dir / "lock")
+
+    def paths(self) -> List[str]:
+        """Packed paths relative to src/, sorted"""
+
+        if not self._loaded:
+            self.refresh()
+        return sorted(self.entries)
+
+    def entry(self, relative) -> Dict[str, Any]:
+        if not self._loaded:
+            self.refresh()
+        return self.entries[relative]
+
+    def view(self, relative) -> memoryview:
+        """Zero-copy bytes of one file"""
+
+        entry = self.entry(relative)
+        end = entry["offset"] + entry["length"]
+
+        # The pack grew (or was compacted) after we mapped it
+        if len(self._pack) < end or self._pack_name != self._pack_path(self.generation).name:
+            self._map()
+
+        # Another process compacted our generation away; follow the index to the new pack
+        if len(self._pack) < end:
+            self.load()
+            entry = self.entry(relative)
+            end = entry["offset"] + entry["length"]
+
+        return memoryview(self._pack)[entry["offset"]:end]
+
+    def read(self, relative) -> str:
+        return str(self.view(relative), "utf-8")
+
+    def texts(self) -> Iterator[Tuple[str, str]]:
+        """(relative path, source) for every packed file"""
+
+        for relative in self.paths():
+            yield relative, self.read(relative)
+
+    def __len__(self):
+        return len(self.paths())
+
+    def __contains__(self, relative):
+        return relative in self.entries
+
+    def stats(self) -> Dict[str, Any]:
+        live = sum(entry["length"] for entry in self.entries.values())
+        return {
+            "files": len(self.entries),
+            "live_bytes": live,
+            "dead_bytes": self.dead_bytes,
+            "generation": self.generation,
+            "corpus_dir": str(self.corpus_dir)
+        }
+
+    def close(self):
+        self._unmap()
+
+
+class _PackLock:
+    """Exclusive lock so concurrent refreshes do not interleave appends"""
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+
+    def __enter__(self):
+        if FCNTL_AVAILABLE:
+            self.handle = open(self.path, "a")
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.handle:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+
+
+def open_corpus(src_path, corpus_dir=None) -> LuaCorpus:
+    """LuaCorpus for src_path, refreshed against the tree"""
+
+    corpus = LuaCorpus(src_path, corpus_dir)
+    corpus.refresh()
+    return corpus
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Pack the game's Lua sources into a memory-mapped corpus")
+    parser.add_argument("path", nargs="?", help="Print this file (relative to src/) from the pack")
+    parser.add_argument("--src", default=str(Path(__file__).parent / "src"), help="Game src/ directory")
+    parser.add_argument("--rebuild", action="store_true", help="Repack everything")
+    parser.add_argument("--stats", action="store_true", help="Print pack statistics")
+    args = parser.parse_args()
+
+    corpus = LuaCorpus(args.src)
+
+    start = time.perf_counter()
+    packed = corpus.refresh(rebuild=args.rebuild)
+    stats = corpus.stats()
+    print(f"📦 {stats['files']} files, {stats['live_bytes'] / 1024:.1f} KB "
+          f"({packed} packed, {(time.perf_counter() - start) * 1000:.1f} ms)")
+
+    if args.stats:
+        print(json.dumps(stats, indent=2))
+
+    if args.path:
+        if args.path not in corpus:
+            print(f"❌ Not in corpus: {args.path}")
+            return 1
+        print(corpus.read(args.path))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
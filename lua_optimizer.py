@@ -0,0 +1,844 @@
+#!/usr/bin/env python3
+"""
+Lua Source Optimizer
+
+Source-to-source optimizer for generated and hand-written Luau scripts. It works
+on the token stream and block structure from lua_syntax, so every rewrite is an
+in-place edit that keeps comments and formatting intact:
+
+- rewrites deprecated wait()/spawn()/delay() to the task library
+- folds constant arithmetic (2 * 30 -> 60)
+- hoists loop-invariant Config.* lookups out of loops
+- caches hot globals such as math.floor and Vector3.new in locals
+
+Each pass only fires when it cannot change behaviour, and the result is
+re-parsed before it is accepted. Runs as a pipeline stage on accepted
+implementations and optionally over the whole src/ tree.
+"""
+
+import sys
+import math
+import difflib
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from lua_syntax import (
+    tokenize,
+    parse_blocks,
+    declared_names,
+    check_syntax,
+    starts_expression,
+    LuaSyntaxError,
+    BINARY_PRECEDENCE,
+    UNARY_PRECEDENCE,
+    RIGHT_ASSOCIATIVE,
+    ASSIGNMENT_OPERATORS,
+)
+
+
+# Deprecated globals and their task library replacements.
+# spawn() resumes on the next resumption cycle, which task.defer matches.
+DEPRECATED_CALLS = {
+    "wait": "task.wait",
+    "spawn": "task.defer",
+    "delay": "task.delay",
+}
+
+# wait() returns (elapsed, time) but task.wait only the elapsed time, so calls
+# whose results are spread into a list (local a, b = wait()) are left alone
+SINGLE_RESULT_REPLACEMENTS = {"wait"}
+
+# Iteration builtins read the table they are given without changing it
+ITERATION_CALLS = {"pairs", "ipairs", "next"}
+
+# Globals worth caching in a local when used often or inside loops
+HOT_GLOBALS = {
+    "math": {"floor", "ceil", "max", "min", "abs", "sqrt", "random", "clamp", "sin", "cos"},
+    "string": {"format", "sub", "rep", "lower", "upper"},
+    "table": {"insert", "remove", "sort", "concat", "find"},
+    "Vector3": {"new"},
+    "Vector2": {"new"},
+    "CFrame": {"new", "Angles", "lookAt"},
+    "Color3": {"new", "fromRGB", "fromHSV"},
+    "UDim2": {"new", "fromScale", "fromOffset"},
+    "TweenInfo": {"new"},
+    "Instance": {"new"},
+}
+
+FOLDABLE_OPERATORS = {"+", "-", "*", "/", "%", "^"}
+EXPRESSION_END_KEYWORDS = {"then", "do", "end", "else", "elseif", "until"}
+EXPRESSION_END_OPS = {")", "]", "}", ",", ";"}
+
+DEFAULT_PASSES = ("deprecated", "fold", "hoist", "cache_globals")
+
+
+class Edit:
+    """Replace code[start:end] with text"""
+
+    __slots__ = ("start", "end", "text")
+
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+
+def apply_edits(code, edits):
+    """Apply non-overlapping edits to source"""
+
+    result = []
+    position = 0
+    for edit in sorted(edits, key=lambda e: (e.start, e.end)):
+        if edit.start < position:
+            raise ValueError("Overlapping edits")
+        result.append(code[position:edit.start])
+        result.append(edit.text)
+        position = edit.end
+    result.append(code[position:])
+    return "".join(result)
+
+
+def lower_camel(*parts):
+    """Join name parts as lowerCamelCase"""
+
+    joined = "".join(part[:1].upper() + part[1:] for part in parts if part)
+    return joined[:1].lower() + joined[1:]
+
+
+class ConfigSchema:
+    """Key paths defined in ReplicatedStorage/Config.lua"""
+
+    def __init__(self, paths=None):
+        self.paths: Set[Tuple[str, ...]] = set(paths or ())
+
+    @classmethod
+    def from_file(cls, config_file):
+        """Collect Config.X.Y key paths from the table constructors in Config.lua"""
+
+        tokens = tokenize(Path(config_file).read_text())
+        paths = set()
+        stack: List[Optional[Tuple[str, ...]]] = []
+
+        for index, token in enumerate(tokens):
+            if token.is_op("{"):
+                stack.append(cls._key_before(tokens, index, stack))
+            elif token.is_op("}"):
+                if stack:
+                    stack.pop()
+            elif token.kind == "name" and index + 1 < len(tokens) and tokens[index + 1].is_op("="):
+                previous = tokens[index - 1] if index else None
+                if token.value == "Config" and not stack:
+                    continue
+                if previous is not None and previous.is_op(".") and index >= 2 \
+                        and tokens[index - 2].value == "Config" and not stack:
+                    paths.add((token.value,))
+                elif stack and stack[-1] is not None and (previous is None or previous.is_op("{", ",", ";")):
+                    paths.add(stack[-1] + (token.value,))
+
+        return cls(paths)
+
+    @staticmethod
+    def _key_before(tokens, index, stack):
+        """Key path of the table constructor opened at tokens[index]"""
+
+        if index < 2 or not tokens[index - 1].is_op("="):
+            return None
+
+        key = tokens[index - 2]
+        if key.kind != "name":
+            return None
+
+        if not stack and index >= 4 and tokens[index - 3].is_op(".") and tokens[index - 4].value == "Config":
+            return (key.value,)
+        if stack and stack[-1] is not None:
+            return stack[-1] + (key.value,)
+        return None
+
+    def is_leaf(self, path):
+        """Whether Config defines path and nothing below it"""
+
+        return path in self.paths and not any(len(known) > len(path) and known[:len(path)] == path
+                                              for known in self.paths)
+
+    def longest_known(self, path):
+        """Longest prefix of path that Config defines"""
+
+        for length in range(len(path), 0, -1):
+            if path[:length] in self.paths:
+                return path[:length]
+        return ()
+
+
+class OptimizationResult:
+    """Optimized source with a record of what changed"""
+
+    def __init__(self, filename, original, code, changes, skipped=None):
+        self.filename = filename
+        self.original = original
+        self.code = code
+        self.changes: List[Dict[str, Any]] = changes
+        self.skipped = skipped
+
+    @property
+    def changed(self):
+        return self.code != self.original
+
+    def diff(self):
+        """Unified diff from the original source"""
+
+        return "".join(difflib.unified_diff(
+            self.original.splitlines(True),
+            self.code.splitlines(True),
+            fromfile=f"a/{self.filename}",
+            tofile=f"b/{self.filename}"
+        ))
+
+    def summary(self):
+        counts: Dict[str, int] = {}
+        for change in self.changes:
+            counts[change["pass"]] = counts.get(change["pass"], 0) + 1
+        return {"changed": self.changed, "passes": counts, "skipped": self.skipped}
+
+
+class LuaOptimizer:
+    """Semantics-preserving source-to-source optimizer for Luau"""
+
+    def __init__(self, src_path=None, passes=DEFAULT_PASSES, hot_globals=None, min_global_uses=3):
+        self.src_path = Path(src_path) if src_path else None
+        self.passes = passes
+        self.hot_globals = hot_globals or HOT_GLOBALS
+        self.min_global_uses = min_global_uses
+        self.config_schema = ConfigSchema()
+        self.mutated_config: Set[Tuple[str, ...]] = set()
+
+        if self.src_path:
+            config_file = self.src_path / "ReplicatedStorage" / "Config.lua"
+            if config_file.exists():
+                self.config_schema = ConfigSchema.from_file(config_file)
+            self.mutated_config = self._find_config_writes(self.src_path.rglob("*.lua"))
+
+    def optimize(self, code, filename="generated.lua") -> OptimizationResult:
+        """Run all passes over one source file"""
+
+        error = check_syntax(code)
+        if error:
+            return OptimizationResult(filename, code, code, [], skipped=error)
+
+        current = code
+        changes = []
+
+        for name in self.passes:
+            optimized, pass_changes = getattr(self, f"_pass_{name}")(current)
+            if not pass_changes:
+                continue
+
+            # Never accept a rewrite that breaks the block structure
+            if check_syntax(optimized):
+                continue
+
+            current = optimized
+            changes.extend({"pass": name, **change} for change in pass_changes)
+
+        return OptimizationResult(filename, code, current, changes)
+
+    def optimize_tree(self, src_path=None, write=False) -> List[OptimizationResult]:
+        """Optimize every Lua file under src/"""
+
+        src_path = Path(src_path) if src_path else self.src_path
+        results = []
+
+        for lua_file in sorted(src_path.rglob("*.lua")):
+            code = lua_file.read_text()
+            result = self.optimize(code, str(lua_file.relative_to(src_path.parent)))
+            results.append(result)
+
+            if write and result.changed:
+                lua_file.write_text(result.code)
+
+        return results
+
+    # Pass: deprecated globals
+
+    def _pass_deprecated(self, code):
+        tokens = tokenize(code)
+        shadowed = declared_names(tokens)
+        edits, changes = [], []
+
+        for index, token in enumerate(tokens):
+            replacement = DEPRECATED_CALLS.get(token.value)
+            if token.kind != "name" or replacement is None or token.value in shadowed:
+                continue
+
+            previous = tokens[index - 1] if index else None
+            following = tokens[index + 1] if index + 1 < len(tokens) else None
+
+            if previous is not None and (previous.is_op(".", ":") or previous.is_keyword("function")):
+                continue
+            if following is None or not (following.is_op("(") or following.kind == "string"):
+                continue
+            if token.value in SINGLE_RESULT_REPLACEMENTS and self._results_spread(tokens, index):
+                continue
+
+            edits.append(Edit(token.start, token.end, replacement))
+            changes.append({"line": token.line, "detail": f"{token.value}() -> {replacement}()"})
+
+        return apply_edits(code, edits), changes
+
+    def _results_spread(self, tokens, index):
+        """Whether all results of the call at tokens[index] are used, not just the first"""
+
+        end = index + 1
+        if tokens[end].is_op("("):
+            end = self._matching_bracket(tokens, end)
+        after = tokens[end + 1] if end + 1 < len(tokens) else None
+
+        # Only the last expression of a list expands; operators and commas take one value
+        if after is not None and after.is_op() and not after.is_op(")", "}", ";"):
+            return False
+
+        previous = tokens[index - 1] if index else None
+        if previous is None:
+            return False
+        if previous.is_keyword("return") or previous.is_op("(", ",", "{"):
+            return True
+        if previous.is_op("="):
+            # local a, b = wait() / a, b = wait()
+            position = index - 2
+            while position >= 0 and (tokens[position].kind == "name" or tokens[position].is_op(".", ",")):
+                if tokens[position].is_op(","):
+                    return True
+                position -= 1
+        return False
+
+    # Pass: constant folding
+
+    def _pass_fold(self, code):
+        changes = []
+
+        # Fold repeatedly so chains like 60 * 60 * 24 collapse fully
+        while True:
+            tokens = tokenize(code)
+            edit = self._next_fold(code, tokens)
+            if edit is None:
+                return code, changes
+
+            edit, line, detail = edit
+            code = apply_edits(code, [edit])
+            changes.append({"line": line, "detail": detail})
+
+    def _next_fold(self, code, tokens):
+        for index in range(len(tokens) - 2):
+            left, operator, right = tokens[index:index + 3]
+
+            if left.kind != "number" or right.kind != "number":
+                continue
+            if not operator.is_op(*FOLDABLE_OPERATORS):
+                continue
+            if not self._is_decimal(left.value) or not self._is_decimal(right.value):
+                continue
+            if code[left.end:operator.start].strip() or code[operator.end:right.start].strip():
+                continue  # comment between operands
+
+            precedence = BINARY_PRECEDENCE[operator.value]
+            previous = tokens[index - 1] if index else None
+            following = tokens[index + 3] if index + 3 < len(tokens) else None
+
+            if not self._left_bound_ok(tokens, index, previous, precedence, operator.value):
+                continue
+            if not self._right_bound_ok(following, precedence, operator.value):
+                continue
+
+            value = self._evaluate(float(left.value), operator.value, float(right.value))
+            if value is None:
+                continue
+
+            text = self._format_number(value)
+            detail = f"{left.value} {operator.value} {right.value} -> {text}"
+            return Edit(left.start, right.end, text), left.line, detail
+
+        return None
+
+    @staticmethod
+    def _is_decimal(value):
+        return value[:1].isdigit() and "_" not in value and not value.lower().startswith(("0x", "0b"))
+
+    def _left_bound_ok(self, tokens, index, previous, precedence, operator):
+        if previous is None:
+            return True
+        if previous.is_op("-", "#") or previous.is_keyword("not"):
+            before = tokens[index - 2] if index >= 2 else None
+            if before is None or starts_expression(before) or before.is_keyword("then", "do", "else", "return"):
+                return UNARY_PRECEDENCE < precedence
+        if previous.value in BINARY_PRECEDENCE and (previous.kind == "op" or previous.is_keyword("and", "or")):
+            other = BINARY_PRECEDENCE[previous.value]
+            return other < precedence or (other == precedence and operator in RIGHT_ASSOCIATIVE)
+        if previous.is_op(*ASSIGNMENT_OPERATORS) or previous.is_op("(", "[", "{", ",", ";"):
+            return True
+        return previous.is_keyword("return", "then", "do", "else", "in", "until", "if", "elseif", "while")
+
+    @staticmethod
+    def _right_bound_ok(following, precedence, operator):
+        if following is None:
+            return True
+        if following.value in BINARY_PRECEDENCE and (following.kind == "op" or following.is_keyword("and", "or")):
+            other = BINARY_PRECEDENCE[following.value]
+            return other < precedence or (other == precedence and operator not in RIGHT_ASSOCIATIVE)
+        if following.is_op(*EXPRESSION_END_OPS) or following.is_keyword(*EXPRESSION_END_KEYWORDS):
+            return True
+        # A name or keyword starting the next statement
+        return following.kind == "name" or following.is_keyword("local", "return", "if", "for", "while", "repeat", "function")
+
+    @staticmethod
+    def _evaluate(left, operator, right):
+        try:
+            if operator == "+":
+                value = left + right
+            elif operator == "-":
+                value = left - right
+            elif operator == "*":
+                value = left * right
+            elif operator == "/":
+                if right == 0:
+                    return None
+                value = left / right
+            elif operator == "%":
+                # Lua and Python agree on % for integral operands
+                if right == 0 or not (left.is_integer() and right.is_integer()):
+                    return None
+                value = left % right
+            else:
+                value = left ** right
+        except (OverflowError, ZeroDivisionError):
+            return None
+
+        if isinstance(value, complex) or math.isinf(value) or math.isnan(value):
+            return None
+        return value
+
+    @staticmethod
+    def _format_number(value):
+        if value.is_integer() and abs(value) < 2 ** 53:
+            return str(int(value))
+        return repr(value)
+
+    # Pass: hoist loop-invariant Config lookups
+
+    def _pass_hoist(self, code):
+        tokens = tokenize(code)
+
+        if not self._requires_config(tokens) or not self.config_schema.paths:
+            return code, []
+
+        mutated = self.mutated_config | self._find_config_writes_in(tokens)
+        aliases = self._config_aliases(tokens)
+        root = parse_blocks(tokens)
+        taken = {t.value for t in tokens if t.kind == "name"}
+        edits, changes = [], []
+
+        for block in root.walk():
+            if not block.is_loop or block.loop_ancestor() is not None:
+                continue
+
+            # for-loop headers run once; while/repeat conditions run every iteration
+            first = block.body_start if block.kind == "for" else block.start + 1
+            last = block.end
+            if block.kind == "repeat":
+                last = self._until_expression_end(tokens, block.end)
+
+            # A loop that rebinds Config reads its own table, not the one outside
+            if self._rebinds_config(tokens, block.start, last):
+                continue
+
+            # Writes through local t = Config.Objects or rawset(Config.Objects, ...) are invisible to mutated
+            if self._mutates_through_config(tokens, block.start, last, aliases):
+                continue
+
+            hoisted: Dict[Tuple[str, ...], str] = {}
+            replacements = []
+
+            for index in range(first, last):
+                path, end_index = self._config_chain(tokens, index)
+                if not path:
+                    continue
+
+                known = self.config_schema.longest_known(path)
+                if len(known) < 2 or any(known[:n] in mutated for n in range(1, len(known) + 1)):
+                    continue
+
+                # Config.A.B spans tokens index .. index + 2 * len(known)
+                last_name = index + 2 * len(known)
+                following = tokens[last_name + 1] if last_name + 1 < len(tokens) else None
+                if following is not None and following.is_op(*ASSIGNMENT_OPERATORS):
+                    continue
+
+                if known not in hoisted:
+                    hoisted[known] = self._unique_name(known, taken)
+                replacements.append(Edit(tokens[index].start, tokens[last_name].end, hoisted[known]))
+
+            if not hoisted:
+                continue
+
+            loop_token = tokens[block.start]
+            indent = self._indent_at(code, loop_token.start)
+            declarations = "".join(
+                f"local {name} = Config.{'.'.join(path)}\n{indent}" for path, name in hoisted.items()
+            )
+            edits.append(Edit(loop_token.start, loop_token.start, declarations))
+            edits.extend(replacements)
+
+            for path, name in hoisted.items():
+                changes.append({
+                    "line": loop_token.line,
+                    "detail": f"hoisted Config.{'.'.join(path)} out of {block.kind} loop as {name}"
+                })
+
+        return apply_edits(code, edits), changes
+
+    @staticmethod
+    def _requires_config(tokens):
+        """Whether Config is the local bound to require(...Config...)"""
+
+        for index in range(len(tokens) - 3):
+            if tokens[index].is_keyword("local") and tokens[index + 1].value == "Config" \
+                    and tokens[index + 2].is_op("=") and tokens[index + 3].value == "require":
+                depth = 0
+                for token in tokens[index + 4:]:
+                    if token.is_op("("):
+                        depth += 1
+                    elif token.is_op(")"):
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    elif token.value in ('"Config"', "'Config'", "Config"):
+                        return True
+        return False
+
+    @staticmethod
+    def _config_chain(tokens, index):
+        """Key path of a Config.A.B... chain starting at tokens[index]"""
+
+        token = tokens[index]
+        if token.kind != "name" or token.value != "Config":
+            return (), index
+        if index and tokens[index - 1].is_op(".", ":"):
+            return (), index
+
+        path = []
+        position = index + 1
+        while position + 1 < len(tokens) and tokens[position].is_op(".") and tokens[position + 1].kind == "name":
+            path.append(tokens[position + 1].value)
+            position += 2
+        return tuple(path), position
+
+    @staticmethod
+    def _rebinds_config(tokens, start, end):
+        """Whether tokens[start:end] use Config other than as a Config.X read (local Config, Config = ..., parameters)"""
+
+        for index in range(start, end):
+            token = tokens[index]
+            if token.kind != "name" or token.value != "Config":
+                continue
+            if index and tokens[index - 1].is_op(".", ":"):
+                continue
+            if index + 1 >= len(tokens) or not tokens[index + 1].is_op("."):
+                return True
+        return False
+
+    @staticmethod
+    def _config_aliases(tokens):
+        """Names bound to Config tables: local t = Config.Objects, u = t.Goblin, for _, v in pairs(t)"""
+
+        aliases: Set[str] = set()
+        changed = True
+
+        while changed:
+            changed = False
+            for index, token in enumerate(tokens):
+                if token.is_op("=") and index + 1 < len(tokens):
+                    source = tokens[index + 1]
+                    derived = source.kind == "name" and (source.value == "Config" or source.value in aliases)
+                    targets = []
+                    position = index - 1
+                    while position >= 0 and tokens[position].kind == "name" \
+                            and not (position and tokens[position - 1].is_op(".", ":")):
+                        targets.append(tokens[position].value)
+                        if position < 1 or not tokens[position - 1].is_op(","):
+                            break
+                        position -= 2
+                elif token.is_keyword("for"):
+                    position = index + 1
+                    targets = []
+                    while position < len(tokens) and tokens[position].kind == "name":
+                        targets.append(tokens[position].value)
+                        position += 2 if position + 1 < len(tokens) and tokens[position + 1].is_op(",") else 1
+                    if position >= len(tokens) or not tokens[position].is_keyword("in"):
+                        continue
+                    derived = False
+                    while position < len(tokens) and not tokens[position].is_keyword("do"):
+                        source = tokens[position]
+                        if source.kind == "name" and (source.value == "Config" or source.value in aliases):
+                            derived = True
+                        position += 1
+                else:
+                    continue
+
+                new = set(targets) - aliases - {"Config"}
+                if derived and new:
+                    aliases |= new
+                    changed = True
+
+        return aliases
+
+    def _mutates_through_config(self, tokens, start, end, aliases):
+        """Whether tokens[start:end] write through a Config alias or hand a Config table to a call"""
+
+        for index in range(start, end):
+            token = tokens[index]
+            if token.kind != "name" or (index and tokens[index - 1].is_op(".", ":")):
+                continue
+
+            alias = token.value in aliases
+            if token.value == "Config":
+                path, chain_end = self._config_chain(tokens, index)
+            elif alias:
+                path, chain_end = (), index + 1
+            else:
+                continue
+
+            position = self._index_chain_end(tokens, chain_end)
+            following = tokens[position] if position < len(tokens) else None
+
+            # Method calls pass the table as self; Config.X = ... is tracked per path in mutated
+            if following is not None and (following.is_op(":") or alias and following.is_op(*ASSIGNMENT_OPERATORS)):
+                return True
+
+            callee = self._enclosing_call(tokens, start, index)
+            if callee is None or callee in ITERATION_CALLS:
+                continue
+            # Leaf values are copied into the call; tables can be changed by it
+            if alias or position != chain_end or not self.config_schema.is_leaf(path):
+                return True
+
+        return False
+
+    @classmethod
+    def _index_chain_end(cls, tokens, position):
+        """Index just past a run of .name and [key] lookups starting at tokens[position]"""
+
+        while position < len(tokens):
+            if tokens[position].is_op("["):
+                position = cls._matching_bracket(tokens, position) + 1
+            elif tokens[position].is_op(".") and position + 1 < len(tokens) and tokens[position + 1].kind == "name":
+                position += 2
+            else:
+                break
+        return position
+
+    @staticmethod
+    def _enclosing_call(tokens, start, index):
+        """Name of the function whose arguments contain tokens[index], if any ("" for an expression callee)"""
+
+        depth = 0
+        for position in range(index - 1, start - 1, -1):
+            token = tokens[position]
+            if token.is_op(")", "]", "}"):
+                depth += 1
+            elif token.is_op("(", "[", "{"):
+                if depth:
+                    depth -= 1
+                    continue
+                if not token.is_op("(") or position == 0:
+                    return None
+                callee = tokens[position - 1]
+                if callee.kind == "name":
+                    return callee.value
+                return "" if callee.is_op(")", "]") else None
+        return None
+
+    @staticmethod
+    def _until_expression_end(tokens, until_index):
+        """Index just past the condition of a repeat ... until <expr>"""
+
+        line = tokens[until_index].line
+        position = until_index + 1
+        depth = 0
+        while position < len(tokens):
+            token = tokens[position]
+            if token.is_op("(", "[", "{"):
+                depth += 1
+            elif token.is_op(")", "]", "}"):
+                depth -= 1
+            elif depth == 0 and token.line != line:
+                break
+            position += 1
+        return position
+
+    def _find_config_writes(self, lua_files):
+        mutated = set()
+        for lua_file in lua_files:
+            if lua_file.name == "Config.lua":
+                continue
+            try:
+                mutated |= self._find_config_writes_in(tokenize(lua_file.read_text()))
+            except LuaSyntaxError:
+                continue
+        return mutated
+
+    def _find_config_writes_in(self, tokens):
+        """Config key paths assigned anywhere in a chunk"""
+
+        mutated = set()
+        for index in range(len(tokens)):
+            path, end_index = self._config_chain(tokens, index)
+            if not path or end_index >= len(tokens):
+                continue
+
+            following = tokens[end_index]
+            if following.is_op("["):
+                # Config.A[key] = value may replace any child of Config.A
+                end_index = self._matching_bracket(tokens, end_index) + 1
+                if end_index < len(tokens) and tokens[end_index].is_op(*ASSIGNMENT_OPERATORS):
+                    mutated.add(path)
+            elif following.is_op(*ASSIGNMENT_OPERATORS):
+                mutated.add(path)
+        return mutated
+
+    @staticmethod
+    def _matching_bracket(tokens, index):
+        depth = 0
+        for position in range(index, len(tokens)):
+            if tokens[position].is_op("[", "(", "{"):
+                depth += 1
+            elif tokens[position].is_op("]", ")", "}"):
+                depth -= 1
+                if depth == 0:
+                    return position
+        return len(tokens) - 1
+
+    @staticmethod
+    def _unique_name(path, taken):
+        base = lower_camel(*path[-2:])
+        name = base
+        suffix = 2
+        while name in taken:
+            name = f"{base}{suffix}"
+            suffix += 1
+        taken.add(name)
+        return name
+
+    @staticmethod
+    def _indent_at(code, position):
+        line_start = code.rfind("\n", 0, position) + 1
+        prefix = code[line_start:position]
+        return prefix if not prefix.strip() else ""
+
+    # Pass: cache hot globals in locals
+
+    def _pass_cache_globals(self, code):
+        tokens = tokenize(code)
+        if not tokens:
+            return code, []
+
+        shadowed = declared_names(tokens)
+        taken = {t.value for t in tokens if t.kind == "name"}
+        root = parse_blocks(tokens)
+        loop_ranges = [(b.start, b.end) for b in root.walk() if b.is_loop]
+
+        uses: Dict[Tuple[str, str], List[int]] = {}
+        unsafe: Set[str] = set()
+
+        for index, token in enumerate(tokens):
+            if token.kind != "name" or token.value not in self.hot_globals:
+                continue
+            if index and tokens[index - 1].is_op(".", ":"):
+                continue
+            if token.value in shadowed:
+                continue
+
+            following = tokens[index + 1] if index + 1 < len(tokens) else None
+            if following is not None and following.is_op(*ASSIGNMENT_OPERATORS):
+                unsafe.add(token.value)  # the global itself is reassigned
+                continue
+            if following is None or not following.is_op(".") or index + 2 >= len(tokens):
+                continue
+
+            member = tokens[index + 2]
+            if member.kind != "name" or member.value not in self.hot_globals[token.value]:
+                continue
+
+            after = tokens[index + 3] if index + 3 < len(tokens) else None
+            if after is not None and after.is_op(*ASSIGNMENT_OPERATORS):
+                unsafe.add(token.value)
+                continue
+
+            uses.setdefault((token.value, member.value), []).append(index)
+
+        cached = {}
+        for (base, member), indices in sorted(uses.items()):
+            if base in unsafe:
+                continue
+            in_loop = any(start < i < end for i in indices for start, end in loop_ranges)
+            if len(indices) < self.min_global_uses and not in_loop:
+                continue
+            cached[(base, member)] = self._unique_name((base, member), taken)
+
+        if not cached:
+            return code, []
+
+        edits, changes = [], []
+        first = tokens[0]
+        declarations = "".join(f"local {name} = {base}.{member}\n" for (base, member), name in cached.items())
+        edits.append(Edit(first.start, first.start, declarations + "\n"))
+
+        for key, name in cached.items():
+            for index in uses[key]:
+                edits.append(Edit(tokens[index].start, tokens[index + 2].end, name))
+            changes.append({
+                "line": tokens[uses[key][0]].line,
+                "detail": f"cached {key[0]}.{key[1]} as {name} ({len(uses[key])} uses)"
+            })
+
+        return apply_edits(code, edits), changes
+
+
+def main(argv=None):
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Optimize Luau sources")
+    parser.add_argument("paths", nargs="*", help="Lua files to optimize (default: whole src/ tree)")
+    parser.add_argument("--src", default=str(Path(__file__).parent / "src"), help="Game src/ directory")
+    parser.add_argument("--write", action="store_true", help="Rewrite files in place")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args(argv)
+
+    optimizer = LuaOptimizer(args.src)
+
+    if args.paths:
+        results = []
+        for path in args.paths:
+            path = Path(path)
+            result = optimizer.optimize(path.read_text(), path.name)
+            if args.write and result.changed:
+                path.write_text(result.code)
+            results.append(result)
+    else:
+        results = optimizer.optimize_tree(write=args.write)
+
+    changed = [r for r in results if r.changed]
+
+    for result in results:
+        if result.skipped:
+            print(f"⚠️  Skipped {result.filename}: {result.skipped}", file=sys.stderr)
+        if result.changed and not args.quiet:
+            print(result.diff())
+
+    print(f"⚡ Optimized {len(changed)}/{len(results)} files, "
+          f"{sum(len(r.changes) for r in results)} rewrites"
+          f"{' (written)' if args.write else ''}", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Lua Syntax Helpers
+
+A small Luau tokenizer and block-structure scanner shared by the source tools.
+Tokens keep their source offsets, so tools can rewrite code in place without
+disturbing formatting or comments.
+"""
+
+import re
+from typing import List, Optional, Set
+
+
+KEYWORDS = {
+    "and", "break", "continue", "do", "else", "elseif", "end", "false", "for",
+    "function", "if", "in", "local", "nil", "not", "or", "repeat", "return",
+    "then", "true", "until", "while",
+}
+
+OPERATORS = [
+    "...", "..=", "//=", "..", "==", "~=", "<=", ">=", "//", "+=", "-=", "*=",
+    "/=", "%=", "^=", "::", "->",
+    "+", "-", "*", "/", "%", "^", "#", "<", ">", "=", "(", ")", "{", "}",
+    "[", "]", ";", ":", ",", ".", "?", "|", "&",
+]
+
+# Binary operator precedence (higher binds tighter) and right-associative operators
+BINARY_PRECEDENCE = {
+    "or": 1, "and": 2,
+    "<": 3, ">": 3, "<=": 3, ">=": 3, "~=": 3, "==": 3,
+    "..": 4,
+    "+": 5, "-": 5,
+    "*": 6, "/": 6, "//": 6, "%": 6,
+    "^": 8,
+}
+UNARY_PRECEDENCE = 7
+RIGHT_ASSOCIATIVE = {"..", "^"}
+
+ASSIGNMENT_OPERATORS = {"=", "+=", "-=", "*=", "/=", "%=", "^=", "..=", "//="}
+CLOSING_BRACKETS = {")", "]", "}"}
+LOOP_KINDS = {"for", "while", "repeat"}
+
+NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+NUMBER_PATTERN = re.compile(
+    r"0[xX][0-9a-fA-F_]+|0[bB][01_]+|(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:[eE][+-]?\d+)?"
+)
+LONG_BRACKET_PATTERN = re.compile(r"\[(=*)\[")
+
+
+class LuaSyntaxError(ValueError):
+    """Raised when source cannot be tokenized or its blocks do not balance"""
+
+
+class Token:
+    """A lexical token with its source span"""
+
+    __slots__ = ("kind", "value", "start", "end", "line")
+
+    def __init__(self, kind, value, start, end, line):
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+        self.line = line
+
+    def is_op(self, *values):
+        return self.kind == "op" and (not values or self.value in values)
+
+    def is_keyword(self, *values):
+        return self.kind == "keyword" and (not values or self.value in values)
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.value!r}, line {self.line})"
+
+
+class Block:
+    """A block-level construct (function, loop, if, do) spanning tokens"""
+
+    def __init__(self, kind, start, parent=None):
+        self.kind = kind
+        self.start = start  # index of the opening keyword
+        self.body_start = start + 1
+        self.end = None  # index of the closing end/until
+        self.parent = parent
+        self.children: List["Block"] = []
+        self.name: Optional[str] = None
+        self.awaiting_do = kind in ("for", "while")
+
+    @property
+    def is_loop(self):
+        return self.kind in LOOP_KINDS
+
+    def walk(self):
+        """Yield this block and all nested blocks"""
+
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def loop_ancestor(self):
+        """Closest enclosing loop, if any"""
+
+        parent = self.parent
+        while parent is not None:
+            if parent.is_loop:
+                return parent
+            parent = parent.parent
+        return None
+
+
+def _long_bracket_end(code, position, level):
+    close = "]" + "=" * level + "]"
+    end = code.find(close, position)
+    if end < 0:
+        raise LuaSyntaxError("Unfinished long bracket")
+    return end + len(close)
+
+
+def _string_end(code, position, quote):
+    index = position + 1
+    while index < len(code):
+        char = code[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == quote:
+            return index + 1
+        if char == "\n" and quote != "`":
+            break
+        index += 1
+    raise LuaSyntaxError("Unfinished string")
+
+
+def tokenize(code, keep_comments=False) -> List[Token]:
+    """Split Lua source into tokens"""
+
+    tokens = []
+    position = 0
+    line = 1
+    length = len(code)
+
+    while position < length:
+        char = code[position]
+
+        if char == "\n":
+            line += 1
+            position += 1
+            continue
+
+        if char.isspace():
+            position += 1
+            continue
+
+        start = position
+
+        if code.startswith("--", position):
+            bracket = LONG_BRACKET_PATTERN.match(code, position + 2)
+            if bracket:
+                position = _long_bracket_end(code, bracket.end(), len(bracket.group(1)))
+            else:
+                newline = code.find("\n", position)
+                position = length if newline < 0 else newline
+            if keep_comments:
+                tokens.append(Token("comment", code[start:position], start, position, line))
+            line += code.count("\n", start, position)
+            continue
+
+        if char in "\"'`":
+            position = _string_end(code, position, char)
+            tokens.append(Token("string", code[start:position], start, position, line))
+            line += code.count("\n", start, position)
+            continue
+
+        if char == "[":
+            bracket = LONG_BRACKET_PATTERN.match(code, position)
+            if bracket:
+                position = _long_bracket_end(code, bracket.end(), len(bracket.group(1)))
+                tokens.append(Token("string", code[start:position], start, position, line))
+                line += code.count("\n", start, position)
+                continue
+
+        if char.isdigit() or (char == "." and position + 1 < length and code[position + 1].isdigit()):
+            match = NUMBER_PATTERN.match(code, position)
+            position = match.end()
+            tokens.append(Token("number", match.group(), start, position, line))
+            continue
+
+        if char.isalpha() or char == "_":
+            match = NAME_PATTERN.match(code, position)
+            position = match.end()
+            value = match.group()
+            kind = "keyword" if value in KEYWORDS else "name"
+            tokens.append(Token(kind, value, start, position, line))
+            continue
+
+        for operator in OPERATORS:
+            if code.startswith(operator, position):
+                position += len(operator)
+                tokens.append(Token("op", operator, start, position, line))
+                break
+        else:
+            raise LuaSyntaxError(f"Unexpected character {char!r} on line {line}")
+
+    return tokens
+
+
+def starts_expression(previous: Optional[Token]) -> bool:
+    """Whether a token following `previous` begins an expression operand"""
+
+    if previous is None:
+        return False
+    if previous.kind == "op":
+        return previous.value not in CLOSING_BRACKETS and previous.value != ";"
+    return previous.is_keyword("return", "and", "or", "not", "in", "until", "if", "elseif", "while")
+
+
+def parse_blocks(tokens: List[Token]) -> Block:
+    """Match block openers with their end/until and return the root block"""
+
+    root = Block("chunk", -1)
+    root.body_start = 0
+    current = root
+
+    for index, token in enumerate(tokens):
+        if token.kind != "keyword":
+            continue
+
+        value = token.value
+        previous = tokens[index - 1] if index else None
+
+        if value == "if":
+            # Luau if-expressions (x = if a then b else c) have no end
+            if starts_expression(previous):
+                continue
+            current = _open(current, "if", index)
+
+        elif value in ("function", "for", "while", "repeat"):
+            current = _open(current, value, index)
+            if value == "function":
+                current.name = _function_name(tokens, index)
+
+        elif value == "do":
+            if current.awaiting_do:
+                current.awaiting_do = False
+                current.body_start = index + 1
+            else:
+                current = _open(current, "do", index)
+
+        elif value in ("end", "until"):
+            expected = value == "until"
+            if current is root or (current.kind == "repeat") != expected:
+                raise LuaSyntaxError(f"Unexpected '{value}' on line {token.line}")
+            current.end = index
+            current = current.parent
+
+    if current is not root:
+        opener = tokens[current.start]
+        raise LuaSyntaxError(f"'{current.kind}' on line {opener.line} is never closed")
+
+    root.end = len(tokens)
+    return root
+
+
+def _open(parent, kind, index):
+    block = Block(kind, index, parent)
+    parent.children.append(block)
+    return block
+
+
+def _function_name(tokens, index):
+    """Name of a function definition, or of the variable an anonymous function is assigned to"""
+
+    following = []
+    position = index + 1
+    while position < len(tokens) and (tokens[position].kind == "name" or tokens[position].is_op(".", ":")):
+        following.append(tokens[position].value)
+        position += 1
+    if following:
+        return "".join(following)
+
+    # local name = function(...) / Module.name = function(...)
+    if index >= 2 and tokens[index - 1].is_op("="):
+        parts = []
+        position = index - 2
+        while position >= 0 and (tokens[position].kind == "name" or tokens[position].is_op(".", ":")):
+            parts.insert(0, tokens[position].value)
+            position -= 1
+        if parts:
+            return "".join(parts)
+
+    return None
+
+
+def declared_names(tokens: List[Token]) -> Set[str]:
+    """Names declared as locals, parameters or loop variables anywhere in the chunk"""
+
+    names = set()
+
+    for index, token in enumerate(tokens):
+        if token.is_keyword("local"):
+            position = index + 1
+            if position < len(tokens) and tokens[position].is_keyword("function"):
+                position += 1
+            while position < len(tokens) and tokens[position].kind == "name":
+                names.add(tokens[position].value)
+                position += 1
+                # Skip type annotations and attributes: local x: number, y <const>
+                while position < len(tokens) and not tokens[position].is_op(",", "="):
+                    if tokens[position].kind == "keyword" or tokens[position].line != token.line:
+                        break
+                    position += 1
+                if position < len(tokens) and tokens[position].is_op(","):
+                    position += 1
+                else:
+                    break
+
+        elif token.is_keyword("for"):
+            position = index + 1
+            while position < len(tokens) and not tokens[position].is_keyword("in", "do") \
+                    and not tokens[position].is_op("="):
+                if tokens[position].kind == "name" and not tokens[position - 1].is_op(":"):
+                    names.add(tokens[position].value)
+                position += 1
+
+        elif token.is_keyword("function"):
+            position = index + 1
+            while position < len(tokens) and not tokens[position].is_op("("):
+                position += 1
+            depth = 0
+            while position < len(tokens):
+                current = tokens[position]
+                if current.is_op("("):
+                    depth += 1
+                elif current.is_op(")"):
+                    depth -= 1
+                    if depth == 0:
+                        break
+                elif current.kind == "name" and depth == 1 and tokens[position - 1].is_op("(", ","):
+                    names.add(current.value)
+                position += 1
+
+    return names
+
+
+class FunctionChunk:
+    """Source span of a function definition"""
+
+    def __init__(self, name, code, start, end, start_line, end_line):
+        self.name = name
+        self.code = code
+        self.start = start
+        self.end = end
+        self.start_line = start_line
+        self.end_line = end_line
+
+    def __repr__(self):
+        return f"FunctionChunk({self.name!r}, lines {self.start_line}-{self.end_line})"
+
+
+def find_functions(code, named_only=True) -> List[FunctionChunk]:
+    """Extract function definitions, outermost first"""
+
+    tokens = tokenize(code)
+    root = parse_blocks(tokens)
+    functions = []
+
+    for block in root.walk():
+        if block.kind != "function" or (named_only and not block.name):
+            continue
+
+        # Include a leading `local` so the chunk is self-contained
+        first = block.start
+        if first > 0 and tokens[first - 1].is_keyword("local"):
+            first -= 1
+
+        start = tokens[first].start
+        end = tokens[block.end].end
+        functions.append(FunctionChunk(
+            block.name or "<anonymous>",
+            code[start:end],
+            start,
+            end,
+            tokens[first].line,
+            tokens[block.end].line
+        ))
+
+    return functions
+
+
+def check_syntax(code) -> Optional[str]:
+    """Return an error message if the source does not tokenize or balance"""
+
+    try:
+        parse_blocks(tokenize(code))
+    except LuaSyntaxError as e:
+        return str(e)
+    return None
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Provider Gateway
+
+Every call to a model provider (AutoCoder, the HuggingFace models, the LLM)
+goes through a gateway that combines:
+
+- a token bucket, so calls never exceed the provider's rate limit,
+- an AIMD concurrency limit, which grows by one slot per window of successful
+  calls and halves on failures, timeouts or latency above target,
+- a per-call timeout,
+- a circuit breaker that skips the provider after repeated failures, lets a
+  single probe through once the reset timeout has passed, and closes again
+  when the probe succeeds.
+
+A degraded provider is skipped quickly instead of stalling every feature,
+while the healthy ones keep their full throughput. Live state is available
+from ProviderGateways.snapshot().
+"""
+
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Defaults per provider; the local model is one shared pipeline, so it is serialized
+DEFAULT_PROVIDER_SETTINGS = {
+    "autocoder": {"timeout": 120.0, "initial_limit": 4, "max_limit": 16},
+    "huggingface": {"timeout": 180.0, "initial_limit": 1, "max_limit": 1},
+    "llm": {"timeout": 120.0, "initial_limit": 4, "max_limit": 16, "rate": 2.0, "burst": 5},
+}
+
+
+class ProviderUnavailable(RuntimeError):
+    """The provider's circuit is open; the call was not attempted"""
+
+
+class ProviderTimeout(TimeoutError):
+    """The provider did not answer within its timeout"""
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts up to `burst`"""
+
+    def __init__(self, rate=None, burst=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = float(burst or max(1.0, rate or 1.0))
+        self.tokens = self.burst
+        self.clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if not self.rate:
+            return
+
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AIMDLimiter:
+    """Adaptive concurrency limit: additive increase, multiplicative decrease"""
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=64, backoff=0.5,
+                 latency_target=None, clock=time.monotonic):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.clock = clock
+        self.in_flight = 0
+        self.latency = None
+        self._last_decrease = float("-inf")
+        self._waiters = deque()
+
+    @property
+    def current(self):
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self):
+        while self.in_flight >= self.current:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    # Woken and then cancelled: pass the slot on
+                    self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self, success, latency):
+        """Free the slot and adapt the limit to how the call went (None: cancelled)"""
+
+        self.in_flight -= 1
+        if success is None:
+            self._wake()
+            return
+
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+        overloaded = not success or (self.latency_target is not None and latency > self.latency_target)
+
+        if overloaded:
+            # Calls that were in flight together fail together; back off once per round trip
+            now = self.clock()
+            if now - self._last_decrease >= (self.latency or 0.0):
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+        else:
+            # One extra slot per window of successful calls
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / max(self.limit, 1.0))
+
+        self._wake()
+
+    def _wake(self):
+        free = self.current - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, probes after a timeout, closes on success"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, max_reset_timeout=600.0,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self._state = CLOSED
+        self._probing = False
+
+    @property
+    def cooldown(self):
+        """Seconds the circuit stays open; doubles each time a probe fails"""
+
+        return min(self.reset_timeout * 2 ** max(self.trips - 1, 0), self.max_reset_timeout)
+
+    @property
+    def state(self):
+        if self._state == OPEN and self.clock() - self.opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+        return self._state
+
+    def allow(self):
+        """Whether a call may go ahead now; in half-open, only one probe at a time"""
+
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._probing = False
+        if self._state != CLOSED:
+            self._state = CLOSED
+            self.trips = 0
+
+    def cancel(self):
+        """A call was abandoned by its caller; free the probe slot without judging it"""
+
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        probe_failed = self._state == HALF_OPEN
+        self._probing = False
+
+        if probe_failed or (self._state == CLOSED and self.failures >= self.failure_threshold):
+            self._state = OPEN
+            self.opened_at = self.clock()
+            self.trips += 1
+
+    def snapshot(self):
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self.failures,
+            "retry_in": round(max(0.0, self.opened_at + self.cooldown - self.clock()), 1) if state == OPEN else 0.0,
+        }
+
+
+class ProviderGateway:
+    """Rate limit, adaptive concurrency, timeout and circuit breaker for one provider"""
+
+    def __init__(self, name, timeout=None, rate=None, burst=None, initial_limit=4, max_limit=64,
+                 latency_target=None, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AIMDLimiter(initial_limit, max_limit=max_limit, latency_target=latency_target)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.counts = {"calls": 0, "succeeded": 0, "failed": 0, "timed_out": 0, "rejected": 0}
+
+    async def call(self, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) under this provider's limits"""
+
+        if not self.breaker.allow():
+            self.counts["rejected"] += 1
+            raise ProviderUnavailable(f"{self.name} circuit is open")
+
+        await self.bucket.acquire()
+        await self.limiter.acquire()
+
+        self.counts["calls"] += 1
+        started = time.perf_counter()
+
+        # The call is never cancelled from here: cancelling does not stop a generation running in an
+        # executor thread, so a timed-out call keeps its slot until it has really finished
+        task = asyncio.ensure_future(fn(*args, **kwargs))
+        task.add_done_callback(lambda done: self._release(done, started))
+
+        try:
+            await asyncio.wait({task}, timeout=self.timeout)
+        except asyncio.CancelledError:
+            # The caller gave up; that says nothing about the provider
+            self.breaker.cancel()
+            raise
+
+        if not task.done():
+            self.counts["timed_out"] += 1
+            self._record(False)
+            raise ProviderTimeout(f"{self.name} timed out after {self.timeout}s")
+
+        if task.cancelled():
+            self.breaker.cancel()
+            raise asyncio.CancelledError()
+
+        try:
+            result = task.result()
+        except Exception:
+            self._record(False)
+            raise
+
+        self._record(True)
+        return result
+
+    def _release(self, task, started):
+        """Free the concurrency slot once the call has finished, timed out or not"""
+
+        latency = time.perf_counter() - started
+        success = None if task.cancelled() else task.exception() is None
+
+        # Finishing after the caller stopped waiting is still an overload signal
+        if success and self.timeout is not None and latency > self.timeout:
+            success = False
+        self.limiter.release(success, latency)
+
+    def _record(self, success):
+        before = self.breaker.state
+        if success:
+            self.counts["succeeded"] += 1
+            self.breaker.record_success()
+        else:
+            self.counts["failed"] += 1
+            self.breaker.record_failure()
+
+        after = self.breaker.state
+        if after == OPEN and before != OPEN:
+            print(f"      🔴 {self.name} circuit open, retrying in {self.breaker.cooldown:g}s")
+        elif after == CLOSED and before != CLOSED:
+            print(f"      🟢 {self.name} circuit closed")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.breaker.snapshot(),
+            "limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "latency_ms": round(self.limiter.latency * 1000, 1) if self.limiter.latency is not None else None,
+            **self.counts,
+        }
+
+
+class ProviderGateways:
+    """One gateway per provider, created on first use"""
+
+    def __init__(self, settings: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.settings = {**DEFAULT_PROVIDER_SETTINGS, **(settings or {})}
+        self.gateways: Dict[str, ProviderGateway] = {}
+
+    def __getitem__(self, name) -> ProviderGateway:
+        if name not in self.gateways:
+            self.gateways[name] = ProviderGateway(name, **self.settings.get(name, {}))
+        return self.gateways[name]
+
+    async def call(self, name, fn, *args, **kwargs):
+        return await self[name].call(fn, *args, **kwargs)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: gateway.snapshot() for name, gateway in sorted(self.gateways.items())}
+
+    def summary(self):
+        """One line of live limits and breaker states"""
+
+        return " | ".join(
+            f"{name} {state['state']} limit {state['limit']:g} ({state['in_flight']} in flight)"
+            for name, state in self.snapshot().items()
+        )
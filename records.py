@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Compact Records
+
+Long-running loops hold thousands of analyzer findings and feature results.
+Findings are slotted records whose type and severity are interned enums and
+whose file names are interned strings, instead of dicts repeating the same
+keys and values. They still read like the dicts the deduplicator, scheduler
+and checkpoints expect (get, [], in, keys, dict(finding), **finding).
+
+Feature results are kept in a bounded history of small summaries; the full
+result goes to the development log. MemoryReport samples tracemalloc and RSS
+once per iteration to show memory stays flat (MEMORY_REPORT=1).
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from enum import Enum
+from collections import deque
+from typing import List, Dict, Any, Optional, Iterator
+
+
+class _Interned(str, Enum):
+    """String enum that compares, formats and serializes as its value"""
+
+    def __str__(self):
+        return self.value
+
+    # Enum hashes by member name; match plain strings so either works as a dict key
+    __hash__ = str.__hash__
+    __format__ = str.__format__
+
+    @classmethod
+    def parse(cls, value):
+        """Member for a known value; unknown values are kept as interned strings"""
+
+        if value is None or isinstance(value, cls):
+            return value
+        try:
+            return cls(value)
+        except ValueError:
+            return sys.intern(str(value))
+
+
+class FindingType(_Interned):
+    CODE_SMELL = "code_smell"
+    DUPLICATION = "duplication"
+    ERROR_HANDLING = "error_handling"
+    PERFORMANCE = "performance"
+    FEATURE = "feature"
+    REFACTOR = "refactor"
+
+
+class Level(_Interned):
+    """Issue severity and opportunity priority share one scale"""
+
+    CRITICAL = "critical"
+    HIGH = "high"
+    MEDIUM = "medium"
+    LOW = "low"
+
+
+class Finding:
+    """One analyzer issue or opportunity"""
+
+    __slots__ = ("type", "severity", "priority", "file", "line", "end_line",
+                 "description", "suggestion", "benefit", "snippet")
+
+    def __init__(self, type, file, description, severity=None, priority=None, line=None, end_line=None,
+                 suggestion=None, benefit=None, snippet=None):
+        self.type = FindingType.parse(type)
+        self.severity = Level.parse(severity)
+        self.priority = Level.parse(priority)
+        self.file = sys.intern(file) if file is not None else None
+        self.line = line
+        self.end_line = end_line
+        self.description = description
+        self.suggestion = suggestion
+        self.benefit = benefit
+        self.snippet = snippet
+
+    # Mapping view: only fields that are set, like the dicts this replaces
+
+    def keys(self) -> List[str]:
+        return [name for name in self.__slots__ if getattr(self, name) is not None]
+
+    def __getitem__(self, key):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __eq__(self, other):
+        if isinstance(other, (Finding, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    # Defining __eq__ drops the default hash; findings that compare equal share these fields
+    def __hash__(self):
+        return hash((self.type, self.file, self.line, self.end_line, self.description))
+
+    def __repr__(self):
+        return f"Finding({self.to_dict()!r})"
+
+
+class FeatureSummary:
+    """What the in-memory history keeps of a develop_feature result"""
+
+    __slots__ = ("feature", "task_type", "task_file", "success", "duration", "artifact", "error", "timestamp")
+
+    def __init__(self, feature, task_type=None, task_file=None, success=False, duration=None,
+                 artifact=None, error=None, timestamp=None):
+        self.feature = feature
+        self.task_type = FindingType.parse(task_type)
+        self.task_file = sys.intern(task_file) if task_file else None
+        self.success = success
+        self.duration = duration
+        self.artifact = artifact
+        self.error = error
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Any]) -> "FeatureSummary":
+        return cls(
+            result["feature"], result.get("task_type"), result.get("task_file"), result.get("success", False),
+            result.get("duration"), result.get("artifact"), result.get("error"), result.get("timestamp")
+        )
+
+
+class FeatureHistory:
+    """Most recent feature summaries plus all-time counters"""
+
+    def __init__(self, maxlen=500):
+        self.recent = deque(maxlen=maxlen)
+        self.total = 0
+        self.succeeded = 0
+
+    def append(self, result: Dict[str, Any]):
+        summary = FeatureSummary.from_result(result)
+        self.recent.append(summary)
+        self.total += 1
+        self.succeeded += summary.success
+
+    def __len__(self):
+        return self.total
+
+    def __iter__(self) -> Iterator[FeatureSummary]:
+        return iter(self.recent)
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size in bytes, where the platform exposes it"""
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # Peak rather than current, in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryReport:
+    """tracemalloc and RSS samples per iteration, with the fastest-growing allocation sites"""
+
+    def __init__(self, top=3, history=1000):
+        self.top = top
+        self.samples = deque(maxlen=history)
+        self._previous = None
+        self._started_tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._previous = self._snapshot()
+        self.samples.append(self._sample())
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+        ])
+
+    def _sample(self) -> Dict[str, Any]:
+        traced, peak = tracemalloc.get_traced_memory()
+        return {"time": time.time(), "traced": traced, "peak": peak, "rss": current_rss()}
+
+    def sample(self, label="") -> Dict[str, Any]:
+        """Record a sample and print it with the top allocation growth since the previous one"""
+
+        snapshot = self._snapshot()
+        growth = [stat for stat in snapshot.compare_to(self._previous, "lineno") if stat.size_diff > 0][:self.top]
+        self._previous = snapshot
+
+        sample = self._sample()
+        self.samples.append(sample)
+
+        rss = f"{sample['rss'] / 2**20:.1f} MB" if sample["rss"] else "n/a"
+        print(f"   🧠 Memory{' ' + label if label else ''}: traced {sample['traced'] / 2**20:.1f} MB "
+              f"(peak {sample['peak'] / 2**20:.1f} MB), RSS {rss}")
+        for stat in growth:
+            frame = stat.traceback[0]
+            print(f"      +{stat.size_diff / 1024:.1f} KB  {frame.filename}:{frame.lineno}")
+
+        return sample
+
+    def summary(self) -> Dict[str, Any]:
+        """Drift between the first and latest samples"""
+
+        if len(self.samples) < 2:
+            return {}
+        first, last = self.samples[0], self.samples[-1]
+        return {
+            "samples": len(self.samples),
+            "traced_drift_mb": round((last["traced"] - first["traced"]) / 2**20, 2),
+            "rss_drift_mb": round((last["rss"] - first["rss"]) / 2**20, 2) if first["rss"] and last["rss"] else None
+        }
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def memory_report_enabled(enabled=None) -> bool:
+    if enabled is None:
+        return os.getenv("MEMORY_REPORT", "").lower() in ("1", "true", "yes")
+    return enabled
@@ -10,50 +10,91 @@ import os
 import sys
 import json
 import asyncio
+import functools
 from pathlib import Path
 
-try:
-    from transformers import (
-        pipeline,
-        AutoModelForCausalLM,
-        AutoTokenizer,
-        AutoModel
-    )
-    import torch
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
+# Shared model runtime helpers live with the worker
+sys.path.insert(0, str(Path(__file__).parent / "huggingface_workers"))
+
+from lazy_imports import LazyModule, module_available
+
+# torch and transformers load on first model use, not on import
+torch = LazyModule("torch")
+transformers = LazyModule("transformers")
+TRANSFORMERS_AVAILABLE = module_available("transformers", "torch")
+
+from quantization import load_text_generation_pipeline, quantization_enabled
+from prefix_cache import PrefixCachedGenerator, build_lua_prompt, strip_prefix
+from speculative import SpeculativeGenerator
+from inference_server import RemoteEmbedder, RemotePipeline, inference_client_from_env
+from onnx_backend import backend_for_mode
 
 
 class HuggingFaceGameAI:
     """AI system using HuggingFace models for game development"""
 
-    def __init__(self):
+    def __init__(self, quantize=None, speculative=None, client=None, backend=None):
         self.models = {}
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+
+        # torch or onnx (HF_BACKEND) for the text-generation models
+        self.backend = backend_for_mode(None, backend)
+
+        # Thin client mode: models live in the shared inference server
+        self.client = client or inference_client_from_env()
+
+        # A thin client never runs torch itself, so it never pays for importing it
+        self.gpu_available = TRANSFORMERS_AVAILABLE and not self.client and torch.cuda.is_available()
+        self.device = "cuda" if self.gpu_available else "cpu"
+
+        # int8 dynamic quantization is opt-in and CPU only
+        self.quantize = quantization_enabled(quantize) and self.device == "cpu"
+
+        # Draft with distilgpt2, verify with the code model (HF_SPECULATIVE=1)
+        if speculative is None:
+            speculative = os.getenv("HF_SPECULATIVE", "").lower() in ("1", "true", "yes")
+        self.speculative = speculative
 
         print(f"🤗 HuggingFace Game AI")
         print(f"   Device: {self.device}")
-        print(f"   GPU Available: {torch.cuda.is_available()}")
+        print(f"   GPU Available: {self.gpu_available}")
+        if self.quantize:
+            print(f"   Quantization: int8 dynamic")
+        if self.backend != "torch":
+            print(f"   Backend: {self.backend}")
+        if self.client:
+            print(f"   Inference server: {self.client.url}")
 
     async def setup_code_generation(self):
         """Set up code generation model"""
 
         print("\n📦 Setting up code generation...")
 
+        if self.client:
+            self.models["code_gen"] = RemotePipeline(self.client, "code_gen")
+            print(f"   ✅ Using shared code generation model")
+            return True
+
         try:
             # Use smaller model that works on CPU
             model_name = "Salesforce/codegen-350M-mono"
 
             print(f"   Loading {model_name}...")
 
-            self.models["code_gen"] = pipeline(
-                "text-generation",
-                model=model_name,
+            generator = load_text_generation_pipeline(
+                model_name,
+                quantize=self.quantize,
                 device=self.device,
+                backend=self.backend,
                 torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
             )
 
+            # Prompts share a header (and retrieved context), so reuse its KV state;
+            # ONNX pipelines take prefix= directly
+            if self.backend == "torch":
+                generator = PrefixCachedGenerator(generator)
+
+            self.models["code_gen"] = generator
+
             print(f"   ✅ Code generation model loaded")
 
             return True
@@ -67,13 +108,18 @@ class HuggingFaceGameAI:
 
         print("\n📦 Setting up code understanding...")
 
+        if self.client:
+            self.models["code_bert"] = RemoteEmbedder(self.client, "code_bert")
+            print(f"   ✅ Using shared code understanding model")
+            return True
+
         try:
             model_name = "microsoft/codebert-base"
 
             print(f"   Loading {model_name}...")
 
-            tokenizer = AutoTokenizer.from_pretrained(model_name)
-            model = AutoModel.from_pretrained(model_name)
+            tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+            model = transformers.AutoModel.from_pretrained(model_name)
 
             self.models["code_bert"] = {
                 "tokenizer": tokenizer,
@@ -93,15 +139,21 @@ class HuggingFaceGameAI:
 
         print("\n📦 Setting up text generation...")
 
+        if self.client:
+            self.models["text_gen"] = RemotePipeline(self.client, "text_gen")
+            print(f"   ✅ Using shared text generation model")
+            return True
+
         try:
             model_name = "distilgpt2"  # Smaller, faster
 
             print(f"   Loading {model_name}...")
 
-            self.models["text_gen"] = pipeline(
-                "text-generation",
-                model=model_name,
-                device=self.device
+            self.models["text_gen"] = load_text_generation_pipeline(
+                model_name,
+                quantize=self.quantize,
+                device=self.device,
+                backend=self.backend
             )
 
             print(f"   ✅ Text generation model loaded")
@@ -112,29 +164,58 @@ class HuggingFaceGameAI:
             print(f"   ❌ Failed to load text model: {e}")
             return False
 
-    async def generate_lua_code(self, prompt, max_length=200):
-        """Generate Lua code"""
+    def enable_speculative_decoding(self, num_draft_tokens=4):
+        """Use text_gen as a draft model for code_gen when they share one token id space"""
+
+        if "code_gen" not in self.models or "text_gen" not in self.models:
+            return False
+
+        if self.client or self.backend != "torch":
+            print("   ⚠️  Speculative decoding needs in-process torch models")
+            return False
+
+        speculative = SpeculativeGenerator(
+            self.models["code_gen"],
+            self.models["text_gen"],
+            num_draft_tokens=num_draft_tokens
+        )
+
+        if not speculative.compatible:
+            print(f"   ⚠️  Speculative decoding disabled: {speculative.incompatible_reason}")
+            return False
+
+        self.models["code_gen"] = speculative
+        print(f"   ✅ Speculative decoding enabled ({num_draft_tokens} draft tokens)")
+        return True
+
+    async def generate_lua_code(self, prompt, max_length=200, context="", num_candidates=1):
+        """Generate Lua code (max_length counts tokens after the prompt)"""
 
         if "code_gen" not in self.models:
             return {"error": "Code generation model not loaded"}
 
         try:
-            # Format prompt for Lua
-            lua_prompt = f"-- {prompt}\nlocal function"
+            # Format prompt for Lua: shared header and context first, task last
+            prefix, lua_prompt = build_lua_prompt(prompt, context)
 
-            result = self.models["code_gen"](
+            # Generation blocks; run it off the event loop so other providers keep going
+            result = await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+                self.models["code_gen"],
                 lua_prompt,
-                max_length=max_length,
-                num_return_sequences=1,
+                prefix=prefix,
+                max_new_tokens=max_length,
+                num_return_sequences=num_candidates,
                 temperature=0.7,
                 do_sample=True
-            )
+            ))
 
-            code = result[0]["generated_text"]
+            # Every backend returns the task prompt and its continuation, never the shared context
+            candidates = [strip_prefix(r["generated_text"], prefix) for r in result]
 
             return {
                 "prompt": prompt,
-                "code": code,
+                "code": candidates[0],
+                "candidates": candidates,
                 "success": True
             }
 
@@ -259,7 +340,10 @@ class HuggingFaceGameAI:
         config = {
             "models_loaded": list(self.models.keys()),
             "device": self.device,
-            "gpu_available": torch.cuda.is_available(),
+            "gpu_available": self.gpu_available,
+            "quantized": self.quantize,
+            "speculative": isinstance(self.models.get("code_gen"), SpeculativeGenerator),
+            "backend": self.backend,
             "capabilities": {
                 "code_generation": "code_gen" in self.models,
                 "code_understanding": "code_bert" in self.models,
@@ -286,6 +370,9 @@ class HuggingFaceGameAI:
         await self.setup_code_understanding()
         await self.setup_text_generation()
 
+        if self.speculative:
+            self.enable_speculative_decoding()
+
         # Test models
         success = await self.test_models()
 
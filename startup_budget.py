@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Startup Time Budget
+
+Cold-starts the analyzer path (import autonomous_game_dev and build a
+GameQualityAnalyzer) in fresh interpreters under `python -X importtime`,
+reports the slowest imports, and fails if the median start exceeds the budget
+or if a heavy dependency (torch, transformers, numpy, gradio, ...) was
+imported along the way:
+
+    python startup_budget.py --budget-ms 400 --runs 5
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from typing import List, Dict, Any
+
+# Only needed once a model, the index or the UI is actually used
+HEAVY_MODULES = ("torch", "transformers", "numpy", "gradio", "onnxruntime", "optimum", "requests")
+
+DEFAULT_BUDGET_MS = 400
+
+# Runs in the child: time the analyzer path and list heavy modules it pulled in
+PROBE = """
+import sys, json, time, asyncio, contextlib, io
+start = time.perf_counter()
+from autonomous_game_dev import GameQualityAnalyzer
+analyzer = GameQualityAnalyzer({game_path!r})
+ready = time.perf_counter()
+if {analyze!r}:
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(analyzer.analyze_codebase())
+done = time.perf_counter()
+print(json.dumps({{
+    "ready_ms": (ready - start) * 1000,
+    "analyzed_ms": (done - start) * 1000,
+    "heavy": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of `-X importtime` output: module, depth, self and cumulative microseconds"""
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header row
+        name = fields[2].rstrip()
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1]),
+        })
+    return rows
+
+
+def measure(game_path, analyze=False) -> Dict[str, Any]:
+    """One cold start in a fresh interpreter"""
+
+    code = PROBE.format(game_path=str(game_path), analyze=analyze, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=Path(__file__).parent, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Analyzer probe failed:\n{result.stderr[-2000:]}")
+
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    probe["imports"] = parse_importtime(result.stderr)
+    return probe
+
+
+def check_budget(game_path=None, budget_ms=DEFAULT_BUDGET_MS, runs=5, analyze=False, top=10):
+    """Median cold start over several runs, the slowest imports and any heavy modules"""
+
+    game_path = game_path or Path(__file__).parent
+    samples = [measure(game_path, analyze) for _ in range(runs)]
+
+    key = "analyzed_ms" if analyze else "ready_ms"
+    timings = sorted(sample[key] for sample in samples)
+    median = timings[len(timings) // 2]
+
+    # Attribute time using the median run, by time spent in each module itself
+    typical = min(samples, key=lambda sample: abs(sample[key] - median))
+    slowest = sorted(typical["imports"], key=lambda row: row["self_us"], reverse=True)[:top]
+
+    heavy = sorted({name for sample in samples for name in sample["heavy"]})
+
+    return {
+        "measured": "import + analyze" if analyze else "import + analyzer",
+        "runs": runs,
+        "median_ms": round(median, 1),
+        "min_ms": round(timings[0], 1),
+        "max_ms": round(timings[-1], 1),
+        "budget_ms": budget_ms,
+        "heavy_modules": heavy,
+        "slowest_imports": [
+            {"module": row["module"], "self_ms": round(row["self_us"] / 1000, 1),
+             "cumulative_ms": round(row["cumulative_us"] / 1000, 1)}
+            for row in slowest
+        ],
+        "passed": median <= budget_ms and not heavy,
+    }
+
+
+def main():
+    """Main entry point"""
+
+    parser = argparse.ArgumentParser(description="Fail if the analyzer's cold start exceeds a time budget")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--game-path", default=None)
+    parser.add_argument("--analyze", action="store_true", help="Include one analyze_codebase() pass")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to report")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    report = check_budget(args.game_path, args.budget_ms, max(1, args.runs), args.analyze, args.top)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"⏱️  Cold start ({report['measured']}): median {report['median_ms']}ms "
+              f"(min {report['min_ms']}, max {report['max_ms']}, {report['runs']} runs), "
+              f"budget {report['budget_ms']:g}ms")
+        print("\n🐢 Slowest imports (self / cumulative ms)")
+        for row in report["slowest_imports"]:
+            print(f"   {row['self_ms']:>7.1f} {row['cumulative_ms']:>8.1f}  {row['module']}")
+
+    if report["heavy_modules"]:
+        print(f"\n❌ Heavy modules imported on the analyzer path: {', '.join(report['heavy_modules'])}")
+    if report["median_ms"] > report["budget_ms"]:
+        print(f"\n❌ Cold start {report['median_ms']}ms exceeds the {report['budget_ms']:g}ms budget")
+    if report["passed"]:
+        print("\n✅ Within budget")
+
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Task Collapsing
+
+The analyzer reports one issue per overlapping window, so a single duplicated
+region turns into dozens of near-identical tasks. Tasks are MinHashed over
+their type, file, description and snippet shingles, bucketed with LSH, and
+candidate pairs that describe the same code (same snippet, or line spans that
+touch) are merged into one task carrying the combined evidence.
+"""
+
+import re
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple
+
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+NUMBER = re.compile(r"\d+")
+WORD = re.compile(r"[a-z_]+|#")
+CODE_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+def task_shingles(task, size=3):
+    """Feature set of a task: type, file, description and snippet shingles"""
+
+    # Numbers (line counts, function indices) vary between otherwise identical tasks
+    text = NUMBER.sub("#", f"{task.get('description', '')} {task.get('suggestion', '')}".lower())
+    words = WORD.findall(text)
+
+    shingles = {f"type:{task.get('type', '')}", f"file:{task.get('file', '')}"}
+    shingles.update(" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1)))
+
+    # The offending code itself, when reported, dominates the description
+    tokens = CODE_TOKEN.findall(task.get("snippet", ""))
+    shingles.update("code:" + " ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+    return shingles
+
+
+def task_span(task) -> Optional[Tuple[int, int]]:
+    """Line span of a task, if the analyzer reported one"""
+
+    if task.get("line") is None:
+        return None
+    return task["line"], task.get("end_line", task["line"])
+
+
+class MinHasher:
+    """MinHash signatures with universal hashing"""
+
+    def __init__(self, num_perm=64, seed=1):
+        self.num_perm = num_perm
+        self.params = [
+            (_hash(f"{seed}:a:{i}") % (MERSENNE_PRIME - 1) + 1, _hash(f"{seed}:b:{i}") % MERSENNE_PRIME)
+            for i in range(num_perm)
+        ]
+
+    def signature(self, shingles):
+        hashes = [_hash(s) & MAX_HASH for s in shingles]
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in hashes) & MAX_HASH
+            for a, b in self.params
+        )
+
+    @staticmethod
+    def similarity(first, second):
+        """Estimated Jaccard similarity of two signatures"""
+
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class TaskDeduplicator:
+    """Collapses equivalent tasks before they reach the scheduler"""
+
+    def __init__(self, threshold=0.6, num_perm=64, bands=16, line_gap=10):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.line_gap = line_gap
+        self.hasher = MinHasher(num_perm)
+
+    def _spans_compatible(self, first, second):
+        """Tasks without spans are file-wide; spans must overlap or nearly touch"""
+
+        # Repeats of the same snippet are one task wherever they occur
+        if first.get("snippet") and second.get("snippet"):
+            return True
+
+        span_a, span_b = task_span(first), task_span(second)
+        if span_a is None or span_b is None:
+            return span_a is None and span_b is None
+        return span_a[0] <= span_b[1] + self.line_gap and span_b[0] <= span_a[1] + self.line_gap
+
+    def clusters(self, tasks: List[Dict[str, Any]]) -> List[List[int]]:
+        """Groups of task indices that describe the same work"""
+
+        signatures = [self.hasher.signature(task_shingles(task)) for task in tasks]
+
+        # LSH: tasks in the same file sharing any band bucket become candidate pairs
+        buckets = {}
+        for index, signature in enumerate(signatures):
+            task_file = tasks[index].get("file")
+            for band in range(self.bands):
+                key = (task_file, band, signature[band * self.rows:(band + 1) * self.rows])
+                buckets.setdefault(key, []).append(index)
+
+        parent = list(range(len(tasks)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        checked = set()
+        for members in buckets.values():
+            for position, i in enumerate(members):
+                for j in members[position + 1:]:
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+
+                    if (MinHasher.similarity(signatures[i], signatures[j]) >= self.threshold
+                            and self._spans_compatible(tasks[i], tasks[j])):
+                        parent[find(j)] = find(i)
+
+        groups = {}
+        for index in range(len(tasks)):
+            groups.setdefault(find(index), []).append(index)
+        return list(groups.values())
+
+    def merge(self, group: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One task with the group's combined evidence"""
+
+        if len(group) == 1:
+            return group[0]
+
+        merged = dict(group[0])
+        spans = [task_span(task) for task in group if task_span(task)]
+        if spans:
+            merged["line"] = min(start for start, _ in spans)
+            merged["end_line"] = max(end for _, end in spans)
+            merged["lines"] = sorted({start for start, _ in spans})
+
+        merged["occurrences"] = sum(task.get("occurrences", 1) for task in group)
+        merged["evidence"] = [
+            {key: task[key] for key in ("description", "line", "end_line") if key in task}
+            for task in group
+        ]
+        return merged
+
+    def collapse(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge near-duplicate tasks, keeping first-seen order"""
+
+        return [self.merge([tasks[i] for i in group]) for group in self.clusters(tasks)]
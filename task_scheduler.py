@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Cost-Aware Task Scheduler
+
+Orders improvement tasks by expected value per second of compute. Value comes
+from the task's normalized severity/priority, how often it was reported, and
+the historical acceptance rate for its type; cost comes from the durations and
+provider token counts recorded in the development log, with tokens priced in
+seconds of provider compute. Each file's later tasks are discounted so one
+large file cannot take the whole budget.
+"""
+
+import heapq
+import math
+from typing import List, Dict, Any, Optional
+
+
+# Issues carry "severity", opportunities carry "priority"; both use one scale
+URGENCY_WEIGHTS = {"critical": 4.0, "high": 3.0, "medium": 2.0, "low": 1.0}
+
+DEFAULT_SECONDS = 30.0
+DEFAULT_TOKENS = 400
+
+# Seconds charged per provider token on top of wall time; providers are shared
+# between workers, so tokens spent on one task delay the others (about 50 tokens/s)
+TOKEN_SECONDS = 0.02
+
+
+def task_weight(task):
+    """Normalized urgency of a task from its severity or priority"""
+
+    level = task.get("severity") or task.get("priority") or "low"
+    return URGENCY_WEIGHTS.get(str(level).lower(), 1.0)
+
+
+class CostModel:
+    """Per task-type duration, token and acceptance estimates from past runs"""
+
+    def __init__(self, prior_successes=1.0, prior_failures=1.0):
+        self.prior = (prior_successes, prior_failures)
+        self.types: Dict[str, Dict[str, float]] = {}
+        self.overall = self._empty()
+
+    @staticmethod
+    def _empty():
+        return {"runs": 0, "successes": 0, "seconds": 0.0, "tokens": 0.0}
+
+    @classmethod
+    def from_dev_log(cls, dev_log):
+        """Build the model from the development log's index, without reading the entries"""
+
+        model = cls()
+        for run in dev_log.run_stats():
+            model.add_run(run["task_type"], run["success"], run["duration"], run["tokens"])
+        return model
+
+    def update(self, result: Dict[str, Any]):
+        """Account for one develop_feature result"""
+
+        if "duration" not in result:
+            return
+
+        tokens = sum(p.get("tokens", 0) for p in result.get("providers", {}).values())
+        self.add_run(result.get("task_type"), result.get("success"), result["duration"], tokens)
+
+    def add_run(self, task_type, success, seconds, tokens):
+        for stats in (self.overall, self.types.setdefault(task_type or "feature", self._empty())):
+            stats["runs"] += 1
+            stats["successes"] += int(bool(success))
+            stats["seconds"] += seconds
+            stats["tokens"] += tokens
+
+    def _stats(self, task_type):
+        stats = self.types.get(task_type)
+        return stats if stats and stats["runs"] else self.overall
+
+    def expected_seconds(self, task_type):
+        stats = self._stats(task_type)
+        return stats["seconds"] / stats["runs"] if stats["runs"] else DEFAULT_SECONDS
+
+    def expected_tokens(self, task_type):
+        stats = self._stats(task_type)
+        return stats["tokens"] / stats["runs"] if stats["runs"] else DEFAULT_TOKENS
+
+    def acceptance(self, task_type):
+        """Posterior mean acceptance rate under a Beta prior"""
+
+        stats = self.types.get(task_type, self._empty())
+        successes, failures = self.prior
+        return (stats["successes"] + successes) / (stats["runs"] + successes + failures)
+
+
+class TaskScheduler:
+    """Heap-based scheduler maximizing expected accepted improvements per second"""
+
+    def __init__(self, cost_model: Optional[CostModel] = None, file_discount=0.5, token_seconds=TOKEN_SECONDS):
+        self.cost_model = cost_model or CostModel()
+        self.file_discount = file_discount
+        self.token_seconds = token_seconds
+
+    def estimate(self, task) -> Dict[str, float]:
+        """Expected value, cost and value per second of one task"""
+
+        task_type = task.get("type", "feature")
+        seconds = self.cost_model.expected_seconds(task_type)
+        tokens = self.cost_model.expected_tokens(task_type)
+        cost = max(seconds + tokens * self.token_seconds, 1e-3)
+
+        # Repeated evidence raises value with diminishing returns
+        evidence = 1 + math.log(task.get("occurrences", 1))
+        value = task_weight(task) * evidence * self.cost_model.acceptance(task_type)
+
+        return {
+            "value": round(value, 4),
+            "seconds": round(seconds, 2),
+            "tokens": round(tokens),
+            "cost": round(cost, 2),
+            "value_per_second": value / cost
+        }
+
+    def schedule(self, tasks: List[Dict[str, Any]], budget_seconds=None, max_tasks=None) -> List[Dict[str, Any]]:
+        """Tasks in execution order, fitted to the compute budget"""
+
+        estimates = [self.estimate(task) for task in tasks]
+        picks_per_file: Dict[str, int] = {}
+
+        def priority(index):
+            picks = picks_per_file.get(tasks[index].get("file"), 0)
+            return estimates[index]["value_per_second"] * self.file_discount ** picks
+
+        # Lazy heap: a popped entry whose file gained picks since it was pushed is re-keyed
+        heap = [(-priority(i), i, 0) for i in range(len(tasks))]
+        heapq.heapify(heap)
+
+        plan = []
+        spent = 0.0
+
+        while heap and (max_tasks is None or len(plan) < max_tasks):
+            key, index, picks_seen = heapq.heappop(heap)
+            task_file = tasks[index].get("file")
+            picks = picks_per_file.get(task_file, 0)
+
+            if picks != picks_seen:
+                heapq.heappush(heap, (-priority(index), index, picks))
+                continue
+
+            # The first task always runs so a small budget still makes progress
+            cost = estimates[index]["cost"]
+            if budget_seconds is not None and plan and spent + cost > budget_seconds:
+                continue
+
+            spent += cost
+            picks_per_file[task_file] = picks + 1
+            plan.append({**tasks[index], "schedule": {**estimates[index], "priority": round(-key, 5)}})
+
+        return plan
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+import autonomous_game_dev
+from autonomous_game_dev import AutonomousGameDeveloper
+from stub_backends import stub_backends
+
+
+REFERENCE = """local CoinService = {}
+
+local function addCoins(player, amount)
+    player.Coins.Value = player.Coins.Value + amount
+end
+
+return CoinService
+"""
+
+
+class FakeEmbedder:
+    """Character-histogram embeddings, normalized like CodeBertEmbedder's"""
+
+    def embed(self, texts):
+        import torch
+
+        vectors = torch.zeros(len(texts), 128)
+        for i, text in enumerate(texts):
+            for char in text:
+                vectors[i, ord(char) % 128] += 1
+        return torch.nn.functional.normalize(vectors, dim=1)
+
+
+class FakeHuggingFaceAI:
+    """HuggingFaceGameAI whose models only appear once their setup runs"""
+
+    def __init__(self, embedder=None):
+        self.models = {}
+        self.embedder = embedder
+        self.setup_calls = []
+
+    async def setup_code_generation(self):
+        self.setup_calls.append("code_gen")
+        return False
+
+    async def setup_code_understanding(self):
+        self.setup_calls.append("code_bert")
+        if self.embedder is None:
+            return False
+        self.models["code_bert"] = self.embedder
+        return True
+
+
+def make_developer(tmp_path, hf_ai):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "CoinService.lua").write_text(REFERENCE)
+
+    developer = AutonomousGameDeveloper(game_path=tmp_path, backends=stub_backends())
+    developer.hf_ai = hf_ai
+    developer._hf_setup_needed = True
+    return developer
+
+
+CANDIDATES = [
+    {"source": "llm", "code": "x", "quality": 0.9, "confidence": 0.9},
+    {"source": "huggingface", "code": REFERENCE.replace("addCoins", "giveCoins"), "quality": 0.5, "confidence": 0.6},
+]
+
+
+def test_ranker_runs_after_models_load(tmp_path):
+    pytest.importorskip("torch")
+
+    hf_ai = FakeHuggingFaceAI(FakeEmbedder())
+    developer = make_developer(tmp_path, hf_ai)
+
+    best = asyncio.run(developer._select_best_implementation(CANDIDATES))
+
+    assert hf_ai.setup_calls == ["code_gen", "code_bert"]
+    assert developer.ranker is not None
+    assert best["source"] == "huggingface"
+    assert best["nearest_reference"] == "CoinService.lua:addCoins"
+
+
+def test_missing_ranker_is_only_looked_up_once(tmp_path, monkeypatch):
+    hf_ai = FakeHuggingFaceAI()
+    developer = make_developer(tmp_path, hf_ai)
+
+    lookups = []
+    monkeypatch.setattr(
+        autonomous_game_dev.CandidateRanker, "from_hf_ai",
+        classmethod(lambda cls, *args: lookups.append(args) or None)
+    )
+
+    for _ in range(3):
+        best = asyncio.run(developer._select_best_implementation(CANDIDATES))
+        assert "score" in best
+
+    assert len(lookups) == 1
+    assert hf_ai.setup_calls == ["code_gen", "code_bert"]
@@ -0,0 +1,17 @@
+from checkpoint import Checkpoint
+
+
+def test_stage_that_returned_none_stays_completed(tmp_path):
+    run = {"iterations": 1}
+    checkpoint = Checkpoint("autonomous_loop", tmp_path)
+    checkpoint.start(run)
+    checkpoint.begin("Add a goblin boss")
+    checkpoint.record("learned", None)
+
+    resumed = Checkpoint("autonomous_loop", tmp_path)
+    assert resumed.start(run, resume=True)
+    resumed.begin("Add a goblin boss")
+
+    assert resumed.completed("learned")
+    assert resumed.stage("learned") is None
+    assert not resumed.completed("saved")
@@ -0,0 +1,37 @@
+from datastore_budget import CallSite, MethodProfile, ServerSimulation, check_budget, request_budget
+
+
+def make_extraction():
+    """Players load on join and save on leave, like DataService"""
+
+    load = MethodProfile("LoadPlayerData", 10)
+    load.calls.append(CallSite("LoadPlayerData", "GetAsync", 12))
+    save = MethodProfile("SavePlayerData", 30)
+    save.calls.append(CallSite("SavePlayerData", "UpdateAsync", 32))
+
+    return {
+        "methods": {"LoadPlayerData": load, "SavePlayerData": save},
+        "triggers": [
+            {"kind": "player_join", "method": "LoadPlayerData", "interval": None},
+            {"kind": "player_leave", "method": "SavePlayerData", "interval": None},
+        ]
+    }
+
+
+def test_budget_is_base_plus_per_player():
+    assert request_budget("get", 0) == 60
+    assert request_budget("set", 50) == 60 + 10 * 50
+    assert request_budget("get_sorted", 20) == 5 + 2 * 20
+
+
+def test_shutdown_saves_count_against_the_full_server():
+    # Sessions far longer than the run, so every player is still in the server at shutdown
+    simulation = ServerSimulation(make_extraction(), max_players=50, duration=30, mean_session=10 ** 9,
+                                  initial_players=50)
+    report = simulation.run()
+
+    get = report["categories"]["get"]
+    assert get["total_requests"] == 100
+    assert get["requests_per_minute"] == 100
+    assert get["budget"] == request_budget("get", 50)
+    assert not check_budget(report)
@@ -0,0 +1,107 @@
+from lua_optimizer import LuaOptimizer, ConfigSchema
+
+
+HEADER = """local ReplicatedStorage = game:GetService("ReplicatedStorage")
+local Config = require(ReplicatedStorage.Config)
+
+"""
+
+
+def make_optimizer():
+    optimizer = LuaOptimizer(passes=("hoist",))
+    optimizer.config_schema = ConfigSchema({("Objects",), ("Objects", "Goblin"), ("Objects", "Goblin", "Value")})
+    return optimizer
+
+
+def test_hoists_invariant_config_read():
+    code = HEADER + """for i = 1, 10 do
+    print(Config.Objects.Goblin.Value)
+end
+"""
+
+    result = make_optimizer().optimize(code)
+
+    assert "local goblinValue = Config.Objects.Goblin.Value\nfor i = 1, 10 do\n    print(goblinValue)" in result.code
+    assert len(result.changes) == 1
+
+
+def test_skips_loop_that_redeclares_config():
+    code = HEADER + """for i = 1, 10 do
+    local Config = {Objects = {Goblin = {Value = i}}}
+    print(Config.Objects.Goblin.Value)
+end
+"""
+
+    result = make_optimizer().optimize(code)
+
+    assert result.code == code
+    assert not result.changes
+
+
+def test_skips_loop_that_assigns_or_binds_config():
+    assigned = HEADER + """while true do
+    Config = reload()
+    print(Config.Objects.Goblin.Value)
+end
+"""
+    parameter = HEADER + """for _, Config in ipairs(configs) do
+    print(Config.Objects.Goblin.Value)
+end
+"""
+
+    optimizer = make_optimizer()
+    for code in (assigned, parameter):
+        result = optimizer.optimize(code)
+        assert result.code == code
+        assert not result.changes
+
+
+def test_wait_keeps_both_results_when_they_are_used():
+    code = """local elapsed, now = wait(1)
+print(wait())
+wait(0.5)
+local delta = wait()
+"""
+
+    result = LuaOptimizer(passes=("deprecated",)).optimize(code)
+
+    assert result.code == """local elapsed, now = wait(1)
+print(wait())
+task.wait(0.5)
+local delta = task.wait()
+"""
+    assert len(result.changes) == 2
+
+
+def test_skips_loop_that_writes_through_a_config_alias():
+    aliased = HEADER + """local objects = Config.Objects
+for i = 1, 10 do
+    local goblin = objects.Goblin
+    goblin.Value = i
+    print(Config.Objects.Goblin.Value)
+end
+"""
+    iterated = HEADER + """for name, object in pairs(Config.Objects) do
+    object.Value = 0
+    print(Config.Objects.Goblin.Value)
+end
+"""
+
+    optimizer = make_optimizer()
+    for code in (aliased, iterated):
+        result = optimizer.optimize(code)
+        assert result.code == code
+        assert not result.changes
+
+
+def test_skips_loop_that_passes_a_config_table_to_a_call():
+    code = HEADER + """for i = 1, 10 do
+    rawset(Config.Objects.Goblin, "Value", i)
+    print(Config.Objects.Goblin.Value)
+end
+"""
+
+    result = make_optimizer().optimize(code)
+
+    assert result.code == code
+    assert not result.changes
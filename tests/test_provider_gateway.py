@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from provider_gateway import ProviderGateway, ProviderTimeout
+
+
+def test_timed_out_executor_call_keeps_its_slot():
+    running = []
+    overlapped = threading.Event()
+
+    def generate(seconds):
+        running.append(seconds)
+        if len(running) > 1:
+            overlapped.set()
+        time.sleep(seconds)
+        running.remove(seconds)
+        return seconds
+
+    async def call(seconds):
+        return await asyncio.get_running_loop().run_in_executor(None, generate, seconds)
+
+    async def scenario():
+        gateway = ProviderGateway("huggingface", timeout=0.1, initial_limit=1, max_limit=1)
+
+        with pytest.raises(ProviderTimeout):
+            await gateway.call(call, 0.4)
+        assert gateway.limiter.in_flight == 1
+
+        # Waits for the abandoned generation instead of running beside it
+        assert await gateway.call(call, 0.01) == 0.01
+        assert gateway.limiter.in_flight == 0
+        return gateway.snapshot()
+
+    snapshot = asyncio.run(scenario())
+
+    assert not overlapped.is_set()
+    assert snapshot["timed_out"] == 1
+    assert snapshot["succeeded"] == 1
@@ -0,0 +1,24 @@
+from records import Finding, FindingType, Level
+
+
+def test_finding_reads_like_the_dict_it_replaces():
+    finding = Finding(FindingType.DUPLICATION, "CoinService.lua", "Duplicated code block detected",
+                      severity=Level.LOW, line=3, end_line=7)
+
+    assert finding["type"] == "duplication"
+    assert finding.get("priority") is None
+    assert "suggestion" not in finding
+    assert dict(finding) == {
+        "type": "duplication", "severity": "low", "file": "CoinService.lua",
+        "line": 3, "end_line": 7, "description": "Duplicated code block detected"
+    }
+
+
+def test_findings_are_hashable():
+    first = Finding("error_handling", "CoinService.lua", "No error handling found", severity="medium")
+    same = Finding(FindingType.ERROR_HANDLING, "CoinService.lua", "No error handling found", severity=Level.MEDIUM)
+    other = Finding("error_handling", "PetService.lua", "No error handling found", severity="medium")
+
+    assert first == same
+    assert len({first, same, other}) == 2
+    assert {first: 1}[same] == 1
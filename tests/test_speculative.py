@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from speculative import SpeculativeGenerator
+
+
+GPT2_VOCAB = {"<|endoftext|>": 50256, "local": 12001, "end": 437}
+# codegen adds whitespace runs above gpt2's ids, and pads its output rows to 51200
+CODEGEN_VOCAB = {**GPT2_VOCAB, "        ": 50257, "    ": 50261}
+
+
+class FakePipeline:
+    def __init__(self, vocab, vocab_size):
+        self.tokenizer = SimpleNamespace(eos_token_id=50256, get_vocab=lambda: dict(vocab))
+        self.model = SimpleNamespace(config=SimpleNamespace(vocab_size=vocab_size))
+        self.calls = []
+
+    def __call__(self, prompt, **options):
+        self.calls.append(options)
+        return [{"generated_text": prompt + "\nend"}]
+
+
+def test_main_tokens_outside_the_draft_vocab_fall_back():
+    main = FakePipeline(CODEGEN_VOCAB, 51200)
+    speculative = SpeculativeGenerator(main, FakePipeline(GPT2_VOCAB, 50257))
+
+    assert not speculative.compatible
+    assert "missing from the draft vocabulary" in speculative.incompatible_reason
+
+    prompt = "local function spawn()\n        local goblin = {}"
+    assert speculative(prompt, max_new_tokens=8) == [{"generated_text": prompt + "\nend"}]
+    assert len(main.calls) == 1
+    assert speculative.stats["fallbacks"] == 1
+
+
+def test_padded_output_rows_fall_back():
+    speculative = SpeculativeGenerator(FakePipeline(GPT2_VOCAB, 51200), FakePipeline(GPT2_VOCAB, 50257))
+
+    assert not speculative.compatible
+    assert "vocabulary sizes differ" in speculative.incompatible_reason
+
+
+def test_sampling_uses_the_pipeline():
+    main = FakePipeline(GPT2_VOCAB, 50257)
+    speculative = SpeculativeGenerator(main, FakePipeline(GPT2_VOCAB, 50257))
+    assert speculative.compatible
+
+    speculative("local", max_new_tokens=8, temperature=0.7, do_sample=True)
+
+    assert main.calls == [{"num_return_sequences": 1, "max_new_tokens": 8, "temperature": 0.7, "do_sample": True}]
@@ -0,0 +1,17 @@
+from task_scheduler import CostModel, TaskScheduler
+
+
+def test_token_heavy_tasks_cost_more():
+    model = CostModel()
+    model.add_run("feature", True, 10.0, 2000)
+    model.add_run("code_smell", True, 12.0, 100)
+    scheduler = TaskScheduler(model, token_seconds=0.02)
+
+    plan = scheduler.schedule([
+        {"type": "feature", "file": "BossWaveService.lua", "priority": "medium"},
+        {"type": "code_smell", "file": "CoinService.lua", "severity": "medium"},
+    ], budget_seconds=40)
+
+    # Faster on the clock, but 2000 tokens make the feature the dearer task and push it past the budget
+    assert [task["type"] for task in plan] == ["code_smell"]
+    assert plan[0]["schedule"]["cost"] == 12.0 + 100 * 0.02
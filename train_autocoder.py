@@ -10,8 +10,21 @@ import os
 import sys
 import json
 import asyncio
+import inspect
+import argparse
 from pathlib import Path
 
+from lua_corpus import LuaCorpus
+from checkpoint import Checkpoint, default_checkpoint_dir
+
+# Large checkpoint values are kept in the artifact store shared with the worker
+sys.path.insert(0, str(Path(__file__).parent / "huggingface_workers"))
+
+from artifact_store import ArtifactStore, default_store_path
+
+# Learned patterns are snapshotted (and training progress checkpointed) every this many files
+SNAPSHOT_EVERY = 10
+
 # Add autocoder to path
 autocoder_path = Path(__file__).parent.parent.parent / "code" / "autocoder"
 sys.path.insert(0, str(autocoder_path))
@@ -29,12 +42,21 @@ except ImportError:
 class RobloxGameTrainer:
     """Trains AI models on Roblox game code"""
 
-    def __init__(self, game_path=None):
+    def __init__(self, game_path=None, resume=False):
         self.game_path = game_path or Path(__file__).parent
         self.src_path = self.game_path / "src"
+        self.corpus = LuaCorpus(self.src_path)
         self.coder = PatternAssistedCoder()
         self.llm = MultiProviderLLM()
 
+        # Per-file and per-stage progress, so --resume skips finished work
+        self.resume = resume
+        self.checkpoint = Checkpoint(
+            "training", default_checkpoint_dir(self.game_path),
+            blobs=ArtifactStore(default_store_path(self.game_path))
+        )
+        self.patterns_snapshot = self.checkpoint.path.with_name("training_patterns.json")
+
         print(f"🎮 Roblox Game Trainer")
         print(f"   Game Path: {self.game_path}")
         print(f"   Source Path: {self.src_path}")
@@ -46,18 +68,19 @@ class RobloxGameTrainer:
 
         print("\n📂 Collecting training data...")
 
-        # Find all Lua files
-        lua_files = list(self.src_path.rglob("*.lua"))
+        # Pack new or changed Lua files; the rest are read from the mapped pack
+        self.corpus.refresh()
 
-        for lua_file in lua_files:
+        for relative in self.corpus.paths():
+            lua_file = self.src_path / relative
             try:
-                with open(lua_file, 'r', encoding='utf-8') as f:
-                    code = f.read()
+                code = self.corpus.read(relative)
 
                 # Extract metadata
                 relative_path = lua_file.relative_to(self.game_path)
                 file_info = {
                     "file": str(relative_path),
+                    "hash": self.corpus.entry(relative)["hash"],
                     "code": code,
                     "lines": len(code.split('\n')),
                     "category": self._categorize_file(lua_file.name),
@@ -108,7 +131,16 @@ class RobloxGameTrainer:
 
         patterns_learned = 0
 
+        # Files learned before an interruption count only if their patterns can be reloaded
+        trained = await self._restore_patterns()
+        since_snapshot = 0
+
         for file_info in training_data:
+            if trained.get(file_info["file"]) == file_info["hash"]:
+                patterns_learned += 1
+                print(f"   💾 {file_info['file']} already learned")
+                continue
+
             try:
                 # Feed code to pattern learner
                 await self.coder.learn_from_code(
@@ -123,12 +155,46 @@ class RobloxGameTrainer:
                 )
 
                 patterns_learned += 1
+                trained[file_info["file"]] = file_info["hash"]
+                since_snapshot += 1
                 print(f"   ✅ Learned patterns from {file_info['file']}")
 
+                if since_snapshot >= SNAPSHOT_EVERY:
+                    await self._snapshot_patterns(trained)
+                    since_snapshot = 0
+
             except Exception as e:
                 print(f"   ❌ Failed to learn from {file_info['file']}: {e}")
 
+        if since_snapshot:
+            await self._snapshot_patterns(trained)
+
         print(f"\n📈 Learned patterns from {patterns_learned}/{len(training_data)} files")
+        return since_snapshot > 0 or not self.checkpoint.get("trained_complete")
+
+    async def _restore_patterns(self):
+        """Files already learned in the checkpointed run, after reloading their patterns"""
+
+        trained = self.checkpoint.get("trained") or {}
+        if not trained:
+            return {}
+
+        load_patterns = getattr(self.coder, "load_patterns", None)
+        if load_patterns is None or not self.patterns_snapshot.exists():
+            print("   ⚠️  Learned patterns cannot be reloaded; relearning every file")
+            return {}
+
+        loaded = load_patterns(str(self.patterns_snapshot))
+        if inspect.isawaitable(loaded):
+            await loaded
+        print(f"   💾 Reloaded patterns from {len(trained)} files")
+        return dict(trained)
+
+    async def _snapshot_patterns(self, trained):
+        """Save learned patterns, then record which files they cover"""
+
+        await self.coder.save_patterns(str(self.patterns_snapshot))
+        self.checkpoint.update(trained=trained, trained_complete=False)
 
     async def extract_common_patterns(self):
         """Extract and analyze common patterns"""
@@ -136,10 +202,15 @@ class RobloxGameTrainer:
         print("\n🔍 Extracting common patterns...")
 
         try:
-            patterns = await self.coder.analyze_patterns(
-                domain="roblox",
-                categories=["service", "ui", "config", "controller"]
-            )
+            patterns = self.checkpoint.get("patterns")
+            if patterns is not None:
+                print("   💾 Restored from checkpoint")
+            else:
+                patterns = await self.coder.analyze_patterns(
+                    domain="roblox",
+                    categories=["service", "ui", "config", "controller"]
+                )
+                self.checkpoint.update(patterns=self.checkpoint.compact(patterns))
 
             print(f"\n📋 Found {len(patterns)} common patterns:")
             for pattern in patterns[:10]:  # Show top 10
@@ -167,7 +238,15 @@ class RobloxGameTrainer:
 
         results = []
 
+        # Each finished prompt is checkpointed; generation is the expensive part
+        finished = self.checkpoint.get("tests") or {}
+
         for prompt in test_prompts:
+            if prompt in finished:
+                print(f"\n   💾 {prompt}: restored from checkpoint")
+                results.append(finished[prompt])
+                continue
+
             try:
                 print(f"\n   📝 Prompt: {prompt}")
 
@@ -181,9 +260,11 @@ class RobloxGameTrainer:
                 quality = result.get("quality_score", 0)
                 confidence = result.get("confidence", 0)
 
+                lines = len(result.get("code", "").split("\n"))
+
                 print(f"      Quality: {quality:.2f}")
                 print(f"      Confidence: {confidence:.2f}")
-                print(f"      Lines: {len(result.get('code', '').split('\\n'))}")
+                print(f"      Lines: {lines}")
 
                 results.append({
                     "prompt": prompt,
@@ -191,6 +272,8 @@ class RobloxGameTrainer:
                     "confidence": confidence,
                     "success": quality > 0.7 and confidence > 0.6
                 })
+                finished[prompt] = results[-1]
+                self.checkpoint.update(tests=finished)
 
             except Exception as e:
                 print(f"      ❌ Generation failed: {e}")
@@ -224,7 +307,7 @@ class RobloxGameTrainer:
 
             report = {
                 "game": "Roblox Multiplication Game",
-                "files_trained": len(list(self.src_path.rglob("*.lua"))),
+                "files_trained": len(self.corpus),
                 "domain": "roblox",
                 "language": "lua",
                 "timestamp": str(asyncio.get_event_loop().time()),
@@ -247,6 +330,11 @@ class RobloxGameTrainer:
         print("   Training on: Roblox Multiplication Game")
         print("=" * 60)
 
+        if self.checkpoint.start(resume=self.resume):
+            print("💾 Resuming from checkpoint")
+        elif self.resume:
+            print("💾 No checkpoint found, starting fresh")
+
         # Step 1: Collect data
         training_data = await self.collect_training_data()
 
@@ -254,8 +342,9 @@ class RobloxGameTrainer:
             print("❌ No training data found!")
             return False
 
-        # Step 2: Train patterns
-        await self.train_patterns(training_data)
+        # Step 2: Train patterns; anything newly learned invalidates the later stages
+        if await self.train_patterns(training_data):
+            self.checkpoint.update(trained_complete=True, patterns=None, tests=None)
 
         # Step 3: Extract patterns
         patterns = await self.extract_common_patterns()
@@ -266,6 +355,11 @@ class RobloxGameTrainer:
         # Step 5: Save model
         await self.save_trained_model()
 
+        # Finished runs start fresh next time
+        self.checkpoint.clear()
+        if self.patterns_snapshot.exists():
+            self.patterns_snapshot.unlink()
+
         # Step 6: Summary
         print("\n" + "=" * 60)
         print("✅ Training Complete!")
@@ -283,6 +377,10 @@ class RobloxGameTrainer:
 async def main():
     """Main entry point"""
 
+    parser = argparse.ArgumentParser(description="Train AutoCoder on the game's Lua code")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint")
+    args = parser.parse_args()
+
     print("🎮 Roblox Game AI Training System\n")
 
     # Check if AutoCoder is available
@@ -298,7 +396,7 @@ async def main():
         return
 
     # Run training
-    trainer = RobloxGameTrainer()
+    trainer = RobloxGameTrainer(resume=args.resume)
 
     success = await trainer.run_full_training()
 